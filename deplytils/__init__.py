@@ -1 +1,59 @@
-"""putils"""
+"""
+putils. The public classes of deplytils are importable from the package,
+e.g. `from deplytils import CoverageContext`, their modules, and the
+third party modules these import, being loaded on first access only.
+"""
+import importlib
+import sys
+import types
+
+_EXPORTS = {
+    'deplytils.async_decorators': (
+        'cached_async_class_property', 'cached_async_property'),
+    'deplytils.cache': ('PickleCache', 'ResultCache'),
+    'deplytils.contexts.coverage': ('CoverageContext', 'StrictCoverage'),
+    'deplytils.contexts.coverage_collector': ('CoverageCollector',),
+    'deplytils.contexts.coverage_evaluation': ('CoverageEvaluation',),
+    'deplytils.contexts.coverage_shared': ('SharedTracer',),
+    'deplytils.contexts.performance': (
+        'BudgetExceeded', 'StrictMemory', 'StrictTiming'),
+    'deplytils.decorators': (
+        'ExpiringCache', 'cached_class_property', 'cached_classmethod',
+        'cached_property', 'class_property', 'invalidate'),
+    'deplytils.extensions.lint': ('ProjectLinter',),
+    'deplytils.extensions.lint_profile': ('FileProfiler',),
+    'deplytils.extensions.lint_reporter': (
+        'LintFailure', 'StreamingReporter'),
+    'deplytils.extensions.lint_server': ('LintServer',),
+    'deplytils.impact': ('ImpactIndex', 'ImpactTestRunner'),
+    'deplytils.mocks': ('MockCoverage',),
+    'deplytils.pipeline': ('Pipeline', 'Step', 'StepResult'),
+    'deplytils.sharding': ('ShardedTestRunner',),
+    'deplytils.watch': ('ImportGraph', 'Watcher'),
+}
+_MODULES = dict((name, module) for module, names in _EXPORTS.items()
+                for name in names)
+__all__ = sorted(_MODULES)
+
+
+class _LazyPackage(types.ModuleType):
+    """Package importing the module of an export on its first access"""
+
+    def __getattr__(self, name):
+        if name not in _MODULES:
+            raise AttributeError("module '{}' has no attribute '{}'".format(
+                self.__name__, name))
+        value = getattr(importlib.import_module(_MODULES[name]), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__).union(__all__))
+
+
+# replaces the package rather than changing its class, which old pythons
+# can't do, keeping the package alive for the globals of this module
+_PACKAGE = _LazyPackage(__name__, __doc__)
+_PACKAGE.__dict__.update(vars(sys.modules[__name__]))
+_PACKAGE.__dict__['_original'] = sys.modules[__name__]
+sys.modules[__name__] = _PACKAGE
@@ -0,0 +1,100 @@
+"""
+Cached decorators of coroutine functions, whose values are awaited. The
+first access starts a task computing the value, which every later access
+awaits, so concurrent first awaits share a single computation. Requires
+asyncio, so python 3.4.4 or later.
+
+A plain class_property already works with coroutine functions, as every
+access starts and awaits a computation of its own.
+"""
+import asyncio
+
+from deplytils.decorators import cached_class_property, cached_property
+
+
+# noinspection PyPep8Naming pylint: disable=invalid-name,unused-variable
+class cached_async_class_property(cached_class_property):
+    """
+    Decorator to transform a class method returning an awaitable into an
+    awaitable class field, e.g. `await Class.field`, cached as
+    cached_class_property caches values, deleting it included. A failed
+    or cancelled computation is not cached: the tasks awaiting it get its
+    error, and the next access starts a new one. Cancelling a task
+    awaiting the field does not cancel the shared computation.
+    """
+
+    def __init__(self, method, ttl=None):
+        """
+        :param method: class method returning an awaitable
+        :param ttl: see cached_class_property
+        """
+        super(cached_async_class_property, self).__init__(method, ttl=ttl)
+        self.options = dict(ttl=ttl)
+
+    def __get__(self, instance, owner=None):
+        """
+        Get an awaitable of the value of the class, starting its
+        computation if needed. Must be accessed from the event loop.
+
+        :param instance: self instance
+        :param owner: type of the class
+        :return: awaitable of the cached value
+        """
+        return asyncio.shield(super(cached_async_class_property, self)
+                              .__get__(instance, owner))
+
+    def _compute(self, owner):
+        """Start the computation of a class, forgotten if it fails"""
+        task = asyncio.ensure_future(self.method(owner))
+        self._defining_class = self._find_defining_class(owner)
+        task.add_done_callback(
+            lambda done: _discard_failed(self.values, owner, done))
+        return task
+
+
+# noinspection PyPep8Naming pylint: disable=invalid-name,unused-variable
+class cached_async_property(cached_property):
+    """
+    Decorator to make a method returning an awaitable behave like an
+    awaitable property, e.g. `await instance.field`, cached per instance
+    as cached_property caches values, deleting it included. Failures are
+    not cached, see cached_async_class_property.
+    """
+
+    def __init__(self, method, ttl=None):
+        """
+        :param method: method returning an awaitable
+        :param ttl: see cached_class_property
+        """
+        super(cached_async_property, self).__init__(method, ttl=ttl)
+
+    def __get__(self, instance, owner=None):
+        """
+        Get an awaitable of the value of an instance, starting its
+        computation if needed. Must be accessed from the event loop.
+
+        :param instance: instance, None when accessed from the class
+        :param owner: type of the instance
+        :return: awaitable of the cached value, or the property itself
+                from the class
+        """
+        if instance is None:
+            return self
+        return asyncio.shield(self.cache.get(
+            vars(instance), self.name, self._compute, instance))
+
+    def _compute(self, instance):
+        """Start the computation of an instance, forgotten if it fails"""
+        task = asyncio.ensure_future(self.method(instance))
+        task.add_done_callback(
+            lambda done: _discard_failed(vars(instance), self.name, done))
+        return task
+
+
+def _discard_failed(entries, key, task):
+    """Remove the entry of a task from the cache, if the task failed"""
+    if not task.cancelled() and task.exception() is None:
+        return
+    entry = entries.get(key)
+    if entry is not None and entry.value is task:
+        del entries[key]
@@ -0,0 +1,84 @@
+"""
+Benchmarks of deplytils, run with `python -m deplytils.bench <suite>`.
+Each suite is a module of this package with a `run(scale)` function
+returning its results, which are printed as JSON. The printed JSON of
+an earlier run can be given as a baseline, to compare results against.
+"""
+from __future__ import print_function  # pylint: disable=unused-variable
+
+import argparse
+import importlib
+import json
+import sys
+import timeit
+
+SUITES = ('discovery', 'coverage', 'combine', 'access')
+
+
+# pylint: disable=unused-variable
+def best_time(function, repeat=3, number=1):
+    """
+    Time a function, keeping the best of several repeats to reduce
+    noise
+
+    :param function: callable taking no arguments
+    :param repeat: number of timings - int
+    :param number: calls per timing - int
+    :return: seconds per call - float
+    """
+    return min(timeit.repeat(function, repeat=repeat, number=number)) / number
+
+
+def main(argv=None, output=None):
+    """
+    Run a benchmark suite and print its results
+
+    :param argv: command line arguments, defaults to sys.argv
+    :param output: file the JSON results are written to, defaults to
+            stdout
+    :return: results of the suite - dict
+    """
+    parser = argparse.ArgumentParser(prog='python -m deplytils.bench')
+    parser.add_argument('suite', choices=SUITES)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiplier of the workload sizes')
+    parser.add_argument('--baseline', type=argparse.FileType('r'),
+                        help='JSON printed by an earlier run, adding the '
+                             'ratios of the results to it')
+    args = parser.parse_args(argv)
+
+    suite = importlib.import_module('deplytils.bench.{}'.format(args.suite))
+    results = suite.run(args.scale)
+    printed = {'suite': args.suite, 'results': results}
+    if args.baseline:
+        with args.baseline:
+            printed['baseline'] = compare(
+                results, json.load(args.baseline)['results'])
+    print(json.dumps(printed, indent=2, sort_keys=True),
+          file=output or sys.stdout)
+    return results
+
+
+def compare(results, baseline):
+    """
+    Ratios of the numbers of results to the numbers of a baseline, e.g.
+    above 1 for timings that regressed
+
+    :param results: results of a suite - dict
+    :param baseline: results of an earlier run of the suite - dict
+    :return: ratios, keyed as the results, of the numbers found in both
+            - dict
+    """
+    ratios = {}
+    for key, value in results.items():
+        previous = baseline.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            ratios[key] = compare(value, previous)
+        elif _is_number(value) and _is_number(previous) and previous:
+            ratios[key] = value / float(previous)
+    return ratios
+
+
+def _is_number(value):
+    """Whether a JSON value is a number"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
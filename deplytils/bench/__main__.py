@@ -0,0 +1,4 @@
+"""Entry point of `python -m deplytils.bench`"""
+from deplytils.bench import main
+
+main()
@@ -0,0 +1,130 @@
+"""
+Compares the cost of reading a class level value: a plain class
+attribute, a class_property, a cached_class_property, one whose value is
+installed as a plain attribute, and a functools.lru_cache class method
+(on pythons having it), 1,000,000 reads each at scale 1
+"""
+import functools
+
+from deplytils.bench import best_time
+from deplytils.decorators import cached_class_property, class_property
+
+READS = 1000000
+# reads per loop of the readers, so the loop costs little per read
+UNROLLED = 10
+
+
+# pylint: disable=unused-variable
+def run(scale):
+    """
+    Time reads of every kind of class level value
+
+    :param scale: multiplier of the number of reads - float
+    :return: nanoseconds per read and their ratios to reading a plain
+            attribute, by kind, and the number of reads - dict
+    """
+    loops = max(int(READS * scale) // UNROLLED, 1)
+    accessed = make_class()
+    readers = {
+        'attribute': read_attribute,
+        'class_property': read_class_property,
+        'cached_class_property': read_cached_class_property,
+        'installed_cached_class_property': read_installed,
+    }
+    if hasattr(accessed, 'lru_cached'):
+        readers['lru_cache'] = read_lru_cache
+    nanoseconds = {}
+    for kind, reader in readers.items():
+        nanoseconds[kind] = best_time(
+            functools.partial(reader, accessed, range(loops))) / (
+                loops * UNROLLED) * 1e9
+    return {'nanoseconds': nanoseconds, 'reads': loops * UNROLLED,
+            'ratios': dict([(kind, value / nanoseconds['attribute'])
+                            for kind, value in nanoseconds.items()])}
+
+
+def make_class():
+    """
+    Class of every kind of class level value, each computed as 1
+
+    :return: class - type
+    """
+    class Accessed(object):  # pylint: disable=too-few-public-methods
+        """Class level values"""
+        attribute = 1
+
+        # pylint: disable=no-self-argument,no-self-use
+        # noinspection PyMethodParameters
+        @class_property
+        def computed(cls):
+            """Computed on every read"""
+            return 1
+
+        # pylint: disable=no-self-argument,no-self-use
+        # noinspection PyMethodParameters
+        @cached_class_property
+        def cached(cls):
+            """Cached by the descriptor"""
+            return 1
+
+        # pylint: disable=no-self-argument,no-self-use
+        # noinspection PyMethodParameters
+        @cached_class_property(install=True)
+        def installed(cls):
+            """Installed as a plain attribute"""
+            return 1
+
+    try:
+        # imported here, as python 2 has no lru_cache
+        from functools import lru_cache
+    except ImportError:
+        return Accessed
+    Accessed.lru_cached = classmethod(lru_cache(maxsize=None)(lambda cls: 1))
+    return Accessed
+
+
+# pylint: disable=pointless-statement,expression-not-assigned
+# pylint: disable=multiple-statements
+def read_attribute(accessed, loops):
+    """Read a plain class attribute"""
+    for _ in loops:
+        accessed.attribute; accessed.attribute; accessed.attribute
+        accessed.attribute; accessed.attribute; accessed.attribute
+        accessed.attribute; accessed.attribute; accessed.attribute
+        accessed.attribute
+
+
+def read_class_property(accessed, loops):
+    """Read a class_property"""
+    for _ in loops:
+        accessed.computed; accessed.computed; accessed.computed
+        accessed.computed; accessed.computed; accessed.computed
+        accessed.computed; accessed.computed; accessed.computed
+        accessed.computed
+
+
+def read_cached_class_property(accessed, loops):
+    """Read a cached_class_property"""
+    for _ in loops:
+        accessed.cached; accessed.cached; accessed.cached
+        accessed.cached; accessed.cached; accessed.cached
+        accessed.cached; accessed.cached; accessed.cached
+        accessed.cached
+
+
+def read_installed(accessed, loops):
+    """Read a cached_class_property whose value is installed"""
+    for _ in loops:
+        accessed.installed; accessed.installed; accessed.installed
+        accessed.installed; accessed.installed; accessed.installed
+        accessed.installed; accessed.installed; accessed.installed
+        accessed.installed
+
+
+def read_lru_cache(accessed, loops):
+    """Call a functools.lru_cache class method"""
+    for _ in loops:
+        accessed.lru_cached(); accessed.lru_cached(); accessed.lru_cached()
+        accessed.lru_cached(); accessed.lru_cached(); accessed.lru_cached()
+        accessed.lru_cached(); accessed.lru_cached(); accessed.lru_cached()
+        accessed.lru_cached()
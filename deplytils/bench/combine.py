@@ -0,0 +1,112 @@
+"""
+Compares Coverage.combine to the bulk combiner of deplytils, combining
+synthetic parallel data files of branch coverage (1,000 shards at scale
+1) into a saved data file and its total percentage
+"""
+import os
+import random
+import shutil
+import tempfile
+
+from coverage import Coverage, CoverageData
+
+from deplytils.bench import best_time
+from deplytils.contexts.coverage_combiner import combine
+from deplytils.contexts.coverage_evaluation import evaluate
+
+SHARDS = 1000
+MODULES = 20
+STATEMENTS = 200
+
+
+# pylint: disable=unused-variable
+def run(scale, jobs=0):
+    """
+    Time both combiners on the same synthetic shards
+
+    :param scale: multiplier of the number of shards - float
+    :param jobs: worker processes of the bulk combiner, 0 being one per
+            cpu - int
+    :return: timings in seconds and total percentages - dict
+    """
+    path = tempfile.mkdtemp()
+    try:
+        modules = make_modules(os.path.join(path, 'src'), MODULES,
+                               STATEMENTS)
+        shards = max(int(SHARDS * scale), 2)
+        stock = _coverage(os.path.join(path, 'stock'))
+        bulk = _coverage(os.path.join(path, 'bulk'))
+        make_shards(stock.get_option('run:data_file'), modules, shards,
+                    STATEMENTS)
+        for name in os.listdir(os.path.join(path, 'stock')):
+            shutil.copy(os.path.join(path, 'stock', name),
+                        os.path.join(path, 'bulk'))
+        totals = {}
+        timings = {
+            'coverage_combine': best_time(
+                lambda: totals.update(coverage_combine=_combined(stock)),
+                repeat=1),
+            'bulk_combine': best_time(
+                lambda: totals.update(bulk_combine=combine(
+                    bulk, strict=True, jobs=jobs).total), repeat=1)}
+    finally:
+        shutil.rmtree(path)
+    return dict(timings, shards=shards, files=len(modules), totals=totals,
+                speedup=timings['coverage_combine'] / timings['bulk_combine'])
+
+
+def make_modules(path, modules, statements):
+    """
+    Write modules of consecutive assignments
+
+    :param path: directory to write the modules in
+    :param modules: number of modules - int
+    :param statements: number of statements of every module - int
+    :return: absolute paths of the modules - list
+    """
+    os.makedirs(path)
+    paths = []
+    for index in range(modules):
+        paths.append(os.path.join(path, 'module{}.py'.format(index)))
+        with open(paths[-1], 'w') as file_:
+            for line in range(statements):
+                file_.write('value{} = {}\n'.format(line, line))
+    return paths
+
+
+def make_shards(data_file, modules, shards, statements):
+    """
+    Write parallel data files, every shard executing every module up to
+    a random statement, as if it raised there
+
+    :param data_file: data file of the coverage, suffixed by the index
+            of every shard - str
+    :param modules: paths of the modules - list like
+    :param shards: number of data files - int
+    :param statements: number of statements of every module - int
+    """
+    randoms = random.Random(0)
+    for index in range(shards):
+        arcs = {}
+        for module in modules:
+            last = randoms.randint(1, statements)
+            arcs[module] = dict.fromkeys(
+                [(-1, 1)] + [(line, line + 1) for line in range(1, last)] +
+                [(last, -1)])
+        data = CoverageData()
+        data.add_arcs(arcs)
+        data.write_file('{}.{}'.format(data_file, index))
+
+
+def _coverage(directory):
+    """Branch coverage whose data file is in a new directory"""
+    os.makedirs(directory)
+    return Coverage(data_file=os.path.join(directory, '.coverage'),
+                    branch=True, config_file=False)
+
+
+def _combined(coverage):
+    """Total percentage of the coverage, once combined by coverage"""
+    coverage.combine(strict=True)
+    coverage.save()
+    return evaluate(coverage).total
@@ -0,0 +1,238 @@
+"""
+Measures the cost of coverage: the slowdown of traced code on synthetic
+workloads (a tight loop, a deep call stack and many small modules) in
+line and branch mode, or excluded by `source`, the construction and
+start/stop cycle of CoverageContext, StrictCoverage and nested
+MockCoverage contexts, and rendering a report compared to evaluating it
+"""
+from __future__ import absolute_import  # pylint: disable=unused-variable
+
+import functools
+import glob
+import os
+import shutil
+import tempfile
+from timeit import default_timer
+
+from coverage import Coverage
+from coverage.python import PythonFileReporter
+
+from deplytils.bench import best_time
+from deplytils.contexts.coverage import CoverageContext, StrictCoverage
+from deplytils.contexts.coverage_evaluation import evaluate
+from deplytils.mocks import MockCoverage
+
+ITERATIONS = 200000
+DEPTH = 500
+MODULES = 200
+CYCLES = 20
+WORKLOAD = '''\
+def tight_loop(iterations):
+    total = 0
+    for index in range(iterations):
+        if index % 2:
+            total += index
+        else:
+            total -= 1
+    return total
+
+
+def deep_calls(depth):
+    if depth:
+        return deep_calls(depth - 1) + 1
+    return 0
+'''
+SMALL_MODULE = '''\
+def run(value):
+    if value:
+        return value + {index}
+    return {index}
+'''
+
+
+# pylint: disable=unused-variable
+def run(scale, coverage_factory=Coverage):
+    """
+    Time traced workloads, coverage contexts and reporting. Coverage
+    measuring the suite pauses while it traces, so nested in a context
+    the suite runs untraced, with a factory of MockCoverage, to be
+    measured.
+
+    :param scale: multiplier of the workload sizes - float
+    :param coverage_factory: callable taking the kwargs of Coverage,
+            making the coverages tracing the workloads
+    :return: timings in seconds, and slowdowns of traced workloads as
+            ratios to their untraced time - dict
+    """
+    path = tempfile.mkdtemp()
+    try:
+        workloads = make_workloads(path, scale)
+        timings = time_workloads(workloads, path, coverage_factory)
+        return {
+            'workloads': timings,
+            'slowdown': _slowdowns(timings),
+            'contexts': time_contexts(workloads['deep_calls'], path,
+                                      max(int(CYCLES * scale), 1)),
+            'report': time_report(path),
+        }
+    finally:
+        shutil.rmtree(path)
+
+
+def make_workloads(path, scale):
+    """
+    Write the workload modules
+
+    :param path: directory to write them to
+    :param scale: multiplier of the workload sizes - float
+    :return: callables of the workloads, by name - dict
+    """
+    iterations = max(int(ITERATIONS * scale), 1)
+    depth = min(max(int(DEPTH * scale), 1), DEPTH * 2)
+    workload = _load(os.path.join(path, 'workload.py'), WORKLOAD)
+    modules = []
+    for index in range(max(int(MODULES * scale), 1)):
+        modules.append(_load(
+            os.path.join(path, 'module{}.py'.format(index)),
+            SMALL_MODULE.format(index=index)))
+
+    def many_modules():
+        """Call the function of every small module"""
+        for module in modules:
+            module['run'](1)
+
+    return {
+        'tight_loop': functools.partial(workload['tight_loop'], iterations),
+        'deep_calls': functools.partial(workload['deep_calls'], depth),
+        'many_modules': many_modules,
+    }
+
+
+def time_workloads(workloads, path, coverage_factory=Coverage):
+    """
+    Time the workloads untraced, traced in line and branch mode and
+    traced with their directory left out of `source`
+
+    :param workloads: callables, by name - dict
+    :param path: directory of the workloads
+    :param coverage_factory: callable taking the kwargs of Coverage,
+            making the coverages tracing them
+    :return: seconds per workload and mode - dict
+    """
+    traced = functools.partial(coverage_factory, config_file=False)
+    modes = {
+        'untraced': MockCoverage,
+        'lines': functools.partial(traced, source=[path]),
+        'branches': functools.partial(traced, branch=True, source=[path]),
+        'excluded': functools.partial(
+            traced, source=[os.path.join(path, 'excluded')]),
+    }
+    timings = {}
+    for name, workload in workloads.items():
+        timings[name] = {}
+        for mode, coverage in modes.items():
+            timings[name][mode] = time_traced(coverage(), workload)
+    return timings
+
+
+def time_traced(coverage, workload, repeat=3):
+    """
+    Time a workload while a coverage measures it
+
+    :param coverage: unstarted Coverage or MockCoverage
+    :param workload: callable taking no arguments
+    :param repeat: number of timings, the best being kept - int
+    :return: seconds - float
+    """
+    coverage.start()
+    try:
+        return best_time(workload, repeat=repeat)
+    finally:
+        coverage.stop()
+
+
+def time_contexts(workload, path, cycles):
+    """
+    Time the construction of contexts and their cycle of starting,
+    running a workload, stopping and reporting
+
+    :param workload: callable taking no arguments
+    :param path: directory of the workload
+    :param cycles: number of contexts of every kind - int
+    :return: mean seconds to construct and cycle, per kind - dict
+    """
+    coverage_kwargs = dict(config_file=False, source=[path])
+    context = functools.partial(CoverageContext, report=False,
+                                coverage_kwargs=coverage_kwargs)
+    strict = functools.partial(StrictCoverage, 0, mock_kwargs=dict(
+        report=100.0), coverage_kwargs=coverage_kwargs)
+    timings = {
+        'coverage_context': _time_context(context, workload, cycles),
+        'strict_coverage': _time_context(strict, workload, cycles),
+    }
+
+    outer = context()
+    try:
+        timings['nested_mock'] = _time_context(context, workload, cycles)
+    finally:
+        # exits without having started, only undoing its nesting
+        outer.__exit__(None, None, None)
+    return timings
+
+
+def time_report(path):
+    """
+    Time rendering the text report of the workload modules, in branch
+    mode and with every arc executed, compared to evaluating it
+
+    :param path: directory of the workloads
+    :return: number of files, and seconds to report and to evaluate -
+            dict
+    """
+    coverage = Coverage(branch=True, config_file=False, source=[path])
+    data = coverage.get_data()
+    for filename in glob.glob(os.path.join(path, '*.py')):
+        data.add_arcs({filename: dict.fromkeys(
+            PythonFileReporter(filename, coverage).arcs())})
+
+    devnull = open(os.devnull, 'w')
+    try:
+        report = best_time(lambda: coverage.report(file=devnull))
+    finally:
+        devnull.close()
+    return {'files': len(coverage.get_data().measured_files()),
+            'report': report,
+            'evaluate': best_time(lambda: evaluate(coverage))}
+
+
+def _time_context(factory, workload, cycles):
+    """Mean times to construct and cycle contexts made by a factory"""
+    construct = cycle = 0.0
+    for _ in range(cycles):
+        start = default_timer()
+        context = factory()
+        constructed = default_timer()
+        with context:
+            workload()
+        cycle += default_timer() - constructed
+        construct += constructed - start
+    return {'construct': construct / cycles, 'cycle': cycle / cycles}
+
+
+def _slowdowns(timings):
+    """Ratios of the traced times of workloads to their untraced time"""
+    slowdowns = {}
+    for name, modes in timings.items():
+        slowdowns[name] = {}
+        for mode, elapsed in modes.items():
+            slowdowns[name][mode] = elapsed / modes['untraced']
+    return slowdowns
+
+
+def _load(path, source):
+    """Write a module and execute it, returning its namespace"""
+    with open(path, 'w') as file_:
+        file_.write(source)
+    namespace = {'__name__': os.path.splitext(os.path.basename(path))[0]}
+    exec(compile(source, path, 'exec'), namespace)  # pylint: disable=exec-used
+    return namespace
@@ -0,0 +1,89 @@
+"""
+Compares iter_package_files to the os.walk based walker ProjectLinter
+used before it, on a synthetic tree (100k files at scale 1)
+"""
+import os
+import re
+import shutil
+import tempfile
+
+from deplytils.bench import best_time
+from deplytils.discovery import iter_package_files
+
+FILES = 100000
+FILES_PER_DIRECTORY = 50
+
+
+# pylint: disable=unused-variable
+def run(scale):
+    """
+    Time both walkers on a synthetic tree
+
+    :param scale: multiplier of the number of files - float
+    :return: timings in seconds and number of files found - dict
+    """
+    path = tempfile.mkdtemp()
+    try:
+        files = make_tree(path, max(int(FILES * scale), 5))
+        found = {'legacy_walk': len(legacy_walk(path)),
+                 'iter_package_files': len(list(iter_package_files(path)))}
+        legacy = best_time(lambda: legacy_walk(path))
+        pruning = best_time(lambda: list(iter_package_files(path)))
+    finally:
+        shutil.rmtree(path)
+    return {'files': files, 'found': found, 'legacy_walk': legacy,
+            'iter_package_files': pruning, 'speedup': legacy / pruning}
+
+
+def legacy_walk(path):
+    """The walker ProjectLinter used before iter_package_files"""
+    top = os.path.abspath(path)
+    files = []
+    for root, _, names in os.walk(top):
+        if '__init__.py' not in names and root != top:
+            continue
+
+        for name in names:
+            if not re.search(r'local|.*(?<!\.py)$', name):
+                files.append(os.path.join(root, name))
+    return files
+
+
+def make_tree(path, files):
+    """
+    Build a project with a readme, where a fifth of the files are in
+    packages and the rest are in directories a linter should skip: git
+    objects, node_modules, a virtualenv and data
+
+    :param path: directory to build the tree in
+    :param files: approximate number of files - int
+    :return: number of files created - int
+    """
+    layouts = (
+        ('package{}', 'module{}.py', True),
+        ('.git/objects/{:02x}', '{:038x}', False),
+        ('node_modules/library{}/lib', 'index{}.js', False),
+        ('venv/lib/python/site-packages/library{}', 'module{}.py', True),
+        ('data/set{}', 'sample{}.csv', False),
+    )
+    directories = max(files // FILES_PER_DIRECTORY // len(layouts), 1)
+    per_directory = max(files // directories // len(layouts), 1)
+    open(os.path.join(path, 'README.md'), 'w').close()
+    created = 1
+    for directory, name, is_package in layouts:
+        for index in range(directories):
+            created += _make_directory(
+                os.path.join(path, directory.format(index)), name,
+                per_directory, is_package)
+    return created
+
+
+def _make_directory(path, name, files, is_package):
+    """Create a directory of files named after a template"""
+    os.makedirs(path)
+    names = [name.format(index) for index in range(files - is_package)]
+    if is_package:
+        names.append('__init__.py')
+    for file_name in names:
+        open(os.path.join(path, file_name), 'w').close()
+    return len(names)
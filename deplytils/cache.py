@@ -0,0 +1,124 @@
+"""On-disk caches for the results of verification steps"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+
+# pylint: disable=unused-variable
+def hash_key(*parts):
+    """
+    Build a cache key out of several parts
+
+    :param parts: str or bytes parts of the key
+    :return: hex digest - str
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = part.encode('utf-8')
+        digest.update('{}:'.format(len(part)).encode('utf-8'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class ResultCache(object):
+    """
+    Directory of JSON serializable results, one file per key. Reading
+    an entry marks it as recently used, so pruning evicts the least
+    recently used entries first.
+    """
+    suffix = '.json'
+    mode = ''
+
+    def __init__(self, directory, max_entries=10000):
+        """
+        Creates the cache directory, if needed
+
+        :param directory: absolute or relative path of the cache
+        :param max_entries: number of entries kept by `prune` - int
+        """
+        self.directory = os.path.abspath(directory)
+        self.max_entries = max_entries
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+    def get(self, key, default=None):
+        """
+        Get a cached result
+
+        :param key: key of the entry - str
+        :param default: value returned on a cache miss
+        :return: cached result or default
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r' + self.mode) as file_:
+                value = self._load(file_)
+            os.utime(path, None)
+        except (EnvironmentError, ValueError):
+            return default
+        return value
+
+    def set(self, key, value):
+        """
+        Atomically store a result
+
+        :param key: key of the entry - str
+        :param value: JSON serializable result
+        """
+        descriptor, temp_path = tempfile.mkstemp(
+            suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(descriptor, 'w' + self.mode) as file_:
+                self._dump(value, file_)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        os.rename(temp_path, self._path(key))
+
+    def prune(self):
+        """Evict the least recently used entries beyond the size bound"""
+        paths = [os.path.join(self.directory, name)
+                 for name in os.listdir(self.directory)
+                 if name.endswith(self.suffix)]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[self.max_entries:]:
+            os.remove(path)
+
+    def _path(self, key):
+        """Path of the file holding an entry"""
+        return os.path.join(self.directory, key + self.suffix)
+
+    @staticmethod
+    def _load(file_):
+        """Read an entry, raising ValueError if it is corrupt"""
+        return json.load(file_)
+
+    @staticmethod
+    def _dump(value, file_):
+        """Write an entry"""
+        json.dump(value, file_)
+
+
+class PickleCache(ResultCache):
+    """
+    ResultCache of picklable values, e.g. values of persistent cached
+    class properties. Entries are only as trustworthy as the directory
+    holding them, as unpickling can run arbitrary code.
+    """
+    suffix = '.pickle'
+    mode = 'b'
+
+    @staticmethod
+    def _load(file_):
+        try:
+            return pickle.load(file_)
+        except (pickle.UnpicklingError, EOFError, AttributeError,
+                ImportError, IndexError) as error:
+            raise ValueError(error)
+
+    @staticmethod
+    def _dump(value, file_):
+        pickle.dump(value, file_, pickle.HIGHEST_PROTOCOL)
@@ -1,16 +1,25 @@
 """Context Managers"""
 from __future__ import absolute_import  # pylint: disable=unused-variable
 
+import fnmatch
+
 from coverage import CoverageException, Coverage
+from coverage.files import prep_patterns
 
+from deplytils.contexts.coverage_collector import CoverageCollector
+from deplytils.contexts.coverage_evaluation import evaluate
+from deplytils.contexts.coverage_shared import SharedTracer
+from deplytils.git import changed_lines
 from deplytils.mocks import MockCoverage
 
 
-class CoverageContext(object):
+class CoverageContext(object):  # pylint: disable=too-many-instance-attributes
     """Context manager used to start and stop the coverage utility"""
+    # pylint: disable=too-many-arguments,too-many-locals
     def __init__(self, coverage_args=(), coverage_kwargs=None, report=True,
                  report_type='report', report_args=(), mock_args=(),
-                 mock_kwargs=None, report_kwargs=None, silent=True):
+                 mock_kwargs=None, report_kwargs=None, silent=True,
+                 changed_since=None, multiprocess=False, share_outer=False):
         """
         Manager used to capture and report python coverage with a
         single line (`with CoverageContext():`). Coverage constructor
@@ -27,7 +36,29 @@ class CoverageContext(object):
         :param report_args: args for report method - list like
         :param report_kwargs: kwargs for report method - dict
         :param silent: if true, assures nothing is printed to
-                the console when using `report` method - bool
+                the console when using `report` method. Coverage is then
+                evaluated without rendering the report, the percentages
+                being stored as `evaluation` - bool
+        :param changed_since: git ref, e.g. 'origin/main'. If given, only
+                the python files of the current repository changed since
+                the ref are traced (as `include`, which is ignored if
+                `source` is given), leaving the rest of the process
+                untraced, and the coverage of their changed lines is
+                stored as `changed_result`, unless mocked when nested.
+                Nothing is traced if no python file changed, the report
+                being 100
+        :param multiprocess: whether to also measure the child processes
+                started within the context, i.e. multiprocessing
+                processes and python subprocesses, whose data is sent
+                back and combined in memory before reporting - bool
+        :param share_outer: if nested in a context measuring with a real
+                Coverage, measure with its tracer instead of using a
+                MockCoverage. The lines executed within the context are
+                reported by an unstarted Coverage built from
+                coverage_args and coverage_kwargs, whose include and omit
+                narrow the files the outer coverage measures - bool
+        :raises subprocess.CalledProcessError: changed_since is given but
+                unknown or not in a git repository
         """
         if mock_kwargs is None:
             mock_kwargs = {}
@@ -38,34 +69,44 @@ class CoverageContext(object):
         if silent:
             assert report_type == 'report'
 
-            class PseudoFile(object):
-                """Fake file writer"""
-                def write(self, *args, **kwargs):
-                    """Fake write method"""
-                    pass
-
-            report_kwargs['file'] = PseudoFile()
-
         self.coverage_args = coverage_args
         self.coverage_kwargs = coverage_kwargs
         self.mock_args = mock_args
         self.mock_kwargs = mock_kwargs
         self.should_report = report
+        self.silent = silent
         self.report_type = report_type
         self.report_args = report_args
         self.report_kwargs = report_kwargs
 
+        self.changed_lines = None
+        if changed_since is not None:
+            self.changed_lines = _changed_python_lines(changed_since)
+            self.coverage_kwargs = dict(
+                coverage_kwargs, include=sorted(self.changed_lines))
+
         self.coverage = CoverageContext.__get_coverage_instance(
             self.coverage_args, self.coverage_kwargs, self.mock_args,
-            self.mock_kwargs)
+            self.mock_kwargs, traced=self.changed_lines != {},
+            shared=share_outer)
+        self.tracer = self._tracer(share_outer)
+
+        collected = (multiprocess and isinstance(self.coverage, Coverage) and
+                     self.tracer is self.coverage)
+        self.collector = (
+            CoverageCollector(self.coverage, self.coverage_kwargs)
+            if collected else None)
 
         self.result = None
+        self.changed_result = None
+        self.evaluation = None
 
     __coverage_depth = 0
+    __outer_coverage = None
 
     @classmethod
     def __get_coverage_instance(cls, real_args, real_kwargs, mock_args,
-                                mock_kwargs):
+                                mock_kwargs, traced=True, shared=False):
         """
         Gets the proper instance of coverage based on our current depth
         of coverage
@@ -74,9 +115,18 @@ class CoverageContext(object):
         :param real_kwargs: dict like
         :param mock_args: list like
         :param mock_kwargs: dict like
+        :param traced: if false, there is nothing to trace and a fully
+                covered MockCoverage is used - bool
+        :param shared: whether a nested coverage shares the tracer of
+                the outer one, if real, instead of being mocked - bool
         :return: instance of a Coverage object
         """
-        if cls.__coverage_depth == 0:
+        if not traced:
+            class_ = MockCoverage
+            args = ()
+            kwargs = dict(report=100.0)
+        elif cls.__coverage_depth == 0 or shared and isinstance(
+                cls.__outer_coverage, Coverage):
             class_ = Coverage
             args = real_args
             kwargs = real_kwargs
@@ -84,32 +134,104 @@ class CoverageContext(object):
             class_ = MockCoverage
             args = mock_args
             kwargs = mock_kwargs
+        instance = class_(*args, **kwargs)
+        if cls.__coverage_depth == 0:
+            cls.__outer_coverage = instance
         cls.__coverage_depth += 1
-        return class_(*args, **kwargs)
+        return instance
+
+    def _tracer(self, share_outer):
+        """
+        What starts and stops measuring, either the coverage or the
+        tracer of the outer coverage, shared with it
+
+        :param share_outer: see init
+        :return: Coverage, MockCoverage or SharedTracer
+        """
+        outer = CoverageContext.__outer_coverage
+        if not (share_outer and outer is not self.coverage and
+                isinstance(self.coverage, Coverage)):
+            return self.coverage
+        self.coverage.set_option('run:branch', outer.get_option('run:branch'))
+        return SharedTracer(outer, self.coverage)
 
     def __enter__(self):
         """Start coverage"""
-        self.coverage.start()
+        if self.collector is not None:
+            self.collector.start()
+        self.tracer.start()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Stop coverage and, if specified, report"""
-        self.coverage.stop()
+        self.tracer.stop()
         CoverageContext.__exit()
+        self._merge_collected()
+        if self.changed_lines is not None:
+            self.changed_result = self.changed_lines_coverage()
         if self.should_report:
-            report_method = getattr(self.coverage, self.report_type)
-            self.result = report_method(
-                *self.report_args, **self.report_kwargs)
+            self.result = self._report()
 
     @classmethod
     def __exit(cls):
         cls.__coverage_depth -= 1
 
+    def _report(self):
+        """
+        Report, evaluating the coverage instead if silent
+
+        :return: total percentage - float
+        :raises CoverageException: no data to report
+        """
+        if self.silent and isinstance(self.coverage, Coverage):
+            evaluation = evaluate(
+                self.coverage, *self.report_args, **self.report_kwargs)
+            if not evaluation.files:
+                raise CoverageException('No data to report.')
+            self.evaluation = evaluation
+            return evaluation.total
+        report_method = getattr(self.coverage, self.report_type)
+        return report_method(*self.report_args, **self.report_kwargs)
+
+    def _merge_collected(self):
+        """Stop collecting and merge the data of child processes, if any"""
+        if self.collector is not None:
+            self.collector.stop()
+            self.collector.merge(self.coverage.get_data())
+
+    def changed_lines_coverage(self):
+        """
+        Percentage of the changed statements that were executed, leaving
+        out the files omitted from coverage. Partial branches are not
+        taken into account. A MockCoverage measures nothing, so there
+        is no such percentage when mocked, its report standing instead.
+
+        :return: percentage, 100 if no statement changed, None if the
+                coverage is mocked - float
+        """
+        if not self.changed_lines:
+            return 100.0
+        if not isinstance(self.coverage, Coverage):
+            return None
+        omit = prep_patterns(self.coverage.get_option('run:omit') or ())
+        statements = executed = 0
+        for path, lines in self.changed_lines.items():
+            if not _matches(path, omit):
+                _, file_statements, _, missing, _ = self.coverage.analysis2(
+                    path)
+                changed = lines.intersection(file_statements)
+                statements += len(changed)
+                executed += len(changed.difference(missing))
+        return 100.0 * executed / statements if statements else 100.0
+
 
 class StrictCoverage(CoverageContext):
     """
     A type of Coverage Context manager that throws errors on exit if
-    the coverage does not meet the defined threshold
+    the coverage does not meet the defined threshold. Given
+    changed_since, the threshold applies to the coverage of the changed
+    lines. Files and packages can have thresholds of their own, e.g.
+    `StrictCoverage(90, file_thresholds={'*/cache.py': 100})`.
     """
 
     def __init__(self, threshold, *args, **kwargs):
@@ -123,12 +245,25 @@ class StrictCoverage(CoverageContext):
         :param report: Included for better error checking and
                 parent class signature matching. Must be True in order
                 for this class to work properly
+        :param file_thresholds: minimum percentages of files, by glob of
+                their names relative to the current directory, e.g.
+                {'deplytils/cache.py': 100} - dict
+        :param package_thresholds: minimum percentages of packages,
+                subpackages included, by dotted name, e.g.
+                {'deplytils.contexts': 95} - dict. File and package
+                thresholds need silent reporting, and thresholds
+                matching no measured file fail
         :param kwargs: see CoverageContext init
         """
         report = kwargs.setdefault('report', True)
         assert report, ('Failure to report will result in errors when '
                         'attempting to compare the reported result to the '
                         'specified threshold')
+        self.file_thresholds = kwargs.pop('file_thresholds', None)
+        self.package_thresholds = kwargs.pop('package_thresholds', None)
+        assert kwargs.get('silent', True) or not (
+            self.file_thresholds or self.package_thresholds), (
+                'File and package thresholds are only evaluated when silent')
         super(StrictCoverage, self).__init__(*args, **kwargs)
         self.threshold = threshold
 
@@ -138,10 +273,46 @@ class StrictCoverage(CoverageContext):
         Performs a compare and raises an error if the threshold
         is not met.
 
-        :raises CoverageException: Coverage does not meet threshold
+        :raises CoverageException: Coverage, or the coverage of a file or
+                package, does not meet its threshold
         """
         super(StrictCoverage, self).__exit__(exc_type, exc_val, exc_tb)
-        if self.result < self.threshold:
-            raise CoverageException(
-                '{:0.2f}% does not meet {:0.2f}% threshold'.format(
-                    self.result, self.threshold))
+        failures = self.threshold_failures()
+        if failures:
+            raise CoverageException('\n'.join(failures))
+
+    def threshold_failures(self):
+        """
+        Describe the thresholds that are not met
+
+        :return: list of messages
+        """
+        failures = []
+        result, scope = self.result, ''
+        if self.changed_result is not None:
+            result, scope = self.changed_result, ' of changed lines'
+        if result < self.threshold:
+            failures.append(
+                '{:0.2f}%{} does not meet {:0.2f}% threshold'.format(
+                    result, scope, self.threshold))
+        if self.evaluation is not None:
+            failures.extend(self.evaluation.failures(
+                self.file_thresholds, self.package_thresholds))
+        return failures
+
+
+def _changed_python_lines(ref):
+    """Changed lines of the python files changed since a git ref"""
+    lines = changed_lines(ref)
+    for path in list(lines):
+        if not path.endswith('.py'):
+            del lines[path]
+    return lines
+
+
+def _matches(path, patterns):
+    """Whether a path matches any of the coverage file patterns"""
+    for pattern in patterns:
+        if fnmatch.fnmatch(path, pattern):
+            return True
+    return False
@@ -0,0 +1,232 @@
+"""
+In-memory collection of the coverage of child processes. Processes
+forked with multiprocessing send the data of the coverage they inherit
+once done, python subprocesses start their own coverage on startup and
+send its data on exit. Data is sent over a multiprocessing connection,
+so no data file is written.
+"""
+import binascii
+import json
+import os
+import shutil
+import tempfile
+import threading
+from multiprocessing import AuthenticationError, process
+from multiprocessing.connection import Client, Listener
+
+from coverage import Coverage
+
+ENVIRONMENT_VARIABLE = 'DEPLYTILS_COVERAGE_COLLECTOR'
+SITECUSTOMIZE = '''\
+import atexit
+import sys
+sys.path.append({path!r})
+from deplytils.contexts.coverage_collector import collect_from_environment
+sys.path.pop()
+SENDER = collect_from_environment()
+atexit.register(SENDER)
+SENDER.coverage.start()
+'''
+
+_NO_DATA = ('lines', {})
+_PROCESS = getattr(process, 'BaseProcess', getattr(process, 'Process', None))
+
+
+# pylint: disable=unused-variable
+class CoverageCollector(object):
+    """
+    Collects the coverage data of the child processes started while it
+    runs. Python subprocesses are made to start coverage through a
+    sitecustomize module put first on their PYTHONPATH, which shadows
+    any other sitecustomize module. Processes that are killed, or that
+    exit through os._exit without multiprocessing, send nothing.
+    """
+    def __init__(self, coverage, coverage_kwargs=None):
+        """
+        :param coverage: Coverage of the current process, inherited by
+                forked processes
+        :param coverage_kwargs: kwargs for the Coverage constructor of
+                python subprocesses - JSON serializable dict
+        """
+        self.coverage = coverage
+        self.coverage_kwargs = coverage_kwargs or {}
+        self.payloads = []
+        self._authkey = os.urandom(20)
+        self._listener = None
+        self._thread = None
+        self._directory = None
+        self._environ = {}
+        self._unpatch = None
+
+    def start(self):
+        """Start receiving the data of child processes"""
+        self._listener = Listener(authkey=self._authkey)
+        self._thread = threading.Thread(target=self._receive)
+        self._thread.daemon = True
+        self._thread.start()
+
+        settings = {
+            'address': self._listener.address,
+            'authkey': binascii.hexlify(self._authkey).decode('ascii'),
+            'coverage_kwargs': _found_anywhere(self.coverage_kwargs)}
+        self._unpatch = _patch_bootstrap(_Sender(self.coverage, settings))
+        self._directory = tempfile.mkdtemp()
+        with open(os.path.join(self._directory, 'sitecustomize.py'),
+                  'w') as file_:
+            file_.write(SITECUSTOMIZE.format(path=os.path.dirname(
+                os.path.dirname(os.path.dirname(os.path.abspath(
+                    __file__))))))
+
+        python_path = os.environ.get('PYTHONPATH')
+        self._environ = {ENVIRONMENT_VARIABLE: os.environ.get(
+            ENVIRONMENT_VARIABLE), 'PYTHONPATH': python_path}
+        _set_environ(ENVIRONMENT_VARIABLE, json.dumps(settings))
+        _set_environ('PYTHONPATH', os.pathsep.join(
+            [self._directory] + ([python_path] if python_path else [])))
+
+    def stop(self):
+        """
+        Stop receiving data, once the data of the child processes that
+        already exited is received
+        """
+        for name, value in self._environ.items():
+            _set_environ(name, value)
+        shutil.rmtree(self._directory)
+        self._unpatch()
+        _send(self._listener.address, self._authkey, None)
+        self._thread.join()
+        self._listener.close()
+
+    def merge(self, data):
+        """
+        Add the received data to the data of the current process
+
+        :param data: CoverageData, e.g. from `Coverage.get_data()`
+        """
+        merge_payloads(data, self.payloads)
+
+    def _receive(self):
+        """Receive data until receiving None"""
+        received = self._accept()
+        while received is not None:
+            self.payloads.append(received)
+            received = self._accept()
+
+    def _accept(self):
+        """
+        Receive a single message, failed connections (e.g. of processes
+        killed while sending) sending no data
+        """
+        try:
+            connection = self._listener.accept()
+            try:
+                return connection.recv()
+            finally:
+                connection.close()
+        except (AuthenticationError, EnvironmentError, EOFError):
+            return _NO_DATA
+
+
+def collect_from_environment():
+    """
+    Prepare measuring the coverage of a python subprocess of a process
+    running a CoverageCollector, as its sitecustomize module does
+
+    :return: callable stopping its coverage and sending its data, with
+            the unstarted Coverage as its `coverage` attribute
+    """
+    settings = json.loads(os.environ[ENVIRONMENT_VARIABLE])
+    sender = _Sender(Coverage(**settings['coverage_kwargs']), settings)
+    _patch_bootstrap(sender)
+    return sender
+
+
+class _Sender(object):
+    """Stops a coverage and sends its data, only once"""
+    def __init__(self, coverage, settings):
+        self.coverage = coverage
+        self.settings = settings
+
+    def __call__(self):
+        coverage, self.coverage = self.coverage, None
+        if coverage is not None:
+            coverage.stop()
+            try:
+                _send(self.settings['address'],
+                      binascii.unhexlify(self.settings['authkey']),
+                      payload(coverage.get_data()))
+            except EnvironmentError:
+                pass  # the collector stopped before this process did
+
+
+def _patch_bootstrap(sender):
+    """
+    Make processes started by multiprocessing send their data once done
+
+    :param sender: _Sender, inherited by forked processes
+    :return: function undoing the patch
+    """
+    bootstrap = vars(_PROCESS)['_bootstrap']
+
+    def collecting_bootstrap(instance, *args, **kwargs):
+        """multiprocessing's _bootstrap, sending the data once done"""
+        try:
+            return bootstrap(instance, *args, **kwargs)
+        finally:
+            sender()
+    setattr(_PROCESS, '_bootstrap', collecting_bootstrap)
+    return lambda: setattr(_PROCESS, '_bootstrap', bootstrap)
+
+
+def payload(data):
+    """
+    Picklable measured data, e.g. to send it to another process
+
+    :param data: CoverageData, e.g. from `Coverage.get_data()`
+    :return: kind of the data ('arcs' or 'lines') and dict of measured
+            file to its arcs or lines
+    """
+    kind = 'arcs' if data.has_arcs() else 'lines'
+    measured = {}
+    for path in data.measured_files():
+        measured[path] = dict.fromkeys(getattr(data, kind)(path))
+    return kind, measured
+
+
+def merge_payloads(data, payloads):
+    """
+    Add measured data to CoverageData
+
+    :param data: CoverageData, e.g. from `Coverage.get_data()`
+    :param payloads: results of `payload` - list like
+    """
+    for kind, measured in payloads:
+        if measured:
+            getattr(data, 'add_' + kind)(measured)
+
+
+def _send(address, authkey, message):
+    """Send a single message to a CoverageCollector"""
+    client = Client(address, authkey=authkey)
+    try:
+        client.send(message)
+    finally:
+        client.close()
+
+
+def _found_anywhere(coverage_kwargs):
+    """
+    Coverage kwargs naming their config file by its absolute path, so
+    subprocesses find it from any working directory
+    """
+    coverage_kwargs = dict(coverage_kwargs)
+    if coverage_kwargs.get('config_file') not in (None, True, False):
+        coverage_kwargs['config_file'] = os.path.abspath(
+            coverage_kwargs['config_file'])
+    return coverage_kwargs
+
+
+def _set_environ(name, value):
+    """Set an environment variable, unsetting it if value is None"""
+    os.environ.pop(name, None)
+    os.environ.update({name: value} if value is not None else {})
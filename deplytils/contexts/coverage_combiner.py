@@ -0,0 +1,244 @@
+"""
+Combination of large numbers of parallel coverage data files. Data files
+are read in worker processes, each merging the lines or arcs of its
+share of the files into sets, which are sent back as bitsets: a bitset
+of the lines of every measured file, or for arcs a bitset of the ends
+of the arcs from every line. Bitsets are merged with a bitwise or, so
+merging costs little memory however many data files measured the same
+lines.
+"""
+import glob
+import multiprocessing
+import os
+
+from coverage import CoverageData, CoverageException
+from coverage.files import PathAliases
+
+from deplytils.contexts.coverage_evaluation import evaluate
+
+CHUNKS_PER_JOB = 4
+
+
+# pylint: disable=unused-variable
+def combine(coverage, data_paths=None, strict=False, jobs=0, keep=False):
+    """
+    Combine parallel data files into the data of a coverage, as
+    `Coverage.combine` does, then save and evaluate the combined data.
+    Data files that cannot be read are warned about and kept. File
+    tracers of plugins are not combined.
+
+    :param coverage: Coverage, whose [paths] option remaps the measured
+            files
+    :param data_paths: data files, and directories whose files named as
+            the data file of the coverage plus a dot are combined,
+            defaults to the directory of the data file - list like
+    :param strict: whether to raise if there is nothing to combine -
+            bool
+    :param jobs: number of worker processes, 0 being one per cpu. Data
+            files are read in the current process with a single job or
+            chunk of files - int
+    :param keep: whether to keep the combined data files instead of
+            deleting them - bool
+    :return: CoverageEvaluation of the combined data
+    :raises CoverageException: a data path does not exist, arc data is
+            combined with line data, or strict and nothing is combined
+    """
+    paths = _data_files(coverage, data_paths)
+    if strict and not paths:
+        raise CoverageException('No data to combine')
+    merged = read_all(paths, coverage.config.paths,
+                      jobs or multiprocessing.cpu_count())
+    data = coverage.get_data()
+    for message in merged['unreadable']:
+        coverage._warn(message)  # pylint: disable=protected-access
+    if strict and not merged['read']:
+        raise CoverageException('No usable data files')
+    add_to(data, merged)
+    coverage.save()
+    if not keep:
+        for path in merged['read']:
+            os.remove(path)
+    return evaluate(coverage)
+
+
+def read_all(paths, aliases=None, jobs=1):
+    """
+    Read data files into merged bitsets, in parallel unless there is a
+    single job or chunk of files
+
+    :param paths: data files - list like
+    :param aliases: the [paths] option of a coverage, remapping the
+            measured files - dict
+    :param jobs: number of worker processes - int
+    :return: merged bitsets, see `read_chunk`
+    """
+    size = max(-(-len(paths) // (jobs * CHUNKS_PER_JOB)), 1)
+    tasks = [(paths[start:start + size], aliases)
+             for start in range(0, len(paths), size)]
+    merged = _empty()
+    if len(tasks) < 2 or jobs == 1:
+        for task in tasks:
+            _merge(merged, read_chunk(task))
+        return merged
+    pool = multiprocessing.Pool(min(jobs, len(tasks)))
+    try:
+        for result in pool.imap_unordered(read_chunk, tasks):
+            _merge(merged, result)
+    finally:
+        pool.close()
+        pool.join()
+    return merged
+
+
+def read_chunk(task):
+    """
+    Read data files into merged bitsets. Module level so it can be sent
+    to worker processes.
+
+    :param task: tuple of the data files and the [paths] option
+    :return: dict of 'lines', the bitset of the lines of every measured
+            file, 'arcs', the bitsets of the ends of the arcs from every
+            line of every measured file, 'read', the data files read,
+            and 'unreadable', messages of the files that could not be
+    """
+    paths, option = task
+    merged = _empty()
+    measured = _read(paths, _aliases(option), merged)
+    if measured['lines'] and measured['arcs']:
+        raise CoverageException("Can't combine arc data with line data")
+    for path, lines in measured['lines'].items():
+        merged['lines'][path] = bitset(lines)
+    for path, arcs in measured['arcs'].items():
+        merged['arcs'][path] = _arc_bitsets(arcs)
+    return merged
+
+
+def add_to(data, merged):
+    """
+    Add merged bitsets to CoverageData
+
+    :param data: CoverageData, e.g. from `Coverage.get_data()`
+    :param merged: merged bitsets, see `read_chunk`
+    """
+    if merged['lines']:
+        data.add_lines(dict([(path, dict.fromkeys(members(bits)))
+                             for path, bits in merged['lines'].items()]))
+    arcs = {}
+    for path, ends in merged['arcs'].items():
+        arcs[path] = {}
+        for start, bits in ends.items():
+            for end in members(bits):
+                arcs[path][(start, _unzigzag(end))] = None
+    if arcs:
+        data.add_arcs(arcs)
+
+
+def bitset(numbers):
+    """
+    Bitset of non-negative numbers
+
+    :param numbers: int - list like
+    :return: int whose bits of the numbers are set
+    """
+    bits = 0
+    for number in numbers:
+        bits |= 1 << number
+    return bits
+
+
+def members(bits):
+    """
+    Numbers of a bitset
+
+    :param bits: bitset - int
+    :return: sorted numbers - list
+    """
+    return [position for position, bit in enumerate(reversed(bin(bits)))
+            if bit == '1']
+
+
+def _data_files(coverage, data_paths):
+    """Data files to combine, found as `Coverage.combine` finds them"""
+    directory, name = os.path.split(os.path.abspath(
+        coverage.get_option('run:data_file')))
+    paths = []
+    for path in data_paths or [directory]:
+        if os.path.isfile(path):
+            paths.append(os.path.abspath(path))
+        elif os.path.isdir(path):
+            paths.extend(sorted(glob.glob(os.path.join(
+                os.path.abspath(path), name + '.*'))))
+        else:
+            raise CoverageException(
+                "Couldn't combine from non-existent path '{}'".format(path))
+    return paths
+
+
+def _aliases(option):
+    """PathAliases of the [paths] option of a coverage"""
+    aliases = PathAliases()
+    for patterns in (option or {}).values():
+        for pattern in patterns[1:]:
+            aliases.add(pattern, patterns[0])
+    return aliases
+
+
+def _read(paths, aliases, merged):
+    """
+    Read data files, listing them in the merged bitsets as read or
+    unreadable
+
+    :return: sets of the lines and arcs of every measured file - dict
+    """
+    measured = {'lines': {}, 'arcs': {}}
+    for path in paths:
+        data = CoverageData()
+        try:
+            data.read_file(path)
+        except CoverageException as exc:
+            merged['unreadable'].append(str(exc))
+            continue
+        kind = 'arcs' if data.has_arcs() else 'lines'
+        for name in data.measured_files():
+            measured[kind].setdefault(aliases.map(name), set()).update(
+                getattr(data, kind)(name))
+        merged['read'].append(path)
+    return measured
+
+
+def _arc_bitsets(arcs):
+    """Bitsets of the ends of arcs, by start line"""
+    ends = {}
+    for start, end in arcs:
+        ends[start] = ends.get(start, 0) | 1 << _zigzag(end)
+    return ends
+
+
+def _merge(merged, bitsets):
+    """Merge bitsets in place, see `read_chunk`"""
+    if merged['lines'] and bitsets['arcs'] or (
+            merged['arcs'] and bitsets['lines']):
+        raise CoverageException("Can't combine arc data with line data")
+    for path, bits in bitsets['lines'].items():
+        merged['lines'][path] = merged['lines'].get(path, 0) | bits
+    for path, ends in bitsets['arcs'].items():
+        merged_ends = merged['arcs'].setdefault(path, {})
+        for start, bits in ends.items():
+            merged_ends[start] = merged_ends.get(start, 0) | bits
+    merged['read'].extend(bitsets['read'])
+    merged['unreadable'].extend(bitsets['unreadable'])
+
+
+def _empty():
+    """Merged bitsets of no data file"""
+    return {'lines': {}, 'arcs': {}, 'read': [], 'unreadable': []}
+
+
+def _zigzag(number):
+    """Bit of a line number, negative numbers being exits"""
+    return 2 * number if number >= 0 else -2 * number - 1
+
+
+def _unzigzag(bit):
+    """Line number of a bit, see `_zigzag`"""
+    return bit // 2 if bit % 2 == 0 else -(bit + 1) // 2
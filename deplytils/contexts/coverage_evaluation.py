@@ -0,0 +1,135 @@
+"""
+Evaluation of coverage percentages straight from the measured data,
+without rendering any report
+"""
+import fnmatch
+import os
+
+from coverage import CoverageException
+from coverage.misc import NotPython
+from coverage.report import Reporter
+from coverage.results import Numbers
+
+
+# pylint: disable=unused-variable
+class CoverageEvaluation(object):
+    """
+    Total, per-file and per-package percentages of a coverage, computed
+    as its text report computes them, i.e. 100% without statements, the
+    total being 0 until a file is added. Files are named relative to the
+    current directory, as in the report, and packages are the dotted
+    directories of the files, including their subpackages. Files that
+    could not be analyzed are left out, their errors being kept as
+    `errors`, by file name.
+    """
+    def __init__(self):
+        self.total = 0.0
+        self.files = {}
+        self.packages = {}
+        self.errors = {}
+        self._numbers = Numbers()
+        self._package_numbers = {}
+
+    def add(self, filename, numbers):
+        """
+        Add the numbers of a file
+
+        :param filename: name of the file, relative to the current
+                directory unless outside of it - str
+        :param numbers: coverage.results.Numbers of the file
+        """
+        self._numbers += numbers
+        self.total = self._numbers.pc_covered
+        self.files[filename] = numbers.pc_covered
+        for package in _packages(filename):
+            package_numbers = self._package_numbers.get(
+                package, Numbers()) + numbers
+            self._package_numbers[package] = package_numbers
+            self.packages[package] = package_numbers.pc_covered
+
+    def failures(self, file_thresholds=None, package_thresholds=None):
+        """
+        Describe the files and packages not meeting their thresholds
+
+        :param file_thresholds: minimum percentages of files, by glob of
+                their names - dict
+        :param package_thresholds: minimum percentages of packages, by
+                dotted name - dict
+        :return: list of messages, including thresholds nothing matched
+        """
+        failures = []
+        for pattern, threshold in sorted((file_thresholds or {}).items()):
+            matched = fnmatch.filter(sorted(self.files), pattern)
+            failures.extend(_failures(self.files, matched, pattern,
+                                      threshold))
+        for name, threshold in sorted((package_thresholds or {}).items()):
+            matched = [name] if name in self.packages else []
+            failures.extend(_failures(self.packages, matched, name,
+                                      threshold))
+        return failures
+
+
+def evaluate(coverage, morfs=None, ignore_errors=None, omit=None,
+             include=None, **_):
+    """
+    Evaluate a coverage as `Coverage.report` would, without formatting
+    anything. Files that cannot be analyzed are left out, their errors
+    being recorded, as the report prints them, unless errors are
+    ignored or the file is not meant to be python. Without data to
+    report, the evaluation has no file and a total of 0, where the
+    report would raise.
+
+    :param coverage: stopped Coverage
+    :param morfs: see `Coverage.report`
+    :param ignore_errors: see `Coverage.report`
+    :param omit: see `Coverage.report`
+    :param include: see `Coverage.report`
+    :param _: other `Coverage.report` arguments, which only change the
+            rendering
+    :return: CoverageEvaluation
+    """
+    coverage.get_data()
+    coverage.config.from_args(ignore_errors=ignore_errors, report_omit=omit,
+                              report_include=include)
+    evaluation = CoverageEvaluation()
+    for reporter in Reporter(coverage, coverage.config).find_file_reporters(
+            morfs):
+        try:
+            analysis = coverage._analyze(  # pylint: disable=protected-access
+                reporter)
+        except CoverageException as exc:
+            if _is_reported(coverage, reporter, exc):
+                evaluation.errors[reporter.relative_filename()] = (
+                    '{}: {}'.format(type(exc).__name__, exc))
+            continue
+        evaluation.add(reporter.relative_filename(), analysis.numbers)
+    return evaluation
+
+
+def _is_reported(coverage, reporter, error):
+    """Whether the report prints the error of analyzing a file"""
+    if coverage.config.ignore_errors:
+        return False
+    return not (isinstance(error, NotPython) and
+                not reporter.should_be_python())
+
+
+def _packages(filename):
+    """Dotted names of the directories of a file, outermost first"""
+    names = []
+    for name in filter(None, os.path.dirname(filename).split(os.sep)):
+        names.append(name)
+        yield '.'.join(names)
+
+
+def _failures(percentages, matched, name, threshold):
+    """Messages of the matched percentages below a threshold"""
+    if not matched:
+        return ['No coverage data for {}'.format(name)]
+    failures = []
+    for key in matched:
+        if percentages[key] < threshold:
+            failures.append(
+                '{:0.2f}% of {} does not meet {:0.2f}% threshold'.format(
+                    percentages[key], key, threshold))
+    return failures
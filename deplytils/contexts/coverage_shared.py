@@ -0,0 +1,64 @@
+"""
+Measurement of a block of code with the tracer of an already running
+Coverage, so that nested measurements don't start a second tracer
+"""
+from coverage.files import FnmatchMatcher, abs_file, prep_patterns
+
+
+# pylint: disable=unused-variable
+class SharedTracer(object):
+    """
+    Starts and stops measuring a block with the tracer of a running
+    Coverage. On start, the data its tracer collected so far is set
+    aside and cleared in place, so the tracer keeps recording into the
+    same dicts. On stop, the data recorded within the block is added to
+    another Coverage, which is never started and reports on it, and the
+    data set aside is put back. Blocks can be nested, every block seeing
+    the lines executed within it.
+    """
+    def __init__(self, outer, coverage):
+        """
+        :param outer: running Coverage, measuring branches if and only
+                if `coverage` does
+        :param coverage: unstarted Coverage the data of the block is
+                added to, whose include and omit options narrow the
+                files of the block
+        """
+        self.outer = outer
+        self.coverage = coverage
+        self._set_aside = None
+
+    def start(self):
+        """Set aside the data collected so far"""
+        self._set_aside = {}
+        for path, measured in list(self._collected().items()):
+            self._set_aside[path] = dict(measured)
+            measured.clear()
+
+    def stop(self):
+        """Add the data of the block to the coverage, then restore"""
+        include = _matcher(self.coverage.get_option('run:include'))
+        omit = _matcher(self.coverage.get_option('run:omit'))
+        block = {}
+        for path, measured in list(self._collected().items()):
+            filename = abs_file(path)
+            if measured and (include is None or include.match(filename)) and (
+                    omit is None or not omit.match(filename)):
+                block[filename] = dict(measured)
+            measured.update(self._set_aside.get(path, {}))
+
+        data = self.coverage.get_data()
+        if self.outer.get_option('run:branch'):
+            data.add_arcs(block)
+        else:
+            data.add_lines(block)
+
+    def _collected(self):
+        """Data of the outer tracer not yet flushed to its CoverageData"""
+        collector = self.outer.collector
+        return collector.data if collector is not None else {}
+
+
+def _matcher(patterns):
+    """Matcher of coverage file patterns, None without patterns"""
+    return FnmatchMatcher(prep_patterns(patterns)) if patterns else None
@@ -0,0 +1,296 @@
+"""
+Context managers gating performance as StrictCoverage gates coverage:
+StrictTiming for wall and CPU time, StrictMemory for peak allocated
+memory. A block is measured once with `with`, while `run` measures a
+function after warm-up runs, keeping the best of several repeats.
+"""
+import abc
+import cProfile
+import json
+import os
+import pstats
+import time
+from timeit import default_timer
+
+CPU_TIMER = getattr(time, 'process_time', None) or time.clock
+# StrictMemory contexts measuring, outermost first
+_MEASURING = []
+
+
+class BudgetExceeded(AssertionError):
+    """Measurements exceeding their budgets or baselines"""
+    def __init__(self, failures, diagnostics=''):
+        """
+        :param failures: messages of the exceeded budgets - list
+        :param diagnostics: hotspots or allocation sites - str
+        """
+        super(BudgetExceeded, self).__init__(
+            '\n'.join(failures + ([diagnostics] if diagnostics else [])))
+        self.failures = failures
+        self.diagnostics = diagnostics
+
+
+# abstract base class of python 2 and 3 alike
+_ABSTRACT = abc.ABCMeta('_ABSTRACT', (object,), {})
+
+
+class _StrictBudget(_ABSTRACT):
+    """
+    Base of the performance contexts. Measurements are numbers by
+    metric name, e.g. {'wall': 0.2}, kept in `measurements` and
+    compared to the budgets and baseline on exit.
+    """
+    metrics = ()
+
+    def __init__(self, budgets, baseline=None, tolerance=0.0, repeat=1,
+                 warmup=0, hotspots=0):
+        """
+        :param budgets: maximum of the metrics, unbounded if None - dict
+        :param baseline: earlier measurements, as saved by `save`, or
+                the path of their JSON file. Missing files or metrics
+                are not compared - dict or str
+        :param tolerance: fraction by which budgets and baselines may be
+                exceeded, e.g. 0.1 for 10% - float
+        :param repeat: measured runs of `run`, keeping the best - int
+        :param warmup: unmeasured runs of `run` before those - int
+        :param hotspots: number of hotspots added to the error when a
+                budget is exceeded, none if 0 - int
+        """
+        self.budgets = dict((metric, budget) for metric, budget
+                            in budgets.items() if budget is not None)
+        self.baseline = _load_baseline(baseline)
+        self.tolerance = tolerance
+        self.repeat = repeat
+        self.warmup = warmup
+        self.hotspots = hotspots
+        self.measurements = None
+
+    def __enter__(self):
+        """Start measuring"""
+        self.measurements = None
+        self._start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """
+        Stop measuring and compare the measurements, unless the block
+        raised
+
+        :raises BudgetExceeded: a budget or baseline is exceeded
+        """
+        self.measurements = self._stop()
+        if exc_type is None:
+            self.check()
+
+    def run(self, function, *args, **kwargs):
+        """
+        Measure a function, after warming it up, keeping the lowest
+        measurements of the repeats
+
+        :param function: callable measured
+        :param args: args of function
+        :param kwargs: kwargs of function
+        :return: measurements - dict
+        :raises BudgetExceeded: a budget or baseline is exceeded
+        """
+        for _ in range(self.warmup):
+            function(*args, **kwargs)
+        best = {}
+        for _ in range(self.repeat):
+            self._start()
+            try:
+                function(*args, **kwargs)
+            finally:
+                measurements = self._stop()
+            for metric, value in measurements.items():
+                best[metric] = min(best.get(metric, value), value)
+        self.measurements = best
+        self.check()
+        return best
+
+    def check(self):
+        """
+        Raise if the measurements exceed their budgets or baselines
+
+        :raises BudgetExceeded: a budget or baseline is exceeded
+        """
+        failures = self.failures()
+        if failures:
+            raise BudgetExceeded(failures, self._diagnostics())
+
+    def failures(self):
+        """
+        Describe the budgets and baselines that are exceeded
+
+        :return: list of messages
+        """
+        failures = []
+        limits = (('budget', self.budgets), ('baseline', self.baseline))
+        for metric in self.metrics:
+            value = self.measurements[metric]
+            for kind, limits_by_metric in limits:
+                limit = limits_by_metric.get(metric)
+                if limit is not None and value > limit * (
+                        1 + self.tolerance):
+                    failures.append(
+                        '{} of {:g} exceeds {:g} {} by more than {:g}%'
+                        .format(metric, value, limit, kind,
+                                self.tolerance * 100))
+        return failures
+
+    def save(self, path):
+        """
+        Save the measurements as a baseline of later runs
+
+        :param path: path of the JSON file - str
+        """
+        with open(path, 'w') as file_:
+            json.dump(self.measurements, file_, indent=2, sort_keys=True)
+
+    @abc.abstractmethod
+    def _start(self):
+        """Start measuring once"""
+
+    @abc.abstractmethod
+    def _stop(self):
+        """
+        Stop measuring once
+
+        :return: measurements - dict
+        """
+
+    @abc.abstractmethod
+    def _diagnostics(self):
+        """Hotspots of the last measured run, described - str"""
+
+
+# pylint: disable=unused-variable
+class StrictTiming(_StrictBudget):
+    """
+    Raises BudgetExceeded on exit if the wall or CPU time of the block,
+    in seconds, exceeds its budget or baseline, e.g.
+    `with StrictTiming(wall=0.5):`. Given hotspots, the block is
+    profiled, which slows it down, and the functions taking the most
+    cumulative time are added to the error.
+    """
+    metrics = ('wall', 'cpu')
+
+    def __init__(self, wall=None, cpu=None, **kwargs):
+        """
+        :param wall: maximum wall time, in seconds - float
+        :param cpu: maximum CPU time of the process, in seconds - float
+        :param kwargs: see _StrictBudget init
+        """
+        super(StrictTiming, self).__init__(dict(wall=wall, cpu=cpu),
+                                           **kwargs)
+        self._profile = None
+        self._started = None
+
+    def _start(self):
+        self._profile = cProfile.Profile() if self.hotspots else None
+        self._started = (default_timer(), CPU_TIMER())
+        if self._profile is not None:
+            self._profile.enable()
+
+    def _stop(self):
+        if self._profile is not None:
+            self._profile.disable()
+        wall, cpu = self._started
+        return {'wall': default_timer() - wall, 'cpu': CPU_TIMER() - cpu}
+
+    def _diagnostics(self):
+        if self._profile is None:
+            return ''
+        stats = pstats.Stats(self._profile).stats
+        functions = sorted(stats.items(), key=lambda item: item[1][3],
+                           reverse=True)[:self.hotspots]
+        return '\n'.join(
+            '{:.6f}s cumulative, {} calls: {}:{}({})'.format(
+                cumulative, calls, path, line, name)
+            for (path, line, name), (_, calls, _, cumulative, _)
+            in functions)
+
+
+class StrictMemory(_StrictBudget):
+    """
+    Raises BudgetExceeded on exit if the peak memory allocated by the
+    block, in bytes above what was allocated on entry, exceeds its
+    budget or baseline, e.g. `with StrictMemory(peak=2 ** 20):`. Memory
+    is traced with tracemalloc, which slows the block down. Given
+    hotspots, the lines holding the most memory still allocated on exit
+    are added to the error, leaving out memory freed before, however
+    much it raised the peak. Requires python 3.4 or later, and python
+    3.9 or later to measure while memory is already traced, e.g. within
+    another StrictMemory, as the peak can't be reset before.
+    """
+    metrics = ('peak',)
+
+    def __init__(self, peak=None, **kwargs):
+        """
+        :param peak: maximum peak allocated memory, in bytes - int
+        :param kwargs: see _StrictBudget init
+        """
+        super(StrictMemory, self).__init__(dict(peak=peak), **kwargs)
+        self._stop_tracing = False
+        self._allocated = 0
+        self._peak = 0
+        self._snapshot = None
+
+    def _start(self):
+        """
+        :raises RuntimeError: memory is already traced, before python 3.9
+        """
+        # imported here, as python 2 has no tracemalloc
+        import tracemalloc
+        reset_peak = getattr(tracemalloc, 'reset_peak', None)
+        self._stop_tracing = not tracemalloc.is_tracing()
+        if not (self._stop_tracing or reset_peak):
+            raise RuntimeError('Measuring memory while it is traced '
+                               'requires python 3.9 or later')
+        if self._stop_tracing:
+            tracemalloc.start()
+        # the peak is reset for this block, so the enclosing blocks keep
+        # the peak they reached so far. Tracing just started otherwise
+        if not self._stop_tracing:
+            _fold_peak(tracemalloc.get_traced_memory()[1])
+            reset_peak()
+        self._allocated = tracemalloc.get_traced_memory()[0]
+        self._peak = 0
+        _MEASURING.append(self)
+
+    def _stop(self):
+        import tracemalloc
+        _MEASURING.remove(self)
+        peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+        self._snapshot = (tracemalloc.take_snapshot() if self.hotspots
+                          else None)
+        if self._stop_tracing:
+            tracemalloc.stop()
+        return {'peak': max(peak - self._allocated, 0)}
+
+    def _diagnostics(self):
+        if self._snapshot is None:
+            return ''
+        import tracemalloc
+        snapshot = self._snapshot.filter_traces(
+            [tracemalloc.Filter(False, __file__)])
+        statistics = snapshot.statistics('lineno')[:self.hotspots]
+        return '\n'.join(['Memory still allocated on exit, not at the peak:'] +
+                         [str(statistic) for statistic in statistics])
+
+
+def _fold_peak(peak):
+    """Keep a traced peak in the StrictMemory contexts measuring"""
+    # pylint: disable=protected-access
+    for context in _MEASURING:
+        context._peak = max(context._peak, peak)
+
+
+def _load_baseline(baseline):
+    """Baseline measurements, loaded from a JSON file if a path"""
+    if baseline is None or isinstance(baseline, dict):
+        return baseline or {}
+    if not os.path.exists(baseline):
+        return {}
+    with open(baseline) as file_:
+        return json.load(file_)
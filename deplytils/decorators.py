@@ -1,4 +1,17 @@
 """Decorators"""
+import functools
+import inspect
+import pickle
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from timeit import default_timer
+
+from deplytils.cache import PickleCache, hash_key
+
+_MISSING = object()
+_INSTALLED = weakref.WeakKeyDictionary()
 
 
 class class_property(object):  # pylint: disable=invalid-name
@@ -9,7 +22,6 @@ class class_property(object):  # pylint: disable=invalid-name
         self.method = method
         self.name = method.__name__
         self.__doc__ = getattr(method, '__doc__')
-        self.class_ = None
 
     def __get__(self, instance, owner):
         assert owner is not None and instance is None
@@ -21,33 +33,97 @@ class cached_class_property(class_property):
     """
     Decorator to transform a class method into a class field. The first
     time the field is accessed, the method is run. All subsequent
-    accesses will return a cached value of the method.
+    accesses will return a cached value of the method, until it expires
+    if given a time to live, e.g. `@cached_class_property(ttl=30)`.
+
+    Values are cached per class, so subclasses get values of their own,
+    computed with themselves as `cls`. Classes are referenced weakly, so
+    caching a value does not keep its class alive. The first accesses of
+    a class from several threads run the method once: a single thread
+    runs it while the others wait for its value.
 
-    The cache can be invalidated by deleting the field. Note, however,
-    that deleting the field before a value is in the cache will delete
-    the method and corresponding field from the class forever.
+    The cache can be invalidated by deleting the field from the class
+    defining it, which invalidates the values of its subclasses too.
+    Note, however, that deleting the field before a value is in the
+    cache will delete the method and corresponding field from the class
+    forever. Counters of the cache are in the `stats` of the field, e.g.
+    `vars(Class)['field'].stats`.
+
+    With `@cached_class_property(install=True)`, a computed value
+    replaces the field in the class accessed, as a plain class attribute,
+    so that reads no longer run the descriptor and cost the same as any
+    attribute. Installed values never expire, and once installed in the
+    defining class, subclasses that did not access the field yet inherit
+    the value. They are invalidated with `invalidate`, as `del` would
+    only delete the attribute.
+
+    With `@cached_class_property(persist_dir=path)`, computed values are
+    also pickled to a directory, from which later processes load them
+    rather than running the method. They are keyed by the qualified name
+    of the class, the source of the method and an optional `version`,
+    to bump when the method depends on other code that changed. Values
+    failing to pickle are only cached in memory. Persisted values never
+    expire either.
     """
 
-    def __init__(self, method):
+    def __new__(cls, method=None, **options):
+        if method is None:
+            return functools.partial(cls, **options)
+        return super(cached_class_property, cls).__new__(cls)
+
+    def __init__(self, method, ttl=None, stale_while_revalidate=False,
+                 install=False, persist_dir=None, version=''):
+        """
+        :param method: class method computing the value
+        :param ttl: seconds a value is cached, forever if None - float
+        :param stale_while_revalidate: whether an expired value keeps
+                being returned while a single background thread
+                recomputes it, rather than recomputing it on access -
+                bool
+        :param install: whether computed values replace the field as
+                plain class attributes - bool
+        :param persist_dir: directory values are pickled to, for later
+                processes to load, if not None - str
+        :param version: version of the persisted values - str
+        :raises ValueError: values are both installed or persisted and
+                expiring
+        """
         super(cached_class_property, self).__init__(method)
-        self.is_cached = False
-        self.cached_value = None
+        self.options = dict(ttl=ttl,
+                            stale_while_revalidate=stale_while_revalidate,
+                            install=install, persist_dir=persist_dir,
+                            version=version)
+        self.cache = ExpiringCache(ttl, stale_while_revalidate)
+        self.values = weakref.WeakKeyDictionary()
+        self._defining_class = None
+        self._store = None
+        expiring = ttl is not None or stale_while_revalidate
+        if install and expiring:
+            raise ValueError('Installed values never expire')
+        if persist_dir is not None and expiring:
+            raise ValueError('Persisted values never expire')
+
+    @property
+    def stats(self):
+        """Counters of the cache, see ExpiringCache"""
+        return self.cache.stats
 
     def __get__(self, instance, owner=None):
         """
-        If the cache is empty/invalidated, run the class method and
-        store it in the cache. The cached value is returned.
+        If the cache of the class is empty/invalidated, run the class
+        method and store it in the cache. The cached value is returned.
 
         :param instance: self instance
         :param owner: type of the class
         :return: result of cached method call
         """
-        if not self.is_cached:
-            self.class_ = owner or instance.__class__
-            self.cached_value = self.method(owner)
-            self.is_cached = True
-
-        return self.cached_value
+        owner = owner or type(instance)
+        entry = self.values.get(owner)
+        if entry is not None and entry.expires is None and (
+                entry.value is not _MISSING):
+            self.cache.stats['hits'] += 1
+            return entry.value
+        return self.cache.get(self.values, owner, self._compute, owner)
 
     def __del__(self):
         """
@@ -56,5 +132,345 @@ class cached_class_property(class_property):
 
         :return: None
         """
-        if self.class_:
-            setattr(self.class_, self.name, self.__class__(self.method))
+        class_ = self._defining_class and self._defining_class()
+        if class_ is not None:
+            setattr(class_, self.name,
+                    self.__class__(self.method, **self.options))
+
+    def _compute(self, owner):
+        """
+        Run the method for a class, or load its persisted value,
+        remembering the defining class
+        """
+        if self.options['persist_dir'] is None:
+            value = self.method(owner)
+        else:
+            value = self._load_or_compute(owner)
+        self._defining_class = self._find_defining_class(owner)
+        if self.options['install']:
+            held = vars(owner).get(self.name) is self
+            _INSTALLED.setdefault(owner, {})[self.name] = (self, held)
+            setattr(owner, self.name, value)
+        return value
+
+    def _load_or_compute(self, owner):
+        """Load the persisted value of a class, persisting it if missing"""
+        if self._store is None:
+            self._store = PickleCache(self.options['persist_dir'])
+        key = self._persist_key(owner)
+        value = self._store.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.method(owner)
+            try:
+                self._store.set(key, value)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                return value
+            self._store.prune()
+        return value
+
+    def _persist_key(self, owner):
+        """Key of the persisted value of a class"""
+        return hash_key(
+            owner.__module__, getattr(owner, '__qualname__', owner.__name__),
+            self.name, _source(self.method), self.options['version'],
+            sys.version)
+
+    def forget(self, class_):
+        """
+        Invalidate the values of a class and its subclasses, without
+        restoring the fields whose values are installed, see
+        `invalidate`
+
+        :param class_: class - type
+        """
+        for owner in list(self.values.keys()):
+            if issubclass(owner, class_):
+                self.values.pop(owner, None)
+
+    def _find_defining_class(self, owner):
+        """
+        Weak reference to the class of the mro of owner whose namespace
+        holds this field, None if none does
+        """
+        for class_ in inspect.getmro(owner):
+            if vars(class_).get(self.name) is self:
+                return weakref.ref(class_)
+        return None
+
+
+def _source(function):
+    """Source of a function, its bytecode if the source is unavailable"""
+    try:
+        return inspect.getsource(function)
+    except (IOError, TypeError):
+        code = getattr(function, '__code__', None)
+        return code.co_code if code is not None else b''
+
+
+def invalidate(class_, name):
+    """
+    Invalidate the values of a cached_class_property of a class and its
+    subclasses, restoring the field wherever its values are installed.
+    Unlike `del`, the field is never deleted, whether values are cached,
+    installed or neither.
+
+    :param class_: class - type
+    :param name: name of the field - str
+    """
+    for owner in list(_INSTALLED.keys()):
+        fields = _INSTALLED.get(owner, {})
+        if issubclass(owner, class_) and name in fields:
+            _restore(owner, name, *fields.pop(name))
+    for owner in inspect.getmro(class_):
+        field = vars(owner).get(name)
+        if isinstance(field, cached_class_property):
+            field.forget(class_)
+            return
+
+
+def _restore(owner, name, descriptor, held):
+    """
+    Replace the installed value of a class by the field it replaced,
+    either held by the class or inherited
+    """
+    if held:
+        setattr(owner, name, descriptor)
+    else:
+        delattr(owner, name)
+
+
+class cached_property(object):  # pylint: disable=invalid-name
+    """
+    Decorator to make a method behave like a property whose value is
+    cached per instance, until it expires if given a time to live, e.g.
+    `@cached_property(ttl=30)`. Deleting the property of an instance
+    invalidates its value. Counters of the cache are in the `stats` of
+    the property, e.g. `vars(Class)['field'].stats`.
+    """
+    def __new__(cls, method=None, **options):
+        if method is None:
+            return functools.partial(cls, **options)
+        return super(cached_property, cls).__new__(cls)
+
+    def __init__(self, method, ttl=None, stale_while_revalidate=False):
+        """
+        :param method: method computing the value
+        :param ttl: see cached_class_property
+        :param stale_while_revalidate: see cached_class_property
+        """
+        self.method = method
+        self.name = method.__name__
+        self.__doc__ = getattr(method, '__doc__')
+        self.cache = ExpiringCache(ttl, stale_while_revalidate)
+
+    @property
+    def stats(self):
+        """Counters of the cache, see ExpiringCache"""
+        return self.cache.stats
+
+    def __get__(self, instance, owner=None):
+        """
+        Get the cached value of an instance, computing it if needed. As a
+        data descriptor, the property keeps its cache entry in the
+        `__dict__` of the instance, under its own name.
+
+        :param instance: instance, None when accessed from the class
+        :param owner: type of the instance
+        :return: cached value, or the property itself from the class
+        """
+        if instance is None:
+            return self
+        return self.cache.get(vars(instance), self.name, self.method,
+                              instance)
+
+    def __set__(self, instance, value):
+        raise AttributeError("can't set attribute")
+
+    def __delete__(self, instance):
+        """Invalidate the value of an instance"""
+        if vars(instance).pop(self.name, None) is None:
+            raise AttributeError(self.name)
+
+
+class cached_classmethod(object):  # pylint: disable=invalid-name
+    """
+    Decorator to make a class method taking arguments cache its results
+    by class and arguments, in a least recently used cache of bounded
+    size whose results expire if given a time to live, e.g.
+    `@cached_classmethod(maxsize=64, ttl=30)`. Arguments must be
+    hashable. The cache is cleared by calling `clear` and its counters
+    are in the `stats` of the method, e.g. `vars(Class)['method']`.
+    """
+    def __new__(cls, method=None, **options):
+        if method is None:
+            return functools.partial(cls, **options)
+        return super(cached_classmethod, cls).__new__(cls)
+
+    def __init__(self, method, maxsize=128, ttl=None):
+        """
+        :param method: class method computing the results
+        :param maxsize: number of results kept - int
+        :param ttl: see cached_class_property
+        """
+        self.method = method
+        self.__doc__ = getattr(method, '__doc__')
+        self.cache = ExpiringCache(ttl, maxsize=maxsize)
+        self.results = OrderedDict()
+
+    @property
+    def stats(self):
+        """Counters of the cache, see ExpiringCache"""
+        return self.cache.stats
+
+    def __get__(self, instance, owner=None):
+        return functools.partial(self._call, owner or type(instance))
+
+    def clear(self):
+        """Forget every cached result"""
+        self.results.clear()
+
+    def _call(self, owner, *args, **kwargs):
+        """Get the cached result of the method for a class"""
+        key = (owner, args, frozenset(kwargs.items()))
+        return self.cache.get(self.results, key, functools.partial(
+            self.method, owner, *args, **kwargs))
+
+
+class ExpiringCache(object):
+    """
+    Policy of the caches of the cached decorators, whose entries are
+    stored in mappings given on every access. A value is computed once
+    per key, the first thread computing it while the others wait, and
+    is cached until it expires. Once expired, it is recomputed on
+    access, or returned while a single background thread recomputes it
+    if stale while revalidate. A failed computation caches nothing, and
+    a failed background refresh keeps the expired value.
+
+    `stats` counts the values returned from the cache ('hits'), the
+    values computed as nothing was cached ('misses'), the recomputed
+    expired values ('refreshes') and the failed background refreshes
+    ('errors'). Counters are not locked, so they are approximate under
+    contention.
+    """
+    def __init__(self, ttl=None, stale_while_revalidate=False,
+                 maxsize=None):
+        """
+        :param ttl: seconds a value is cached, forever if None - float
+        :param stale_while_revalidate: whether expired values are
+                recomputed in the background - bool
+        :param maxsize: number of entries kept in a mapping, evicting
+                the least recently used first, unbounded if None. The
+                mappings must then be OrderedDicts - int
+        """
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.maxsize = maxsize
+        self.stats = {'hits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0}
+        self._lock = threading.Lock()
+
+    def get(self, entries, key, function, *args):
+        """
+        Get a cached value, computing it if needed
+
+        :param entries: mapping of the keys to their cache entries
+        :param key: key of the value
+        :param function: computes the value from args
+        :param args: arguments of function
+        :return: value
+        """
+        entry = entries.get(key)
+        if entry is not None and entry.is_fresh():
+            self.stats['hits'] += 1
+            if self.maxsize is not None:
+                self._touch(entries, key, entry)
+            return entry.value
+        if entry is not None and entry.value is not _MISSING and (
+                self.stale_while_revalidate):
+            value = entry.value
+            self.stats['hits'] += 1
+            self._revalidate(entry, function, args)
+            return value
+        return self._compute(self._entry(entries, key), function, args)
+
+    def _entry(self, entries, key):
+        """Entry of a key, added if missing"""
+        with self._lock:
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = _Entry()
+                while self.maxsize is not None and (
+                        len(entries) > self.maxsize):
+                    entries.popitem(last=False)
+            return entry
+
+    def _touch(self, entries, key, entry):
+        """Mark an entry as the most recently used one"""
+        with self._lock:
+            entries[key] = entries.pop(key, entry)
+
+    def _compute(self, entry, function, args):
+        """Compute the value of an entry, unless a thread just did"""
+        with entry.lock:
+            if entry.is_fresh():
+                self.stats['hits'] += 1
+                return entry.value
+            counter = 'misses' if entry.value is _MISSING else 'refreshes'
+            entry.store(function(*args), self.ttl)
+            self.stats[counter] += 1
+            return entry.value
+
+    def _revalidate(self, entry, function, args):
+        """Start recomputing an expired entry, unless already started"""
+        with self._lock:
+            if entry.refreshing:
+                return
+            entry.refreshing = True
+        thread = threading.Thread(target=self._refresh,
+                                  args=(entry, function, args))
+        thread.daemon = True
+        thread.start()
+
+    def _refresh(self, entry, function, args):
+        """Recompute an expired entry in the background"""
+        try:
+            with entry.lock:
+                entry.store(function(*args), self.ttl)
+            self.stats['refreshes'] += 1
+        except Exception:  # pylint: disable=broad-except
+            self.stats['errors'] += 1
+        finally:
+            entry.refreshing = False
+
+
+class _Entry(object):
+    """
+    Value of a cache, when it expires and the lock computing it. Only
+    a computed value and its expiry are pickled or copied, e.g. along
+    with the instance of a cached_property, the copy getting a lock of
+    its own.
+    """
+    __slots__ = ('value', 'expires', 'lock', 'refreshing')
+
+    def __init__(self):
+        self.value = _MISSING
+        self.expires = None
+        self.lock = threading.RLock()
+        self.refreshing = False
+
+    def __getstate__(self):
+        return (self.value, self.expires) if self.value is not _MISSING else ()
+
+    def __setstate__(self, state):
+        self.__init__()
+        if state:
+            self.value, self.expires = state
+
+    def is_fresh(self):
+        """Whether the value is computed and not expired"""
+        return self.value is not _MISSING and (
+            self.expires is None or default_timer() < self.expires)
+
+    def store(self, value, ttl):
+        """Store a value, expiring after ttl seconds unless None"""
+        self.value = value
+        self.expires = None if ttl is None else default_timer() + ttl
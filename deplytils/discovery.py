@@ -0,0 +1,92 @@
+"""Discovery of a project's python files"""
+import fnmatch
+import os
+import re
+
+from deplytils.git import ignored_files
+
+
+# pylint: disable=unused-variable
+def iter_package_files(path, includes=('*.py',), excludes=('*local*.py',),
+                       gitignore=False):
+    """
+    Lazily yields the files of a project that belong to a package, i.e.
+    files in a directory containing a __init__.py file, with the
+    exception of the top directory of the project. Directories that are
+    not packages are pruned before being descended into, so neither
+    they nor anything below them (e.g. .git, virtualenvs or
+    node_modules) is walked.
+
+    Globs are matched against the name of a file or directory, unless
+    they contain a slash, when they are matched against its path
+    relative to the project, using forward slashes. The default
+    excludes only leave out python files named like `*local*`, as
+    packages such as locale are walked.
+
+    :param path: absolute or relative path of the project
+    :param includes: globs of the files to yield - list like
+    :param excludes: globs of the files and directories to leave out -
+            list like
+    :param gitignore: whether to also leave out the files and
+            directories git ignores, if the project is in a git
+            repository - bool
+    :return: generator of absolute file paths, sorted per directory
+    """
+    top = os.path.abspath(path)
+    include = _compile_globs(includes)
+    is_kept = _make_filter(top, excludes, gitignore)
+    for root, prefix, dirs, files in _walk_packages(top):
+        dirs[:] = sorted(name for name in dirs if is_kept(prefix, name))
+        for name in sorted(files):
+            if include.match(name) and is_kept(prefix, name):
+                yield os.path.join(root, name)
+
+
+def _make_filter(top, excludes, gitignore):
+    """
+    Build a filter of the entries of a project
+
+    :param top: absolute path of the project
+    :param excludes: globs of the entries to leave out - list like
+    :param gitignore: whether to leave out what git ignores - bool
+    :return: function of the relative path prefix of a directory and
+            the name of an entry in it, returning whether to keep it
+    """
+    exclude_name = _compile_globs(
+        [glob for glob in excludes if '/' not in glob])
+    exclude_path = _compile_globs([glob for glob in excludes if '/' in glob])
+    ignored = set()
+    if gitignore:
+        ignored = set(os.path.relpath(entry, top).replace(os.sep, '/')
+                      for entry in ignored_files(top))
+
+    def is_kept(prefix, name):
+        """Whether an entry is neither excluded nor ignored"""
+        relative = prefix + name
+        return not (exclude_name.match(name) or exclude_path.match(relative)
+                    or relative in ignored)
+    return is_kept
+
+
+def _walk_packages(top):
+    """
+    os.walk that prunes directories which are not packages
+
+    :param top: absolute path of the project
+    :return: generator of the root, its path relative to top as a
+            prefix, and the mutable dirs and files of each package
+    """
+    for root, dirs, files in os.walk(top):
+        if root == top:
+            yield root, '', dirs, files
+        elif '__init__.py' in files:
+            relative = os.path.relpath(root, top).replace(os.sep, '/')
+            yield root, relative + '/', dirs, files
+        else:
+            del dirs[:]
+
+
+def _compile_globs(globs):
+    """Compile globs into a single regex, matching nothing if empty"""
+    patterns = [fnmatch.translate(glob) for glob in globs] or ['(?!)']
+    return re.compile('|'.join(patterns))
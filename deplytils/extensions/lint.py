@@ -1,20 +1,37 @@
 """Linting utilities, primarily for deployment"""
+import multiprocessing
 import os
 
-import re
-from pylint.lint import Run
+from pylint.lint import PyLinter, Run, _merge_stats
+from pylint.utils import Message
+
+from deplytils.cache import ResultCache, hash_key
+from deplytils.discovery import iter_package_files
+from deplytils.extensions.lint_profile import summarize, write_summary
+from deplytils.extensions.lint_reporter import (TEXT_TEMPLATE,
+                                                StreamingReporter)
+from deplytils.extensions.lint_server import request_lint
+from deplytils.extensions.lint_worker import (config_key, dump_result,
+                                              iter_lint, lint_shard,
+                                              load_result)
+from deplytils.git import changed_files
 
 
 # pylint: disable=unused-variable
 # noinspection SpellCheckingInspection
-class ProjectLinter(object):
+class ProjectLinter(object):  # pylint: disable=too-many-instance-attributes
     """
     Lints all python files in a project. Note that python files must be
     in a directory that contains a __init__.py file, with the exception
-    of the top directory in the project.
+    of the top directory in the project. Directories that do not are
+    not descended into.
     """
+    # pylint: disable=too-many-arguments,too-many-locals
     def __init__(self, project_path=None, rc_file=None, args=None, exit_=False,
-                 reporter=None):
+                 reporter=None, jobs=None, cache_dir=None, cache_size=10000,
+                 changed_since=None, includes=('*.py',),
+                 excludes=('*local*.py',), gitignore=False, server_socket=None,
+                 profile=False, profile_output=None, fail_fast=False):
         """
         Runs pylint on an entire project
 
@@ -24,6 +41,38 @@ class ProjectLinter(object):
         :param args: additional args for pylint in a list
         :param exit_: should exit after tests - bool
         :param reporter: reporter pylint argument
+        :param jobs: number of worker processes the project's files are
+                sharded across, 0 being one per cpu. If None, pylint
+                runs as configured
+        :param cache_dir: directory of the on-disk lint result cache.
+                Files whose content and lint configuration are
+                unchanged reuse their cached messages and stats. Caching
+                is disabled if None or if `--no-cache` is in args
+        :param cache_size: maximum number of files in the cache - int
+        :param changed_since: git ref, e.g. 'origin/main'. If given,
+                only files changed since the ref are linted, along with
+                the other files of their packages when linting serially
+                (where cross-module checks see the whole package)
+        :param includes: globs of the files to lint - list like
+        :param excludes: globs of the files and directories to skip,
+                see deplytils.discovery.iter_package_files - list like
+        :param gitignore: whether to also skip what git ignores - bool
+        :param server_socket: Unix socket of a lint server (see
+                deplytils.extensions.lint_server) to lint files with,
+                falling back to linting them in process when no server
+                is listening or the server fails to lint them
+        :param profile: whether to time the linting of every file, per
+                checker and within astroid's inference. The timings are
+                set as `timings` once run, see
+                deplytils.extensions.lint_profile.summarize
+        :param profile_output: path of a JSON file the timings are
+                written to, implies profile
+        :param fail_fast: whether to stop at the first message lowering
+                the score, rather than lint every file before checking
+                the score. Messages are reported as they are produced by
+                a fail fast StreamingReporter, so reporter must be None.
+                Files are linted one at a time, as when sharded
+        :raises ValueError: both reporter and fail_fast are given
         """
         self.args = args if args else []
         if project_path is None:
@@ -33,31 +82,335 @@ class ProjectLinter(object):
         self.files = []
 
         self.exit = exit_
+        self.fail_fast = fail_fast
+        if fail_fast:
+            if reporter is not None:
+                raise ValueError('fail_fast uses its own reporter')
+            reporter = StreamingReporter(fail_fast=True,
+                                         template=TEXT_TEMPLATE)
         self.reporter = reporter
+        self.jobs = jobs
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.changed_since = changed_since
+        self.includes = includes
+        self.excludes = excludes
+        self.gitignore = gitignore
+        self.server_socket = server_socket
+        self.profile = profile or profile_output is not None
+        self.profile_output = profile_output
+        self.timings = None
+
+    @property
+    def is_sharded(self):
+        """Whether files are linted one at a time by a ShardedLinter"""
+        return (self.jobs is not None or self.cache_dir is not None or
+                self.server_socket is not None or self.profile or
+                self.fail_fast)
 
     def run(self):
         """
-        Gathers files and runs the linter
+        Gathers files and runs the linter. Nothing is linted if
+        `changed_since` is given and no file changed.
 
-        :raises AssertionError: project not 10.0
+        :raises AssertionError: project not 10.0, a LintFailure when
+                failing fast
         """
         self._walk_dir(self.project_path)
+        if self.changed_since is not None:
+            self.files = self._scope_to_changes(self.files)
+            if not self.files:
+                return
 
         if not self.rc_file:
             self.args.append('--rcfile={}'.format(self.rc_file))
+        run_class = Run
+        if self.is_sharded:
+            self.args.extend(self._sharding_args())
+            run_class = ShardedRun
+        else:
+            # only sharded runs cache, so the plain run has no such option
+            self.args = [arg for arg in self.args if arg != '--no-cache']
 
         self.args.extend(self.files)
-        lint = Run(self.args, reporter=self.reporter, exit=self.exit)
+        lint = run_class(self.args, reporter=self.reporter, exit=self.exit)
+        self.timings = getattr(lint.linter, 'timings', None)
         score = lint.linter.stats['global_note']
         assert score == 10.0, 'Imperfect score of {:0.2f}'.format(score)
 
+    def _sharding_args(self):
+        """pylint args of the ShardedLinter options that are set"""
+        options = (('jobs', self.jobs), ('cache-dir', self.cache_dir),
+                   ('cache-size', self.cache_size),
+                   ('server-socket', self.server_socket),
+                   ('profile-output', self.profile_output))
+        args = ['--{}={}'.format(name, value)
+                for name, value in options if value is not None]
+        if self.profile:
+            args.append('--profile')
+        return args
+
+    def _scope_to_changes(self, files):
+        """
+        Keep the files changed since `changed_since`. Unless sharded,
+        the other files of their packages are kept as well.
+
+        :param files: gathered files - list like
+        :return: files to lint - list
+        """
+        changed = set(os.path.realpath(path) for path in
+                      changed_files(self.changed_since, self.project_path))
+        scoped = [file_ for file_ in files
+                  if os.path.realpath(file_) in changed]
+        if not self.is_sharded:
+            packages = set(os.path.dirname(file_) for file_ in scoped)
+            scoped = [file_ for file_ in files
+                      if os.path.dirname(file_) in packages]
+        return scoped
+
     def _walk_dir(self, path):
-        """Gathers files"""
-        for root, _, files in os.walk(path):
-            if '__init__.py' not in files and root != self.project_path:
-                continue
-
-            for file_ in files:
-                is_not_processable = re.search(r'local|.*(?<!\.py)$', file_)
-                if not is_not_processable:
-                    self.files.append(os.path.join(root, file_))
+        """Gathers files, see iter_package_files"""
+        self.files.extend(iter_package_files(
+            path, self.includes, self.excludes, self.gitignore))
+
+
+class ShardedLinter(PyLinter):  # pylint: disable=too-many-ancestors
+    """
+    PyLinter that splits the files to check into shards, checked by a
+    pool of one process per job. Within a shard, files are checked one
+    at a time by a single linter, so astroid's cache stays warm. The
+    messages of every file are reported as soon as its shard is
+    checked, in the original file order, and stats of every file are
+    merged back before reports and the global note are generated.
+
+    As with pylint's own parallel mode, checkers spanning several
+    modules (e.g. duplicate-code) only ever see one module at a time.
+
+    Per-file results can also be cached on disk (see LintCache), in
+    which case only files missing from the cache are linted, and files
+    can be linted by a warm lint server (see LintServer) instead of
+    worker processes.
+
+    With --profile, linted files are timed (see FileProfiler) and the
+    summarized timings are set as `timings`.
+    """
+    shards_per_job = 4
+    sharding_options = (
+        ('cache-dir',
+         {'type': 'string', 'metavar': '<dir>', 'default': '',
+          'help': 'Directory of the lint result cache. Caching is '
+                  'disabled if empty.'}),
+        ('cache-size',
+         {'type': 'int', 'metavar': '<int>', 'default': 10000,
+          'help': 'Maximum number of files kept in the lint result '
+                  'cache.'}),
+        ('no-cache',
+         {'action': 'store_true', 'default': False,
+          'help': 'Neither read from nor write to the lint result '
+                  'cache.'}),
+        ('server-socket',
+         {'type': 'string', 'metavar': '<socket>', 'default': '',
+          'help': 'Unix socket of a lint server to lint files with. '
+                  'Files are linted in process or by worker processes '
+                  'if empty or if no server is listening.'}),
+        ('profile',
+         {'action': 'store_true', 'default': False,
+          'help': 'Time the linting of every file, per checker and within '
+                  'astroid\'s inference.'}),
+        ('profile-output',
+         {'type': 'string', 'metavar': '<file>', 'default': '',
+          'help': 'JSON file the timings are written to, if profiling.'}),
+        ('profile-top',
+         {'type': 'int', 'metavar': '<int>', 'default': 10,
+          'help': 'Number of the slowest files and checkers reported, if '
+                  'profiling.'}),
+    )
+
+    def __init__(self, options=(), **kwargs):
+        super(ShardedLinter, self).__init__(
+            options + self.sharding_options, **kwargs)
+        self.timings = None
+
+    def check(self, files_or_modules):
+        """
+        Check the files in shards, reporting the messages of every file
+        as soon as its results are available: cached files first, then
+        linted files in their original order
+
+        :param files_or_modules: files or modules to lint - list like
+        """
+        self.open()
+        paths = [descr['path'] for descr in self.expand_files(files_or_modules)
+                 if self.should_analyze_file(
+                     descr['name'], descr['path'], is_argument=descr['isarg'])]
+        config = self._get_jobs_config()
+        cache = LintCache(config, None if self.config.no_cache
+                          else self.config.cache_dir, self.config.cache_size)
+
+        cached = cache.lookup(paths)
+        results = [cached[path] for path in paths if path in cached]
+        for result in results:
+            self._report(result)
+        linted = self._lint_files(
+            config, [path for path in paths if path not in cached])
+        try:
+            for result in linted:
+                cache.save(result)
+                self._report(result)
+                results.append(result)
+        finally:
+            linted.close()
+        cache.prune()
+        self._merge_file_stats([result[4] for result in results])
+        if self.config.profile:
+            self._summarize_timings(results)
+
+    def _lint_files(self, config, paths):
+        """
+        Lint files with the lint server, if one is listening and lints
+        them, or else with worker processes. Files are linted in process
+        when there is a single job or file.
+
+        :param config: jobs config of the linter - dict like
+        :param paths: paths of the files to lint - list like
+        :return: generator of `lint_file` results, in the order of paths
+        """
+        results = None
+        if self.config.server_socket and paths:
+            try:
+                results = request_lint(self.config.server_socket, config,
+                                       paths, self.config.profile)
+            except (EnvironmentError, RuntimeError):
+                pass
+
+        jobs = min(self.config.jobs, len(paths))
+        if results is None:
+            results = (self._lint_in_pool(config, paths, jobs) if jobs > 1
+                       else iter_lint(config, paths, self.config.profile))
+        for result in results:
+            yield result
+
+    def _lint_in_pool(self, config, paths, jobs):
+        """
+        Lint files with worker processes, in consecutive shards of a few
+        per job so results stream back in order while the workers stay
+        busy. The workers are terminated once done or closed early.
+
+        :param config: jobs config of the linter - dict like
+        :param paths: paths of the files to lint - list like
+        :param jobs: number of worker processes - int
+        :return: generator of `lint_file` results, in the order of paths
+        """
+        size = -(-len(paths) // (jobs * self.shards_per_job))
+        tasks = [(config, paths[index:index + size], self.config.profile)
+                 for index in range(0, len(paths), size)]
+        pool = multiprocessing.Pool(jobs)
+        try:
+            for shard_results in pool.imap(lint_shard, tasks):
+                for result in shard_results:
+                    yield result
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _report(self, result):
+        """
+        Report the messages of a file, much like pylint's parallel check
+        does
+
+        :param result: result of `lint_file`
+        """
+        _, base_name, module, messages, _, msg_status, _ = result
+        self.file_state.base_name = base_name
+        self.set_current_module(module)
+        for message in messages:
+            self.reporter.handle_message(Message(*message))
+        self.msg_status |= msg_status
+
+    def _merge_file_stats(self, all_stats):
+        """
+        Merge the stats of every file, much like pylint's parallel check
+        does
+
+        :param all_stats: stats of every file - list like
+        """
+        self.stats = _merge_stats([self.stats] + all_stats)
+        for checker in self.get_checkers():
+            if checker is not self:
+                checker.stats = self.stats
+
+    def _summarize_timings(self, results):
+        """
+        Summarize the timings of the linted files, writing them out if
+        an output file is configured
+
+        :param results: results of `lint_file` - list like
+        """
+        self.timings = summarize(
+            [(result[0], result[6]) for result in results],
+            self.config.profile_top)
+        if self.config.profile_output:
+            write_summary(self.timings, self.config.profile_output)
+
+
+class LintCache(object):
+    """
+    Lint results of single files, keyed by the content and path of the
+    file along with the linter configuration (the resolved rcfile and
+    args) and the pylint, astroid and python versions.
+
+    Note that a file's result is reused even if a module it imports has
+    changed, which may hide messages relying on inference across
+    modules. Timings are not cached.
+    """
+    def __init__(self, config, directory=None, max_entries=10000):
+        """
+        :param config: jobs config of the linter - dict like
+        :param directory: directory of the cache. If None, nothing is
+                cached
+        :param max_entries: maximum number of cached files - int
+        """
+        self.store = None
+        if directory:
+            self.store = ResultCache(directory, max_entries)
+        self.config_key = config_key(config)
+        self.keys = {}
+
+    def lookup(self, paths):
+        """
+        Get the cached results of files
+
+        :param paths: paths of the files - list like
+        :return: dict of path to `lint_file` result of cache hits
+        """
+        if self.store is None:
+            return {}
+
+        results = {}
+        for path in paths:
+            with open(path, 'rb') as file_:
+                self.keys[path] = hash_key(self.config_key, path, file_.read())
+            result = self.store.get(self.keys[path])
+            if result is not None:
+                results[path] = load_result(result)
+        return results
+
+    def save(self, result):
+        """
+        Cache the result of a file looked up earlier
+
+        :param result: `lint_file` result
+        """
+        if self.store is not None:
+            self.store.set(self.keys[result[0]],
+                           dump_result(result[:6] + (None,)))
+
+    def prune(self):
+        """Evict the least recently used results beyond the size bound"""
+        if self.store is not None:
+            self.store.prune()
+
+
+class ShardedRun(Run):
+    """pylint's Run, checking with a ShardedLinter"""
+    LinterClass = ShardedLinter
@@ -0,0 +1,158 @@
+"""
+Timing of the linting of single files: wall time per file, per checker
+and within astroid's inference
+"""
+import functools
+import json
+from timeit import default_timer
+
+from astroid.node_classes import NodeNG
+
+CHECKER_METHOD_PREFIXES = ('visit_', 'leave_', 'process_module',
+                           'process_tokens')
+
+
+# pylint: disable=unused-variable
+class FileProfiler(object):
+    """
+    Context timing a linter while it checks a file. Checker callbacks
+    are wrapped for the duration of the context and astroid's inference
+    is timed by its outermost calls, so inference done on behalf of a
+    checker is counted both for the checker and for inference.
+    """
+    def __init__(self, linter):
+        """
+        :param linter: PyLinter about to check a single file
+        """
+        self.linter = linter
+        self.checkers = {}
+        self.inference = _Stopwatch()
+        self.time = 0.0
+        self._wrapped = []
+        self._infer = None
+        self._start = None
+
+    def __enter__(self):
+        for checker in self.linter.get_checkers():
+            for name in dir(checker):
+                if name.startswith(CHECKER_METHOD_PREFIXES):
+                    setattr(checker, name, self._timed(
+                        checker.name, getattr(checker, name)))
+                    self._wrapped.append((checker, name))
+
+        self._infer = NodeNG.infer
+        NodeNG.infer = self._timed_infer(self._infer)
+        self._start = default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.time = default_timer() - self._start
+        NodeNG.infer = self._infer
+        for checker, name in self._wrapped:
+            delattr(checker, name)
+        del self._wrapped[:]
+
+    def result(self):
+        """
+        :return: JSON serializable timings of the file, in seconds -
+                dict of its 'time', 'inference' and 'checkers' times
+        """
+        return {'time': self.time, 'inference': self.inference.elapsed,
+                'checkers': dict(self.checkers)}
+
+    def _timed(self, checker_name, method):
+        """Wrap a checker callback, keeping its checked messages"""
+        self.checkers.setdefault(checker_name, 0.0)
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            """Checker callback adding its time to its checker's"""
+            start = default_timer()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.checkers[checker_name] += default_timer() - start
+        return timed
+
+    def _timed_infer(self, infer):
+        """Wrap NodeNG.infer, timing the inferred values as produced"""
+        stopwatch = self.inference
+
+        @functools.wraps(infer)
+        def timed_infer(node, context=None, **kwargs):
+            """NodeNG.infer adding its time to the inference time"""
+            return stopwatch.iterate(
+                stopwatch.time(infer, node, context, **kwargs))
+        return timed_infer
+
+
+class _Stopwatch(object):
+    """Accumulates the time of calls, not counting nested calls twice"""
+    def __init__(self):
+        self.elapsed = 0.0
+        self.depth = 0
+
+    def time(self, function, *args, **kwargs):
+        """Call a function, timing it unless nested in a timed call"""
+        self.depth += 1
+        start = default_timer()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.depth -= 1
+            if not self.depth:
+                self.elapsed += default_timer() - start
+
+    def iterate(self, iterator):
+        """Iterate, timing the production of every value"""
+        while True:
+            try:
+                value = self.time(next, iterator)
+            except StopIteration:
+                return
+            yield value
+
+
+def summarize(profiles, top=10):
+    """
+    Aggregate the timings of several files
+
+    :param profiles: list like of tuples of the path and timings of each
+            file, timings being None for files that were not linted
+            (i.e. whose results were cached)
+    :param top: number of entries of the slowest files and checkers
+            reports - int
+    :return: JSON serializable dict of the total 'time' and 'inference'
+            time, the time of every checker, the timings of every
+            linted 'files', the number of 'cached' files and the
+            'slowest_files' and 'slowest_checkers' as lists of name and
+            time pairs
+    """
+    files = dict((path, timings) for path, timings in profiles if timings)
+    checkers = {}
+    for timings in files.values():
+        for name, elapsed in timings['checkers'].items():
+            checkers[name] = checkers.get(name, 0.0) + elapsed
+
+    return {
+        'time': sum(timings['time'] for timings in files.values()),
+        'inference': sum(timings['inference'] for timings in files.values()),
+        'checkers': checkers,
+        'files': files,
+        'cached': len(profiles) - len(files),
+        'slowest_files': _slowest(
+            (path, timings['time']) for path, timings in files.items())[:top],
+        'slowest_checkers': _slowest(checkers.items())[:top],
+    }
+
+
+def write_summary(summary, path):
+    """Write a summary of timings as JSON"""
+    with open(path, 'w') as file_:
+        json.dump(summary, file_, indent=2, sort_keys=True)
+
+
+def _slowest(timings):
+    """Sort name and time pairs, slowest first"""
+    return sorted(([name, elapsed] for name, elapsed in timings),
+                  key=lambda timing: (-timing[1], timing[0]))
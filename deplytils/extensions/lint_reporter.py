@@ -0,0 +1,75 @@
+"""Reporting of lint messages as they are produced"""
+import json
+
+from pylint.interfaces import IReporter
+from pylint.reporters import BaseReporter
+from pylint.reporters.ureports.text_writer import TextWriter
+
+SCORING_CATEGORIES = frozenset(('convention', 'refactor', 'warning', 'error'))
+TEXT_TEMPLATE = '{path}:{line}:{column}: {msg_id}: {msg} ({symbol})'
+
+
+# pylint: disable=unused-variable
+class LintFailure(AssertionError):
+    """The first message lowering the score of a fail fast lint"""
+    def __init__(self, message):
+        """
+        :param message: pylint Message
+        """
+        super(LintFailure, self).__init__(message.format(TEXT_TEMPLATE))
+        self.lint_message = message
+
+
+class StreamingReporter(BaseReporter):
+    """
+    Writes every message as soon as it is produced, either as a JSON line
+    or formatted with a template, flushing the output so that progress
+    shows in CI logs. Reports, like the score, are only displayed when
+    formatting with a template.
+
+    Failing fast, it raises a LintFailure on the first message that
+    lowers the score (a convention, refactor, warning or error message),
+    which stops the lint without checking the remaining files.
+    """
+    __implements__ = IReporter
+    name = 'streaming'
+
+    def __init__(self, output=None, fail_fast=False, template=None):
+        """
+        :param output: stream written to, defaults to sys.stdout
+        :param fail_fast: whether to raise on the first message that
+                lowers the score - bool
+        :param template: message template, e.g. TEXT_TEMPLATE, messages
+                being written as JSON lines if None
+        """
+        super(StreamingReporter, self).__init__(output)
+        self.fail_fast = fail_fast
+        self.template = template
+
+    def handle_message(self, msg):
+        """
+        Write a message, then fail if failing fast and it lowers the score
+
+        :param msg: pylint Message
+        :raises LintFailure: failing fast and the message lowers the
+                score
+        """
+        self.writeln(self._format(msg))
+        self.out.flush()
+        if self.fail_fast and msg.category in SCORING_CATEGORIES:
+            raise LintFailure(msg)
+
+    def _format(self, msg):
+        """Format a message as a line"""
+        if self.template is not None:
+            return msg.format(self.template)
+        return json.dumps({
+            'type': msg.category, 'module': msg.module, 'obj': msg.obj,
+            'line': msg.line, 'column': msg.column, 'path': msg.path,
+            'symbol': msg.symbol, 'message': msg.msg,
+            'message-id': msg.msg_id}, sort_keys=True)
+
+    def _display(self, layout):
+        """Display reports when formatting with a template"""
+        if self.template is not None:
+            TextWriter().format(layout, self.out)
@@ -0,0 +1,257 @@
+"""
+Long-lived local lint server. It keeps pylint's linters and astroid's
+module cache warm between runs, so linting again after an edit only
+pays for the modules whose files changed. Start it with
+`python -m deplytils.extensions.lint_server [socket]` and pass the same
+socket to `ProjectLinter(server_socket=...)`. Unix only.
+"""
+import argparse
+import errno
+import getpass
+import json
+import os
+import socket
+import tempfile
+import threading
+import traceback
+
+from astroid import MANAGER
+from pylint.lint import fix_import_path
+
+from deplytils.extensions.lint_worker import (build_linter, config_key,
+                                              dump_result, lint_file,
+                                              load_result)
+
+DEFAULT_SOCKET = os.path.join(
+    tempfile.gettempdir(), 'deplytils-lint-{}.sock'.format(getpass.getuser()))
+
+
+# pylint: disable=unused-variable
+class LintServer(object):
+    """
+    Serves lint requests on a Unix socket, one at a time. A linter is
+    built once per configuration and astroid's cached modules are only
+    dropped once their files change.
+    """
+    def __init__(self, socket_path=DEFAULT_SOCKET):
+        """
+        :param socket_path: path of the Unix socket to listen on. A
+                stale socket file is replaced, but not one a server
+                still listens on
+        """
+        self.socket_path = socket_path
+        self.linters = {}
+        self.mtimes = {}
+        self.running = False
+        self.listening = threading.Event()
+
+    def serve_forever(self):
+        """
+        Serve requests until a stop request is received
+
+        :raises EnvironmentError: a server already listens on the socket
+        """
+        listener = self._listen()
+        self.running = True
+        self.listening.set()
+        try:
+            while self.running:
+                connection, _ = listener.accept()
+                try:
+                    _send(connection, self._respond(connection))
+                finally:
+                    connection.close()
+        finally:
+            self.listening.clear()
+            listener.close()
+            os.remove(self.socket_path)
+
+    def _listen(self):
+        """Listen on the socket, only accessible to the current user"""
+        if os.path.exists(self.socket_path):
+            if _is_listening(self.socket_path):
+                raise EnvironmentError(
+                    errno.EADDRINUSE, 'A lint server already listens on',
+                    self.socket_path)
+            os.remove(self.socket_path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(umask)
+        listener.listen(1)
+        return listener
+
+    def handle(self, message):
+        """
+        Handle a request, reporting any error back to the client
+
+        :param message: dict with a 'stop', 'ping' or 'lint' command,
+                the latter along with the client's cwd, linter config
+                and file paths
+        :return: response - dict
+        """
+        handlers = {'lint': self._handle_lint, 'ping': _handle_ping,
+                    'stop': self._handle_stop}
+        try:
+            response = handlers[message['command']](message)
+        except Exception:  # pylint: disable=broad-except
+            response = {'error': traceback.format_exc()}
+        return response
+
+    def _handle_lint(self, message):
+        """Lint the files of a request"""
+        results = self.lint(message['cwd'], message['config'],
+                            message['paths'], message.get('profile', False))
+        return {'results': [dump_result(result) for result in results]}
+
+    def _handle_stop(self, _):
+        """Stop serving once the request is answered"""
+        self.running = False
+        return {}
+
+    def _respond(self, connection):
+        """
+        Response to the request received on a connection, reporting a
+        malformed request back to the client
+        """
+        try:
+            message = _receive(connection)
+        except ValueError:
+            return {'error': traceback.format_exc()}
+        return self.handle(message)
+
+    def lint(self, cwd, config, paths, profile=False):
+        """
+        Lint files as a ShardedLinter's worker would, with a warm cache
+
+        :param cwd: working directory of the client
+        :param config: jobs config of the client's linter - dict like
+        :param paths: paths of the files to lint - list like
+        :param profile: whether to time the files - bool
+        :return: list of `lint_file` results
+        """
+        key = config_key(config)
+        if key not in self.linters:
+            self.linters[key] = build_linter(config)
+
+        self._invalidate_changed_modules()
+        os.chdir(cwd)
+        with fix_import_path(paths):
+            results = [lint_file(self.linters[key], path, profile)
+                       for path in paths]
+        self._record_module_mtimes()
+        return results
+
+    def _invalidate_changed_modules(self):
+        """Drop cached modules whose files changed since they were cached"""
+        for name, module in list(MANAGER.astroid_cache.items()):
+            if name in self.mtimes and _mtime(module) != self.mtimes[name]:
+                del MANAGER.astroid_cache[name]
+                del self.mtimes[name]
+
+    def _record_module_mtimes(self):
+        """Remember when the files of newly cached modules changed"""
+        for name, module in MANAGER.astroid_cache.items():
+            self.mtimes.setdefault(name, _mtime(module))
+
+
+def request_lint(socket_path, config, paths, profile=False):
+    """
+    Lint files with a running lint server
+
+    :param socket_path: path of the server's Unix socket
+    :param config: jobs config of the linter - dict like
+    :param paths: paths of the files to lint - list like
+    :param profile: whether to time the files - bool
+    :return: list of `lint_file` results
+    :raises EnvironmentError: no server is listening on the socket
+    :raises RuntimeError: the server failed to lint the files
+    """
+    response = request(socket_path, {
+        'command': 'lint', 'cwd': os.getcwd(), 'config': config,
+        'paths': paths, 'profile': profile})
+    if 'error' in response:
+        raise RuntimeError('Lint server error:\n{}'.format(response['error']))
+    return [load_result(result) for result in response['results']]
+
+
+def request(socket_path, message):
+    """
+    Send a request to a lint server and wait for its response
+
+    :param socket_path: path of the server's Unix socket
+    :param message: JSON serializable request - dict
+    :return: response - dict
+    :raises EnvironmentError: no server is listening on the socket
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+        _send(client, message)
+        return _receive(client)
+    finally:
+        client.close()
+
+
+def main(argv=None):
+    """
+    Start a lint server, or stop a running one
+
+    :param argv: command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m deplytils.extensions.lint_server')
+    parser.add_argument('socket', nargs='?', default=DEFAULT_SOCKET,
+                        help='path of the Unix socket')
+    parser.add_argument('--stop', action='store_true',
+                        help='stop the server listening on the socket')
+    args = parser.parse_args(argv)
+
+    if args.stop:
+        request(args.socket, {'command': 'stop'})
+    else:
+        LintServer(args.socket).serve_forever()
+
+
+def _is_listening(socket_path):
+    """Whether a server still answers on a Unix socket"""
+    try:
+        request(socket_path, {'command': 'ping'})
+    except EnvironmentError:
+        return False
+    return True
+
+
+def _handle_ping(_):
+    """Answer that the server is listening"""
+    return {}
+
+
+def _mtime(module):
+    """Modification time of a module's file, None if it has none"""
+    try:
+        return os.path.getmtime(module.file)
+    except (TypeError, EnvironmentError):
+        return None
+
+
+def _send(connection, message):
+    """Send a whole JSON message, then shut down writing"""
+    connection.sendall(json.dumps(message, default=sorted).encode('utf-8'))
+    connection.shutdown(socket.SHUT_WR)
+
+
+def _receive(connection):
+    """Receive a whole JSON message, sent until writing shut down"""
+    chunks = []
+    chunk = connection.recv(65536)
+    while chunk:
+        chunks.append(chunk)
+        chunk = connection.recv(65536)
+    return json.loads(b''.join(chunks).decode('utf-8'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Linting of single files with a reused, pre-configured linter. Shared by
+ShardedLinter's worker processes and the lint server.
+"""
+import json
+import sys
+
+from astroid import __version__ as astroid_version
+from pylint import reporters
+from pylint.__pkginfo__ import version as pylint_version
+from pylint.interfaces import Confidence
+from pylint.lint import PyLinter
+
+from deplytils.cache import hash_key
+from deplytils.extensions.lint_profile import FileProfiler
+
+
+# pylint: disable=unused-variable
+def config_key(config):
+    """
+    Key of a linter configuration, including the pylint, astroid and
+    python versions but not the number of jobs
+
+    :param config: jobs config of a linter - dict like
+    :return: hex digest - str
+    """
+    config = dict(config)
+    config.pop('jobs', None)
+    return hash_key(json.dumps(config, sort_keys=True, default=sorted),
+                    pylint_version, astroid_version, sys.version)
+
+
+def build_linter(config):
+    """
+    Build a linter out of the jobs config of another linter, much like
+    pylint's child linters
+
+    :param config: jobs config of the parent linter - dict like
+    :return: PyLinter
+    """
+    config = dict(config, jobs=1)
+    python3_porting_mode = config.pop('python3_porting_mode', None)
+
+    linter = PyLinter()
+    linter.load_default_plugins()
+    linter.load_plugin_modules(config.pop('plugins', ()))
+    linter.load_configuration_from_config(config)
+    if python3_porting_mode:
+        linter.python3_porting_mode()
+    return linter
+
+
+def lint_shard(task):
+    """
+    Lint each file of a shard with a single, reused linter. Module
+    level so it can be sent to worker processes.
+
+    :param task: tuple of the parent linter's jobs config, the file
+            paths of the shard and whether to time the files
+    :return: list of `lint_file` results
+    """
+    return list(iter_lint(*task))
+
+
+def iter_lint(config, paths, profile=False):
+    """
+    Lazily lint files one at a time with a single linter
+
+    :param config: jobs config of the parent linter - dict like
+    :param paths: paths of the files to lint - list like
+    :param profile: whether to time the files - bool
+    :return: generator of `lint_file` results
+    """
+    linter = build_linter(config)
+    for path in paths:
+        yield lint_file(linter, path, profile)
+
+
+def lint_file(linter, path, profile=False):
+    """
+    Lint a single file, collecting its messages and stats
+
+    :param linter: configured PyLinter
+    :param path: path of the file to lint
+    :param profile: whether to time the file, see FileProfiler - bool
+    :return: tuple of path, base name, module name, message args,
+            stats, message status and timings, None unless profiled
+    """
+    linter.set_reporter(reporters.CollectingReporter())
+    linter.msg_status = 0
+    timings = None
+    if profile:
+        with FileProfiler(linter) as profiler:
+            linter.check(path)
+        timings = profiler.result()
+    else:
+        linter.check(path)
+    messages = [(message.msg_id, message.symbol,
+                 (message.abspath, message.path, message.module,
+                  message.obj, message.line, message.column),
+                 message.msg, message.confidence)
+                for message in linter.reporter.messages]
+    return (path, linter.file_state.base_name, linter.current_name,
+            messages, linter.stats, linter.msg_status, timings)
+
+
+def dump_result(result):
+    """JSON serializable representation of a `lint_file` result"""
+    path, base_name, module, messages, stats, msg_status, timings = result
+    stats = dict(stats, dependencies=dict(
+        (name, sorted(importers))
+        for name, importers in stats.get('dependencies', {}).items()))
+    return (path, base_name, module, messages, stats, msg_status, timings)
+
+
+def load_result(result):
+    """Rebuild a `lint_file` result from its JSON representation"""
+    path, base_name, module, messages, stats, msg_status, timings = result
+    messages = [(msg_id, symbol, tuple(location), msg,
+                 Confidence(*confidence))
+                for msg_id, symbol, location, msg, confidence in messages]
+    stats['dependencies'] = dict(
+        (name, set(importers))
+        for name, importers in stats['dependencies'].items())
+    return (path, base_name, module, messages, stats, msg_status, timings)
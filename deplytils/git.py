@@ -0,0 +1,114 @@
+"""Helpers for querying git repositories"""
+import os
+import re
+import subprocess
+
+_HUNK = re.compile(r'^@@ -\S+ \+(\d+)(?:,(\d+))? @@')
+
+
+# pylint: disable=unused-variable
+def changed_files(ref, path=os.curdir):
+    """
+    Gets the files changed since a git ref, much like a pull request
+    diff: files added, copied, modified or renamed since the merge base
+    of `ref` and HEAD, including uncommitted and untracked files.
+    Deleted files are left out. Only the local repository is queried,
+    so remote refs are as fresh as the last fetch.
+
+    :param ref: git ref to compare against, e.g. 'origin/main'
+    :param path: absolute or relative path inside the repository
+    :return: absolute paths of the changed files - set
+    :raises subprocess.CalledProcessError: not a repository or unknown
+            ref
+    """
+    root, base = _merge_base(ref, path)
+    names = _git(path, 'diff', '--name-only', '--diff-filter=ACMR',
+                 base).splitlines()
+    names += _untracked(path)
+    return set(os.path.join(root, name) for name in names)
+
+
+def changed_lines(ref, path=os.curdir):
+    """
+    Gets the lines of the files changed since a git ref, see
+    `changed_files`. Every line of an untracked file is changed, while
+    files whose content is unchanged (e.g. renamed files) are left out.
+
+    :param ref: git ref to compare against, e.g. 'origin/main'
+    :param path: absolute or relative path inside the repository
+    :return: dict of the absolute path of every changed file to its
+            changed line numbers - set
+    :raises subprocess.CalledProcessError: not a repository or unknown
+            ref
+    """
+    root, base = _merge_base(ref, path)
+    diff = _git(path, 'diff', '--unified=0', '--diff-filter=ACMR', '-M',
+                '--no-color', '--no-ext-diff', '--src-prefix=a/',
+                '--dst-prefix=b/', base)
+    lines = _diff_lines(root, diff)
+    for name in _untracked(path):
+        lines[os.path.join(root, name)] = _all_lines(os.path.join(root, name))
+    return lines
+
+
+def ignored_files(path=os.curdir):
+    """
+    Gets the untracked files and directories git ignores below a path.
+    Ignored directories are not descended into.
+
+    :param path: absolute or relative path of a directory
+    :return: absolute paths, empty if path is not in a repository or
+            git is not installed - set
+    """
+    try:
+        with open(os.devnull, 'w') as devnull:
+            output = _git(path, 'ls-files', '--others', '--ignored',
+                          '--exclude-standard', '--directory', '-z',
+                          stderr=devnull)
+    except (EnvironmentError, subprocess.CalledProcessError):
+        return set()
+    return set(os.path.normpath(os.path.join(os.path.abspath(path), name))
+               for name in output.split('\0') if name)
+
+
+def _merge_base(ref, path):
+    """Root of the repository and merge base of ref and HEAD"""
+    root = _git(path, 'rev-parse', '--show-toplevel').strip()
+    return root, _git(path, 'merge-base', ref, 'HEAD').strip()
+
+
+def _untracked(path):
+    """Paths of the untracked files, relative to the repository"""
+    return _git(path, 'ls-files', '--others', '--exclude-standard',
+                '--full-name').splitlines()
+
+
+def _diff_lines(root, diff):
+    """Changed line numbers of every file of a zero context diff"""
+    lines = {}
+    file_lines = previous = None
+    for line in diff.splitlines():
+        hunk = _HUNK.match(line)
+        if line.startswith('+++ b/') and previous.startswith('--- '):
+            file_lines = lines.setdefault(os.path.join(root, line[6:]), set())
+        elif hunk:
+            start, count = hunk.groups()
+            file_lines.update(range(int(start), int(start) + int(count or 1)))
+        previous = line
+    return lines
+
+
+def _all_lines(path):
+    """Line numbers of every line of a file - set"""
+    with open(path, 'rb') as file_:
+        return set(range(1, 1 + sum(1 for _ in file_)))
+
+
+def _git(path, *args, **kwargs):
+    """
+    Run a git command in path and return its output. Paths are printed
+    as is, not quoted and escaped when they have non-ASCII characters.
+    """
+    return subprocess.check_output(
+        ('git', '-c', 'core.quotePath=false') + args, cwd=path,
+        universal_newlines=True, **kwargs)
@@ -0,0 +1,275 @@
+"""
+Test impact selection. The source files every test executes are
+recorded in a local index, so that later runs only run the tests whose
+files changed, e.g. since a git ref or as seen by a file watcher.
+"""
+from __future__ import print_function  # pylint: disable=unused-variable
+
+import functools
+import inspect
+import json
+import os
+import sys
+import unittest
+
+from coverage import Coverage
+
+from deplytils.cache import hash_key
+from deplytils.contexts.coverage import CoverageContext
+from deplytils.git import changed_files
+from deplytils.sharding import iter_tests, shared_coverage_context
+
+
+# pylint: disable=unused-variable
+class ImpactIndex(object):
+    """
+    Source files executed by every test, along with the digests of
+    their content when recorded. Files are stored relative to the index,
+    as indexes into a single list of files, so the index stays compact.
+    """
+    def __init__(self, path, key=''):
+        """
+        :param path: JSON file of the index - str
+        :param key: what the recorded files depend on besides tests and
+                sources, e.g. the python version - str
+        """
+        self.path = os.path.abspath(path)
+        self.key = key
+        self.files = {}
+        self.tests = {}
+
+    @classmethod
+    def load(cls, path, key=''):
+        """
+        Read an index, empty if missing, unreadable or recorded with
+        another key
+
+        :param path: JSON file of the index - str
+        :param key: see init
+        :return: ImpactIndex
+        """
+        index = cls(path, key)
+        try:
+            with open(index.path) as file_:
+                stored = json.load(file_)
+        except (EnvironmentError, ValueError):
+            return index
+        if stored['key'] == key:
+            files = []
+            for name, digest in stored['files']:
+                files.append(_absolute(index.path, name))
+                index.files[files[-1]] = digest
+            for test_id, indexes in stored['tests'].items():
+                index.tests[test_id] = set(files[i] for i in indexes)
+        return index
+
+    def save(self):
+        """Write the index, leaving out files no test executes"""
+        files = sorted(set().union(*self.tests.values()))
+        positions = dict((path, i) for i, path in enumerate(files))
+        stored = {
+            'key': self.key,
+            'files': [[os.path.relpath(path, os.path.dirname(self.path)),
+                       self.files[path]] for path in files],
+            'tests': dict((test_id, sorted(positions[path] for path in paths))
+                          for test_id, paths in self.tests.items())}
+        with open(self.path, 'w') as file_:
+            json.dump(stored, file_, sort_keys=True)
+
+    def record(self, test_id, files):
+        """
+        Record the files a test executed, digesting their current
+        content
+
+        :param test_id: id of the test - str
+        :param files: paths of the files - list like
+        """
+        paths = set(os.path.realpath(path) for path in files)
+        for path in paths:
+            self.files[path] = _digest(path)
+        self.tests[test_id] = paths
+
+    def forget(self, test_ids):
+        """
+        Remove tests, e.g. failed or deleted ones, so they are selected
+        until recorded again
+
+        :param test_ids: ids of the tests - list like
+        """
+        for test_id in test_ids:
+            self.tests.pop(test_id, None)
+
+    def stale_files(self, changed):
+        """
+        Files whose content differs from when they were recorded,
+        besides the changed files
+
+        :param changed: absolute paths of the changed files - set
+        :return: sorted absolute paths
+        """
+        return sorted(path for path, digest in self.files.items()
+                      if path not in changed and _digest(path) != digest)
+
+    def select(self, tests, changed):
+        """
+        Select the tests impacted by changed files, i.e. tests never
+        recorded and tests that executed a changed file. Every test is
+        selected if the index is empty or stale, or if a changed file
+        was never executed by a test, as are the files that are not
+        python, e.g. data or configuration tests may read.
+
+        :param tests: tests to select from - list like
+        :param changed: paths of the changed files - list like
+        :return: selected tests and, if every test is selected, why -
+                tuple of list and str or None
+        """
+        changed = set(os.path.realpath(path) for path in changed)
+        unseen = sorted(changed.difference(self.files))
+        reason = None
+        if not self.tests:
+            reason = 'no impact is recorded'
+        elif self.stale_files(changed):
+            reason = 'the impact index is stale'
+        elif unseen:
+            reason = '{} was never executed by a test'.format(unseen[0])
+        if reason is not None:
+            return list(tests), reason
+        return [test for test in tests if test.id() not in self.tests or
+                self.tests[test.id()] & changed], None
+
+
+class ImpactTestRunner(object):
+    """
+    Discovers tests and runs those impacted by changed files, recording
+    the files every test executes into an ImpactIndex. Without changed
+    files, every test is run, rebuilding the index.
+
+    Every test is measured by a CoverageContext sharing the tracer of
+    the CoverageContext the runner measures with, itself sharing any
+    outer tracer, so the files of a test are those measured by the
+    outermost Coverage, narrowed by coverage_kwargs. The module of a
+    test is always among its files, even if not measured.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, start_dir, pattern='test*.py', top_level_dir=None,
+                 index_path='.test_impact.json', changed_since=None,
+                 changed=None, coverage_kwargs=None, stream=None):
+        """
+        :param start_dir: directory to discover tests in - str
+        :param pattern: pattern of the test modules - str
+        :param top_level_dir: top level directory of the project, see
+                `unittest.TestLoader.discover`
+        :param index_path: JSON file of the index - str
+        :param changed_since: git ref, e.g. 'origin/main', whose changed
+                files select the tests to run, see `changed_files`
+        :param changed: paths of the changed files, added to those
+                changed since the ref, if any - list like
+        :param coverage_kwargs: kwargs for the Coverage constructor -
+                dict
+        :param stream: file the results are written to, defaults to
+                stderr
+        """
+        self.start_dir = start_dir
+        self.pattern = pattern
+        self.top_level_dir = top_level_dir
+        self.index_path = index_path
+        self.changed_since = changed_since
+        self.changed = changed
+        self.coverage_kwargs = coverage_kwargs or {}
+        self.stream = stream or sys.stderr
+        self.index = None
+
+    def run(self):
+        """
+        Run the impacted tests, then save the index
+
+        :return: unittest.TestResult
+        """
+        key = hash_key(sys.version, json.dumps(self.coverage_kwargs,
+                                               sort_keys=True))
+        self.index = ImpactIndex.load(self.index_path, key)
+        with shared_coverage_context(self.coverage_kwargs) as context:
+            assert isinstance(context.coverage, Coverage), (
+                'Impact is only recorded within a real Coverage')
+            tests = list(iter_tests(unittest.defaultTestLoader.discover(
+                self.start_dir, self.pattern, self.top_level_dir)))
+            selected = self._select(tests)
+            runner = unittest.TextTestRunner(
+                self.stream, resultclass=functools.partial(
+                    _RecordingResult, self.index, self.coverage_kwargs))
+            result = runner.run(unittest.TestSuite(selected))
+        ids = set(test.id() for test in tests)
+        self.index.forget([test_id for test_id in list(self.index.tests)
+                           if test_id not in ids])
+        self.index.save()
+        return result
+
+    def _select(self, tests):
+        """Select the tests to run, printing how many and why"""
+        changed = self._changed_files()
+        if changed is None:
+            selected, reason = tests, 'no change is given'
+        else:
+            selected, reason = self.index.select(tests, changed)
+        if reason is None:
+            print('Running {} of {} tests, impacted by {} changed files'
+                  .format(len(selected), len(tests), len(changed)),
+                  file=self.stream)
+        else:
+            print('Running all {} tests, as {}'.format(len(tests), reason),
+                  file=self.stream)
+        return selected
+
+    def _changed_files(self):
+        """Changed files, None if neither a ref nor files are given"""
+        if self.changed_since is None and self.changed is None:
+            return None
+        changed = set(self.changed or ())
+        if self.changed_since is not None:
+            changed.update(changed_files(self.changed_since, self.start_dir))
+        return changed
+
+
+class _RecordingResult(unittest.TextTestResult):
+    """
+    TextTestResult recording the files of every successful test into
+    an index, and forgetting unsuccessful ones
+    """
+    def __init__(self, index, coverage_kwargs, *args, **kwargs):
+        super(_RecordingResult, self).__init__(*args, **kwargs)
+        self.index = index
+        self.coverage_kwargs = coverage_kwargs
+        self._context = None
+
+    def startTest(self, test):
+        self._context = CoverageContext(
+            report=False, share_outer=True,
+            coverage_kwargs=self.coverage_kwargs).__enter__()
+        super(_RecordingResult, self).startTest(test)
+
+    def stopTest(self, test):
+        super(_RecordingResult, self).stopTest(test)
+        self._context.__exit__(None, None, None)
+        failed = [failed for failed, _ in self.failures + self.errors] + list(
+            self.unexpectedSuccesses)
+        if test in failed:
+            self.index.forget([test.id()])
+        else:
+            files = set(self._context.coverage.get_data().measured_files())
+            files.add(inspect.getsourcefile(type(test)))
+            files.discard(None)
+            self.index.record(test.id(), files)
+
+
+def _absolute(index_path, name):
+    """Absolute path of a file stored relative to an index"""
+    return os.path.realpath(os.path.join(os.path.dirname(index_path), name))
+
+
+def _digest(path):
+    """Digest of the content of a file, None if it can't be read"""
+    try:
+        with open(path, 'rb') as file_:
+            return hash_key(file_.read())
+    except EnvironmentError:
+        return None
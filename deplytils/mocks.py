@@ -1,5 +1,4 @@
 """File for Mock objects -- primarily used for testing purposes"""
-from coverage import CoverageException
 
 
 class MockCoverage(object):  # pylint: disable=unused-variable
@@ -31,6 +30,9 @@ class MockCoverage(object):  # pylint: disable=unused-variable
     def report(self, *_, **__):
         """Pretend to report"""
         if self.report_value is None:
+            # imported here, so that importing the mock doesn't import
+            # coverage
+            from coverage import CoverageException
             raise CoverageException("No data to report.")
         return self.report_value
 
@@ -0,0 +1,362 @@
+"""
+Pipelines of verification steps, e.g. linting, test groups and the
+combination of their coverage. Steps are commands run in subprocesses as
+soon as the steps they require succeed, independent steps running
+concurrently, so a pipeline takes as long as its longest chain of steps.
+Successful steps can be cached, to be replayed while their inputs are
+unchanged, restoring the files they wrote.
+"""
+from __future__ import print_function  # pylint: disable=unused-variable
+
+import base64
+import glob
+import json
+import os
+import subprocess
+import sys
+import threading
+from timeit import default_timer
+
+from deplytils.cache import ResultCache, hash_key
+from deplytils.git import ignored_files
+
+
+# pylint: disable=unused-variable
+class Step(object):
+    """Command of a pipeline, run once the steps it requires succeeded"""
+    # pylint: disable=too-many-arguments
+    def __init__(self, name, args, requires=(), cwd=None, env=None,
+                 inputs=None, versions=(), outputs=()):
+        """
+        :param name: name of the step, prefixing its output - str
+        :param args: command, as given to subprocess.Popen - list like
+        :param requires: names of the steps that must succeed first -
+                list like
+        :param cwd: working directory of the command, defaults to the
+                current directory
+        :param env: environment of the command, defaults to the current
+                environment - dict
+        :param inputs: files and directories the result of the step
+                depends on, e.g. its sources and configuration, relative
+                to cwd. Directories include their files, except those
+                git ignores. If None, the step is never cached - list
+                like
+        :param versions: versions of the tools the step runs, besides
+                the version of python - list like
+        :param outputs: globs of the files the step writes, relative to
+                cwd, e.g. coverage data files. The files matching them
+                once the step succeeded are cached along with its
+                result, and restored when it is replayed. They must
+                not match the files of other steps - list like
+        """
+        self.name = name
+        self.args = args
+        self.requires = tuple(requires)
+        self.cwd = cwd
+        self.env = env
+        self.inputs = inputs
+        self.versions = tuple(versions)
+        self.outputs = tuple(outputs)
+
+
+class StepResult(object):
+    """Exit status, wall time and output of a step"""
+    # pylint: disable=too-many-arguments
+    def __init__(self, name, returncode=None, seconds=0.0, output=(),
+                 cached=False):
+        """
+        :param name: name of the step - str
+        :param returncode: exit status of its command, None if skipped
+        :param seconds: wall time of its command - float
+        :param output: lines of its output - list like
+        :param cached: whether it was replayed from the cache - bool
+        """
+        self.name = name
+        self.returncode = returncode
+        self.seconds = seconds
+        self.output = list(output)
+        self.cached = cached
+
+    @property
+    def skipped(self):
+        """Whether the step was skipped, as a requirement failed"""
+        return self.returncode is None
+
+    @property
+    def succeeded(self):
+        """Whether the command of the step exited successfully"""
+        return self.returncode == 0
+
+
+class Pipeline(object):
+    """
+    Runs steps concurrently, in order of their requirements. The output
+    of every step is streamed line by line as it arrives, prefixed with
+    the name of the step, followed by its exit status and wall time.
+    Steps requiring a step that failed or was skipped are skipped.
+    Successful steps with inputs are cached if a cache directory is
+    given, see StepCache.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, steps, jobs=None, output=None, cache_dir=None,
+                 cache_size=1000):
+        """
+        :param steps: Steps, started in this order once their
+                requirements succeeded - list like
+        :param jobs: maximum number of steps running at once, unlimited
+                by default - int
+        :param output: file the output is written to, defaults to
+                stdout
+        :param cache_dir: directory of the step result cache. If None,
+                nothing is cached
+        :param cache_size: maximum number of cached results - int
+        """
+        self.steps = tuple(steps)
+        _check_requirements(self.steps)
+        assert jobs is None or jobs > 0, 'At least one job is needed'
+        self.jobs = jobs or len(self.steps)
+        self.output = output
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.results = {}
+        self._cache = None
+        self._finished = []
+        self._condition = threading.Condition()
+        self._print_lock = threading.Lock()
+
+    def run(self):
+        """
+        Run the steps, waiting for all of them
+
+        :return: StepResults, by step name - dict
+        """
+        self.results = {}
+        self._cache = StepCache(self.steps, self.cache_dir, self.cache_size)
+        pending = list(self.steps)
+        running = {}
+        with self._condition:
+            while pending or running:
+                self._start_ready(pending, running)
+                if running:
+                    self._wait(running)
+        self._cache.prune()
+        return self.results
+
+    def _wait(self, running):
+        """Wait for a running step to finish, storing its result"""
+        while not self._finished:
+            self._condition.wait()
+        result = self._finished.pop(0)
+        del running[result.name]
+        self.results[result.name] = result
+        self._cache.save(result)
+
+    def _start_ready(self, pending, running):
+        """
+        Skip the pending steps whose requirements failed, then start
+        those whose requirements succeeded, while jobs are available
+        """
+        for step in list(pending):
+            results = [self.results.get(name) for name in step.requires]
+            if any(result is not None and not result.succeeded
+                   for result in results):
+                pending.remove(step)
+                self.results[step.name] = StepResult(step.name)
+                self._print(step.name, 'skipped, as a requirement failed')
+            elif None not in results and len(running) < self.jobs:
+                pending.remove(step)
+                self._launch(step, running)
+
+    def _launch(self, step, running):
+        """Replay the cached result of a step, or else start it"""
+        result = self._cache.lookup(step)
+        if result is None:
+            running[step.name] = self._start(step)
+            return
+        for line in result.output:
+            self._print(step.name, line)
+        self._print(step.name, 'exited with {} after {:0.2f}s, replayed from '
+                    'cache'.format(result.returncode, result.seconds))
+        self.results[step.name] = result
+
+    def _start(self, step):
+        """Start the command of a step, and a thread streaming it"""
+        start = default_timer()
+        process = subprocess.Popen(
+            step.args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            cwd=step.cwd, env=step.env)
+        thread = threading.Thread(target=self._stream,
+                                  args=(step.name, process, start))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _stream(self, name, process, start):
+        """Print the output of a step as it arrives, until it exits"""
+        output = []
+        for line in iter(process.stdout.readline, b''):
+            output.append(line.decode('utf-8', 'replace').rstrip())
+            self._print(name, output[-1])
+        process.stdout.close()
+        result = StepResult(name, process.wait(), default_timer() - start,
+                            output)
+        self._print(name, 'exited with {} after {:0.2f}s'.format(
+            result.returncode, result.seconds))
+        with self._condition:
+            self._finished.append(result)
+            self._condition.notify()
+
+    def _print(self, name, line):
+        """Print a line of a step, prefixed with its name"""
+        output = self.output or sys.stdout
+        with self._print_lock:
+            print('[{}] {}'.format(name, line), file=output)
+            output.flush()
+
+
+class StepCache(object):
+    """
+    Successful results of steps, output included, keyed by the name,
+    command, working directory, environment and tool versions of a step,
+    the content of its inputs and the keys of the steps it requires.
+    Keys are computed before any step runs, so files written by steps
+    do not change the keys of the steps requiring them. Steps without
+    inputs, or requiring steps without inputs, are never cached. The
+    output files of a step are cached with its result, and written back
+    when it is looked up.
+    """
+    def __init__(self, steps, directory=None, max_entries=1000):
+        """
+        :param steps: Steps of a pipeline - list like
+        :param directory: directory of the cache. If None, nothing is
+                cached
+        :param max_entries: maximum number of cached results - int
+        """
+        self.store = None
+        self.keys = {}
+        self.steps = dict((step.name, step) for step in steps)
+        if directory:
+            self.store = ResultCache(directory, max_entries)
+            for step in _check_requirements(steps):
+                self.keys[step.name] = step_key(
+                    step, [self.keys[name] for name in step.requires])
+
+    def lookup(self, step):
+        """
+        Get the cached result of a step
+
+        :param step: Step
+        :return: StepResult, None on a cache miss
+        """
+        key = self.keys.get(step.name)
+        cached = self.store.get(key) if key is not None else None
+        if cached is None:
+            return None
+        _restore_outputs(step, cached.get('files', {}))
+        return StepResult(step.name, cached['returncode'], cached['seconds'],
+                          cached['output'], cached=True)
+
+    def save(self, result):
+        """
+        Cache the result of a step that ran, if successful
+
+        :param result: StepResult
+        """
+        key = self.keys.get(result.name)
+        if key is not None and result.succeeded and not result.cached:
+            self.store.set(key, {
+                'returncode': result.returncode, 'seconds': result.seconds,
+                'output': result.output,
+                'files': _read_outputs(self.steps[result.name])})
+
+    def prune(self):
+        """Evict the least recently used results beyond the size bound"""
+        if self.store is not None:
+            self.store.prune()
+
+
+def step_key(step, required_keys):
+    """
+    Key of the result of a step
+
+    :param step: Step
+    :param required_keys: keys of the steps it requires - list like
+    :return: hex digest - str, None if the step is never cached
+    """
+    if step.inputs is None or None in required_keys:
+        return None
+    command = [step.args, step.cwd, step.env, step.outputs]
+    parts = [step.name, json.dumps(command, sort_keys=True), sys.version]
+    parts.extend(step.versions)
+    parts.extend(required_keys)
+    top = os.path.abspath(step.cwd or os.curdir)
+    for path in _input_files(top, step.inputs):
+        with open(path, 'rb') as file_:
+            parts.extend([os.path.relpath(path, top), file_.read()])
+    return hash_key(*parts)
+
+
+def _read_outputs(step):
+    """Content of the output files of a step, base64 encoded, by path"""
+    top = os.path.abspath(step.cwd or os.curdir)
+    files = {}
+    for pattern in step.outputs:
+        for path in glob.glob(os.path.join(top, pattern)):
+            with open(path, 'rb') as file_:
+                files[os.path.relpath(path, top)] = base64.b64encode(
+                    file_.read()).decode('ascii')
+    return files
+
+
+def _restore_outputs(step, files):
+    """Write back the cached output files of a step"""
+    top = os.path.abspath(step.cwd or os.curdir)
+    for name, content in files.items():
+        with open(os.path.join(top, name), 'wb') as file_:
+            file_.write(base64.b64decode(content.encode('ascii')))
+
+
+def _input_files(top, inputs):
+    """Sorted absolute paths of the files of inputs relative to top"""
+    files = set()
+    for input_ in inputs:
+        path = os.path.join(top, input_)
+        if os.path.isdir(path):
+            files.update(_walk(path))
+        elif os.path.isfile(path):
+            files.add(os.path.normpath(path))
+    return sorted(files)
+
+
+def _walk(top):
+    """Files below a directory, except those git ignores and .git"""
+    top = os.path.normpath(top)
+    ignored = ignored_files(top)
+    for root, dirs, files in os.walk(top):
+        dirs[:] = [name for name in dirs if name != '.git' and
+                   os.path.join(root, name) not in ignored]
+        for name in files:
+            if os.path.join(root, name) not in ignored:
+                yield os.path.normpath(os.path.join(root, name))
+
+
+def _check_requirements(steps):
+    """
+    Assert step names are unique and requirements are acyclic
+
+    :return: the steps, each after the steps it requires - list
+    """
+    names = [step.name for step in steps]
+    assert len(set(names)) == len(names), 'Duplicate step names'
+    ordered = []
+    done = set()
+    remaining = list(steps)
+    while remaining:
+        ready = [step for step in remaining if done.issuperset(step.requires)]
+        assert ready, 'Unknown or circular requirements of {}'.format(
+            ', '.join(step.name for step in remaining))
+        for step in ready:
+            remaining.remove(step)
+            done.add(step.name)
+        ordered.extend(ready)
+    return ordered
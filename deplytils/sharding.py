@@ -0,0 +1,286 @@
+"""
+Parallel unittest runs. Discovered tests are split into one shard per
+worker process, balanced by the durations of earlier runs, and their
+results and coverage are merged back into a single result and coverage.
+"""
+from __future__ import print_function  # pylint: disable=unused-variable
+
+import heapq
+import json
+import multiprocessing
+import sys
+import unittest
+from timeit import default_timer
+
+from deplytils.contexts.coverage import CoverageContext
+from deplytils.contexts.coverage_collector import merge_payloads, payload
+from deplytils.contexts.coverage_evaluation import evaluate
+
+_OUTCOMES = ('failures', 'errors', 'skipped', 'expectedFailures')
+
+
+# pylint: disable=unused-variable
+class ShardedTestRunner(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Discovers tests and runs them in worker processes, the tests of a
+    TestCase class staying in the same shard so its fixtures run once.
+    Shards are balanced by the durations of the tests in earlier runs,
+    or by their number when no durations were recorded. Shards are sent
+    to the workers pickled, whether they are forked or spawned, so tests
+    must be picklable and must not depend on running in the same process
+    as the tests of other classes.
+
+    Coverage is measured by a CoverageContext sharing any outer tracer,
+    during discovery in the current process and around every shard in
+    the workers, the data of the workers being merged into the coverage
+    of discovery.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, start_dir, pattern='test*.py', top_level_dir=None,
+                 jobs=0, durations_path=None, coverage_kwargs=None,
+                 stream=None):
+        """
+        :param start_dir: directory to discover tests in - str
+        :param pattern: pattern of the test modules - str
+        :param top_level_dir: top level directory of the project, see
+                `unittest.TestLoader.discover`
+        :param jobs: number of worker processes, 0 being one per cpu -
+                int
+        :param durations_path: JSON file of the test durations, read
+                to balance the shards and rewritten once tests ran. If
+                None, shards are balanced by number of tests
+        :param coverage_kwargs: kwargs for the Coverage constructor -
+                dict
+        :param stream: file the summary of the run is written to,
+                defaults to stderr
+        """
+        self.start_dir = start_dir
+        self.pattern = pattern
+        self.top_level_dir = top_level_dir
+        self.jobs = jobs or multiprocessing.cpu_count()
+        self.durations_path = durations_path
+        self.coverage_kwargs = coverage_kwargs or {}
+        self.stream = stream
+        self.result = None
+        self.coverage = None
+        self.evaluation = None
+        self.durations = {}
+
+    def run(self):
+        """
+        Run the tests, storing the merged coverage as `coverage` and its
+        evaluation as `evaluation`, empty if no file was measured
+
+        :return: merged unittest.TestResult, whose tests are stand-ins
+                named by the test ids
+        """
+        start = default_timer()
+        with shared_coverage_context(self.coverage_kwargs) as context:
+            suite = unittest.defaultTestLoader.discover(
+                self.start_dir, self.pattern, self.top_level_dir)
+        shards = balance(_units(suite), self._recorded_durations(),
+                         self.jobs)
+
+        tasks = [(shard, self.coverage_kwargs) for shard in shards]
+        pool = multiprocessing.Pool(max(len(tasks), 1))
+        try:
+            summaries = pool.map(run_shard, tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+        self.coverage = context.coverage
+        merge_payloads(self.coverage.get_data(),
+                       [summary.pop('payload') for summary in summaries])
+        self.evaluation = evaluate(self.coverage)
+        self.result = _merge(summaries)
+        self._record_durations(summaries)
+        self._print_summary(len(summaries), default_timer() - start)
+        return self.result
+
+    def threshold_failures(self, threshold=100.0, file_thresholds=None,
+                           package_thresholds=None):
+        """
+        Describe the coverage thresholds that are not met, as
+        StrictCoverage does
+
+        :param threshold: minimum total percentage - float
+        :param file_thresholds: see StrictCoverage
+        :param package_thresholds: see StrictCoverage
+        :return: list of messages
+        """
+        failures = []
+        if not self.evaluation.files:
+            failures.append('No coverage data')
+        elif self.evaluation.total < threshold:
+            failures.append('{:0.2f}% does not meet {:0.2f}% threshold'.format(
+                self.evaluation.total, threshold))
+        failures.extend(self.evaluation.failures(file_thresholds,
+                                                 package_thresholds))
+        return failures
+
+    def _recorded_durations(self):
+        """Durations of an earlier run, by test id, if recorded"""
+        if not self.durations_path:
+            return {}
+        try:
+            with open(self.durations_path) as file_:
+                return json.load(file_)
+        except (EnvironmentError, ValueError):
+            return {}
+
+    def _record_durations(self, summaries):
+        """Store the durations of the run, writing them if configured"""
+        self.durations = {}
+        for summary in summaries:
+            self.durations.update(summary['durations'])
+        if self.durations_path:
+            with open(self.durations_path, 'w') as file_:
+                json.dump(self.durations, file_, indent=2, sort_keys=True)
+
+    def _print_summary(self, shards, seconds):
+        """Print the errors and failures, then totals, as unittest does"""
+        stream = self.stream or sys.stderr
+        for flavour, outcomes in (('ERROR', self.result.errors),
+                                  ('FAIL', self.result.failures)):
+            for test, text in outcomes:
+                print('=' * 70, '{}: {}'.format(flavour, test), '-' * 70,
+                      text, sep='\n', file=stream)
+        print('-' * 70, 'Ran {} tests in {:.3f}s, in {} shards'.format(
+            self.result.testsRun, seconds, shards), '',
+              'OK' if self.result.wasSuccessful() else 'FAILED', sep='\n',
+              file=stream)
+
+
+def balance(units, durations, jobs):
+    """
+    Split units into shards of about the same duration, giving the
+    longest units first to the shortest shard. Tests without recorded
+    duration last the mean recorded duration, or 1 second if none is
+    recorded, so shards are balanced by number of tests.
+
+    :param units: TestSuites, e.g. of the tests of a class - list like
+    :param durations: seconds, by test id - dict
+    :param jobs: maximum number of shards - int
+    :return: list of shards, lists of units in their original order
+    """
+    default = sum(durations.values()) / len(durations) if durations else 1.0
+    weights = []
+    for index, unit in enumerate(units):
+        weights.append((-sum(durations.get(test.id(), default)
+                             for test in iter_tests(unit)), index))
+    loads = [(0.0, shard) for shard in range(min(jobs, len(weights)))]
+    shards = [[] for _ in loads]
+    for weight, index in sorted(weights):
+        load, shard = heapq.heappop(loads)
+        shards[shard].append(index)
+        heapq.heappush(loads, (load - weight, shard))
+    return [[units[index] for index in sorted(shard)] for shard in shards]
+
+
+def run_shard(task):
+    """
+    Run a shard of units, measuring its coverage. Module level so it can
+    be sent to worker processes.
+
+    :param task: tuple of the units of the shard and the kwargs of the
+            Coverage constructor
+    :return: picklable summary of the results, coverage data and
+            durations of the tests - dict
+    """
+    units, coverage_kwargs = task
+    suite = unittest.TestSuite(units)
+    result = _TimedResult()
+    with shared_coverage_context(coverage_kwargs) as context:
+        suite.run(result)
+    summary = result.summary()
+    summary['payload'] = payload(context.coverage.get_data())
+    return summary
+
+
+class TestId(object):
+    """Stand-in for a test that ran in another process"""
+    def __init__(self, test_id):
+        self.test_id = test_id
+
+    def id(self):  # pylint: disable=invalid-name
+        """Id of the test"""
+        return self.test_id
+
+    def __str__(self):
+        return self.test_id
+
+
+class _TimedResult(unittest.TestResult):
+    """TestResult timing every test, picklable once summarized"""
+    def __init__(self):
+        super(_TimedResult, self).__init__()
+        self.durations = {}
+        self._start = None
+
+    def startTest(self, test):
+        self._start = default_timer()
+        super(_TimedResult, self).startTest(test)
+
+    def stopTest(self, test):
+        super(_TimedResult, self).stopTest(test)
+        self.durations[test.id()] = default_timer() - self._start
+
+    def summary(self):
+        """Picklable outcomes, by test id"""
+        summary = {'testsRun': self.testsRun, 'durations': self.durations,
+                   'unexpectedSuccesses': [
+                       test.id() for test in self.unexpectedSuccesses]}
+        for outcome in _OUTCOMES:
+            summary[outcome] = [(test.id(), text)
+                                for test, text in getattr(self, outcome)]
+        return summary
+
+
+def shared_coverage_context(coverage_kwargs):
+    """
+    CoverageContext sharing any outer tracer, not warning when no data
+    is collected, as e.g. discovery and shards may well measure no file
+
+    :param coverage_kwargs: kwargs for the Coverage constructor - dict
+    :return: CoverageContext, not reporting
+    """
+    context = CoverageContext(report=False, share_outer=True,
+                              coverage_kwargs=coverage_kwargs)
+    context.coverage.set_option('run:disable_warnings', ['no-data-collected'])
+    return context
+
+
+def _merge(summaries):
+    """TestResult of the summaries of several shards"""
+    result = unittest.TestResult()
+    for summary in summaries:
+        result.testsRun += summary['testsRun']
+        result.unexpectedSuccesses.extend(
+            TestId(test_id) for test_id in summary['unexpectedSuccesses'])
+        for outcome in _OUTCOMES:
+            getattr(result, outcome).extend(
+                (TestId(test_id), text) for test_id, text in summary[outcome])
+    return result
+
+
+def _units(suite):
+    """Suites of the tests of every TestCase class, in order"""
+    units = {}
+    order = []
+    for test in iter_tests(suite):
+        if type(test) not in units:  # pylint: disable=unidiomatic-typecheck
+            units[type(test)] = unittest.TestSuite()
+            order.append(type(test))
+        units[type(test)].addTest(test)
+    return [units[class_] for class_ in order]
+
+
+def iter_tests(suite):
+    """Tests of a suite, nested suites flattened"""
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            for nested in iter_tests(test):
+                yield nested
+        else:
+            yield test
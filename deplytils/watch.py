@@ -0,0 +1,383 @@
+"""
+Watch mode of the release checks. A Watcher polls the files of a
+project and, once some change, re-lints and re-runs the tests of the
+modules they affect, i.e. the changed modules and those importing them,
+directly or not, as found by an ImportGraph built from the sources.
+Linters, astroid's cache and the results of unaffected files are kept
+warm in process between iterations. Start it with
+`python -m deplytils.watch [project]`.
+
+Tests run in process without coverage, so a full check (see
+tests/run.py) is still needed before a release.
+"""
+from __future__ import print_function  # pylint: disable=unused-variable
+
+import argparse
+import ast
+import fnmatch
+import os
+import sys
+import time
+import traceback
+import unittest
+from timeit import default_timer
+
+from deplytils.discovery import iter_package_files
+
+
+# pylint: disable=unused-variable
+class ImportGraph(object):
+    """
+    Modules of a project and the project modules each of them imports,
+    parsed from their sources. Modules are named after their path
+    relative to the project, which must be on sys.path.
+    """
+    def __init__(self, project_path):
+        """
+        :param project_path: absolute or relative path of the project
+        """
+        self.project_path = os.path.abspath(project_path)
+        self.paths = {}
+        self.imports = {}
+
+    def update(self, paths):
+        """
+        Parse files again, forgetting those that no longer exist. A file
+        that does not parse imports nothing.
+
+        :param paths: absolute paths of python files - list like
+        """
+        for path in paths:
+            name = self.module_name(path)
+            if not os.path.exists(path):
+                self.paths.pop(name, None)
+                self.imports.pop(name, None)
+                continue
+            self.paths[name] = path
+            try:
+                with open(path, 'rb') as file_:
+                    tree = ast.parse(file_.read(), path)
+            except (SyntaxError, ValueError):
+                tree = None
+            self.imports[name] = set(_imported_names(
+                tree, name, path.endswith('__init__.py')))
+
+    def module_name(self, path):
+        """
+        Dotted name of the module of a file
+
+        :param path: absolute path of a python file - str
+        :return: str
+        """
+        relative = os.path.splitext(os.path.relpath(path, self.project_path))
+        parts = relative[0].split(os.sep)
+        if parts[-1] == '__init__':
+            parts.pop()
+        return '.'.join(parts)
+
+    def affected(self, paths):
+        """
+        Modules of files and every module importing them, directly or
+        not
+
+        :param paths: absolute paths of python files - list like
+        :return: names of the modules - set
+        """
+        importers = {}
+        for name, imported in self.imports.items():
+            for dependency in imported:
+                importers.setdefault(dependency, set()).add(name)
+        affected = set()
+        pending = [self.module_name(path) for path in paths]
+        while pending:
+            name = pending.pop()
+            if name not in affected:
+                affected.add(name)
+                pending.extend(importers.get(name, ()))
+        return affected
+
+
+class Watcher(object):  # pylint: disable=too-many-instance-attributes
+    """
+    Re-lints and re-tests the modules affected by the changed files of a
+    project, every time files change. The lint messages of every file
+    and the failures of every test module are kept, so each iteration
+    reports what is left to fix across the whole project.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, project_path=None, rc_file=None, pattern='test*.py',
+                 includes=('*.py',), excludes=('*local*.py',), gitignore=False,
+                 interval=0.5, lint=True, stream=None):
+        """
+        :param project_path: absolute or relative path of the project,
+                added to sys.path so its modules can be imported
+        :param rc_file: absolute or relative path of the pylintrc file
+        :param pattern: glob of the names of the test modules - str
+        :param includes: see iter_package_files
+        :param excludes: see iter_package_files
+        :param gitignore: see iter_package_files
+        :param interval: seconds between polls - float
+        :param lint: whether to lint, else only tests are run - bool
+        :param stream: file the results are written to, defaults to
+                stdout
+        """
+        self.project_path = os.path.abspath(project_path or os.curdir)
+        self.rc_file = os.path.abspath(rc_file) if rc_file else None
+        self.pattern = pattern
+        self.discovery = (includes, excludes, gitignore)
+        self.interval = interval
+        self.lint = lint
+        self.stream = stream or sys.stdout
+        self.graph = ImportGraph(self.project_path)
+        self.lint_messages = {}
+        self.test_failures = {}
+        self.stamps = {}
+        self._linting = None
+
+    def watch(self, iterations=None):
+        """
+        Check every file, then poll and check the changed files, until
+        interrupted
+
+        :param iterations: number of polls, forever if None - int
+        :return: whether the last check left nothing to fix - bool
+        """
+        succeeded = self.check(self.poll())
+        while iterations is None or iterations > 0:
+            time.sleep(self.interval)
+            changed = self.poll()
+            if changed:
+                succeeded = self.check(changed)
+            if iterations is not None:
+                iterations -= 1
+        return succeeded
+
+    def poll(self):
+        """
+        Files added, modified or removed since the last poll, by their
+        modification time and size
+
+        :return: absolute paths - set
+        """
+        stamps = {}
+        for path in iter_package_files(self.project_path, *self.discovery):
+            try:
+                stat = os.stat(path)
+            except EnvironmentError:
+                continue
+            stamps[path] = (stat.st_mtime, stat.st_size)
+        changed = set(path for path in set(stamps).union(self.stamps)
+                      if stamps.get(path) != self.stamps.get(path))
+        self.stamps = stamps
+        return changed
+
+    def check(self, changed):
+        """
+        Lint and test the modules affected by changed files, then report
+        every outstanding lint message and test failure
+
+        :param changed: absolute paths of the changed files - list like
+        :return: whether nothing is left to fix - bool
+        """
+        start = default_timer()
+        changed = [path for path in changed if path.endswith('.py')]
+        self.graph.update(changed)
+        affected = self.graph.affected(changed)
+        for path in changed:
+            if not os.path.exists(path):
+                self.lint_messages.pop(path, None)
+                self.test_failures.pop(self.graph.module_name(path), None)
+        paths = sorted(self.graph.paths[name] for name in affected
+                       if name in self.graph.paths)
+        if self.lint:
+            self.lint_messages.update(self._lint(paths))
+        tests = [self.graph.module_name(path) for path in paths
+                 if fnmatch.fnmatch(os.path.basename(path), self.pattern)]
+        self.test_failures.update(self._test(affected, tests))
+        return self._report(len(paths), len(tests), default_timer() - start)
+
+    def _lint(self, paths):
+        """
+        Lint files with a warm, in process lint server
+
+        :param paths: absolute paths of the files - list
+        :return: formatted messages by path - dict
+        """
+        if self._linting is None:
+            self._linting = _warm_linting(self.rc_file)
+        server, config = self._linting
+        messages = dict((path, []) for path in paths)
+        for result in server.lint(os.getcwd(), config, paths):
+            messages[result[0]].extend(_format_messages(result[3]))
+        return messages
+
+    def _test(self, affected, tests):
+        """
+        Run test modules in process, importing the affected modules
+        again so tests see their changes
+
+        :param affected: names of the affected modules - set
+        :param tests: names of the test modules to run - list
+        :return: descriptions of the failures by test module - dict
+        """
+        if self.project_path not in sys.path:
+            sys.path.insert(0, self.project_path)
+        for name in affected:
+            _forget_module(name)
+        failures = {}
+        for name in tests:
+            try:
+                suite = unittest.defaultTestLoader.loadTestsFromName(name)
+            except Exception:  # pylint: disable=broad-except
+                failures[name] = ['{}\n{}'.format(
+                    name, traceback.format_exc())]
+                continue
+            result = unittest.TestResult()
+            suite.run(result)
+            failures[name] = [
+                '{}\n{}'.format(test.id(), details) for test, details in
+                result.failures + result.errors] + [
+                    '{}\nunexpected success'.format(test.id())
+                    for test in result.unexpectedSuccesses]
+        return failures
+
+    def _report(self, files, tests, seconds):
+        """
+        Print the outstanding lint messages and test failures
+
+        :return: whether there is none - bool
+        """
+        messages = [message for path in sorted(self.lint_messages)
+                    for message in self.lint_messages[path]]
+        failures = [failure for name in sorted(self.test_failures)
+                    for failure in self.test_failures[name]]
+        for line in messages + failures:
+            print(line, file=self.stream)
+        print('Checked {} affected files, {} test modules, in {:.2f}s: {} '
+              'lint messages, {} test failures'.format(
+                  files, tests, seconds, len(messages), len(failures)),
+              file=self.stream)
+        self.stream.flush()
+        return not (messages or failures)
+
+
+def main(argv=None):
+    """
+    Watch a project, until interrupted
+
+    :param argv: command line arguments, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(prog='python -m deplytils.watch')
+    parser.add_argument('project', nargs='?', default=os.curdir,
+                        help='path of the project')
+    parser.add_argument('--rcfile', help='path of the pylintrc file')
+    parser.add_argument('--pattern', default='test*.py',
+                        help='glob of the names of the test modules')
+    parser.add_argument('--interval', type=float, default=0.5,
+                        help='seconds between polls')
+    parser.add_argument('--no-lint', action='store_true',
+                        help='only run the tests')
+    args = parser.parse_args(argv)
+
+    watcher = Watcher(args.project, args.rcfile, args.pattern,
+                      interval=args.interval, lint=not args.no_lint)
+    try:
+        watcher.watch()
+    except KeyboardInterrupt:
+        pass
+
+
+def _imported_names(tree, name, is_package):
+    """
+    Names of the modules, and their parent packages, imported by a
+    module, relative imports resolved. `from package import name` may
+    import a module, so `package.name` is among the names.
+
+    :param tree: ast of the module, None if it does not parse
+    :param name: dotted name of the module - str
+    :param is_package: whether the module is a package's __init__ - bool
+    :return: generator of dotted names
+    """
+    package = name.split('.') if is_package else name.split('.')[:-1]
+    for node in ast.walk(tree) if tree is not None else ():
+        for dotted in filter(None, _node_imports(node, package)):
+            for parent in _parents(dotted):
+                yield parent
+
+
+def _node_imports(node, package):
+    """
+    Names of the modules an ast node imports, none if it is not an
+    import statement
+    """
+    if isinstance(node, ast.Import):
+        return [alias.name for alias in node.names]
+    if isinstance(node, ast.ImportFrom):
+        return _import_from_names(node, package)
+    return []
+
+
+def _import_from_names(node, package):
+    """
+    Names of the module of a `from` import statement and of what it
+    imports, which may be modules, relative to the package of the
+    importing module if relative
+    """
+    parts = package[:len(package) + 1 - node.level] if node.level else []
+    base = '.'.join(parts + ([node.module] if node.module else []))
+    return [base] + ['{}.{}'.format(base, alias.name).lstrip('.')
+                     for alias in node.names]
+
+
+def _parents(dotted):
+    """A dotted name and the names of its parent packages, outermost first"""
+    parts = dotted.split('.')
+    return ['.'.join(parts[:end]) for end in range(1, len(parts) + 1)]
+
+
+def _format_messages(messages):
+    """
+    Lines of the messages of a `lint_file` result, as the text reporter
+    writes them
+    """
+    # imported here, so that only linting imports pylint
+    from deplytils.extensions.lint_reporter import TEXT_TEMPLATE
+    return [TEXT_TEMPLATE.format(path=location[1], line=location[4],
+                                 column=location[5], msg_id=msg_id, msg=msg,
+                                 symbol=symbol)
+            for msg_id, symbol, location, msg, _ in messages]
+
+
+def _forget_module(name):
+    """
+    Remove a module from sys.modules and from its package, so that
+    `from package import module` imports it again
+    """
+    module = sys.modules.pop(name, None)
+    package, _, attribute = name.rpartition('.')
+    if module is not None and getattr(
+            sys.modules.get(package), attribute, None) is module:
+        delattr(sys.modules[package], attribute)
+
+
+def _warm_linting(rc_file):
+    """
+    In process lint server and the jobs config of a linter configured
+    by a pylintrc file
+
+    :param rc_file: path of the pylintrc file, pylint's default if None
+    :return: tuple of LintServer and config
+    """
+    # imported here, so that only linting imports pylint
+    from pylint.lint import PyLinter
+    from deplytils.extensions.lint_server import LintServer
+    linter = PyLinter()
+    linter.load_default_plugins()
+    linter.read_config_file(rc_file)
+    linter.load_config_file()
+    # pylint: disable=protected-access
+    return LintServer(), linter._get_jobs_config()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,8 @@ from setuptools import setup
 setup(
     name='deplytils',
     version='0.0.0',
-    packages=['deplytils', 'deplytils.contexts', 'deplytils.extensions'],
+    packages=['deplytils', 'deplytils.bench', 'deplytils.contexts',
+              'deplytils.extensions'],
     url='https://github.com/joshuahaertel/deplytils',
     license='MIT',
     author='Joshua Haertel',
@@ -0,0 +1,6 @@
+"""Fixture to test the collection of the coverage of child processes"""
+
+
+# pragma pylint: disable=missing-docstring,unused-variable
+def square(number):
+    return number * number
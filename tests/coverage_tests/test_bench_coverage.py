@@ -0,0 +1,43 @@
+"""Test Coverage Benchmarks"""
+import os
+import tempfile
+from unittest import TestCase
+
+from deplytils.bench.coverage import run
+from deplytils.contexts.coverage import CoverageContext
+from deplytils.mocks import MockCoverage
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestCoverageBench(TestCase):
+    def setUp(self):
+        # workload modules under the tests directory are omitted from the
+        # coverage of the tests, which would not find them once deleted
+        self.tempdir = tempfile.tempdir
+        tempfile.tempdir = os.path.abspath(os.path.dirname(__file__))
+
+    def tearDown(self):
+        tempfile.tempdir = self.tempdir
+
+    def test_run(self):
+        results = run(0.001)
+        modes = ['branches', 'excluded', 'lines', 'untraced']
+        for name in ('deep_calls', 'many_modules', 'tight_loop'):
+            self.assertEqual(sorted(results['workloads'][name]), modes)
+            self.assertEqual(results['slowdown'][name]['untraced'], 1.0)
+        self.assertEqual(sorted(results['contexts']), [
+            'coverage_context', 'nested_mock', 'strict_coverage'])
+        for timings in results['contexts'].values():
+            self.assertEqual(sorted(timings), ['construct', 'cycle'])
+        self.assertEqual(results['report']['files'], 2)
+
+    def test_untraced(self):
+        outer = CoverageContext(report=False)
+        try:
+            results = run(0.001, coverage_factory=lambda **_: MockCoverage())
+        finally:
+            outer.__exit__(None, None, None)
+        self.assertEqual(results['report']['files'], 2)
+        self.assertEqual(sorted(results['contexts']), [
+            'coverage_context', 'nested_mock', 'strict_coverage'])
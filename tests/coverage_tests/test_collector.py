@@ -0,0 +1,133 @@
+"""Test the collection of the coverage of child processes"""
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+from coverage import Coverage, CoverageData
+
+from deplytils.contexts import coverage, coverage_collector
+from tests.coverage_tests import collector_fixture
+
+FIXTURE_PATH = os.path.splitext(
+    os.path.realpath(collector_fixture.__file__))[0] + '.py'
+RETURN_LINE = collector_fixture.square.__code__.co_firstlineno + 1
+QUIET = ['no-data-collected']
+
+
+# pragma pylint: disable=missing-docstring,unused-variable,protected-access
+# noinspection PyMissingOrEmptyDocstring
+class TestCoverageCollector(TestCase):
+    def setUp(self):
+        unstarted = Coverage()
+        unstarted.set_option('run:disable_warnings', QUIET)
+        self.collector = coverage_collector.CoverageCollector(
+            unstarted, {'branch': True, 'include': [FIXTURE_PATH]})
+        self.collector.start()
+        self.stopped = False
+
+        process = coverage_collector._PROCESS
+        self.addCleanup(setattr, process, '_bootstrap',
+                        vars(process)['_bootstrap'])
+        self.addCleanup(self._collected)
+
+    def _collected(self):
+        if not self.stopped:
+            self.stopped = True
+            self.collector.stop()
+        data = CoverageData()
+        self.collector.merge(data)
+        return data
+
+    def test_subprocess(self):
+        subprocess.check_call([sys.executable, '-c', (
+            'from tests.coverage_tests.collector_fixture import square; '
+            'square(2)')])
+        data = self._collected()
+        self.assertEqual(data.measured_files(), [FIXTURE_PATH])
+        self.assertIn(RETURN_LINE, data.lines(FIXTURE_PATH))
+        self.assertTrue(data.has_arcs())
+
+    def test_config_file_found_anywhere(self):
+        collector = coverage_collector.CoverageCollector(
+            Coverage(), {'config_file': 'coverage_tests/.coveragerc'})
+        collector.start()
+        try:
+            settings = json.loads(
+                os.environ[coverage_collector.ENVIRONMENT_VARIABLE])
+        finally:
+            collector.stop()
+        self.assertEqual(settings['coverage_kwargs']['config_file'],
+                         os.path.abspath('coverage_tests/.coveragerc'))
+
+    def test_collect_from_environment(self):
+        sender = coverage_collector.collect_from_environment()
+        sender.coverage.start()
+        collector_fixture.square(3)
+        sender()
+        sender()
+        data = self._collected()
+        self.assertEqual(len(self.collector.payloads), 1)
+        self.assertIn(RETURN_LINE, data.lines(FIXTURE_PATH))
+
+    def test_nothing_measured(self):
+        sender = coverage_collector.collect_from_environment()
+        sender.coverage.set_option('run:disable_warnings', QUIET)
+        sender()
+        self.assertEqual(self._collected().measured_files(), [])
+        self.assertEqual(self.collector.payloads, [('lines', {})])
+
+    def test_failed_connection(self):
+        address = self.collector._listener.address
+        with self.assertRaises(multiprocessing.AuthenticationError):
+            coverage_collector._send(address, b'wrong', ('lines', {'a': {}}))
+        self.assertEqual(self._collected().measured_files(), [])
+        self.assertEqual(self.collector.payloads, [('lines', {})])
+
+    def test_sent_once_stopped(self):
+        sender = coverage_collector.collect_from_environment()
+        sender.coverage.set_option('run:disable_warnings', QUIET)
+        self._collected()
+        sender()
+        self.assertEqual(self.collector.payloads, [])
+
+    def test_process_sends_once_done(self):
+        process = coverage_collector._PROCESS
+        process._bootstrap = lambda self_: 'done'
+        sent = []
+        unpatch = coverage_collector._patch_bootstrap(
+            lambda: sent.append('sent'))
+        self.assertEqual(vars(process)['_bootstrap'](None), 'done')
+        unpatch()
+        self.assertEqual(sent, ['sent'])
+        self.assertEqual(vars(process)['_bootstrap'](None), 'done')
+        self.assertEqual(sent, ['sent'])
+
+
+class TestMultiprocess(TestCase):
+    def test_pool(self):
+        environ = dict(os.environ)
+        with coverage.CoverageContext(coverage_kwargs={
+                'branch': True, 'include': [FIXTURE_PATH]},
+                                      multiprocess=True) as context:
+            pool = multiprocessing.Pool(2)
+            try:
+                self.assertEqual(
+                    pool.map(collector_fixture.square, [1, 2, 3]), [1, 4, 9])
+            finally:
+                pool.close()
+                pool.join()
+        self.assertIsInstance(context.coverage, Coverage)
+        self.assertGreater(context.result, 0.0)
+        missing = context.coverage.analysis2(FIXTURE_PATH)[3]
+        self.assertNotIn(RETURN_LINE, missing)
+        self.assertEqual(dict(os.environ), environ)
+
+    def test_mocked_when_nested(self):
+        with coverage.CoverageContext(report=False):
+            with coverage.CoverageContext(report=False,
+                                          multiprocess=True) as context:
+                pass
+        self.assertIsNone(context.collector)
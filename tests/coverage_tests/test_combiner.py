@@ -0,0 +1,142 @@
+"""Test the bulk combination of coverage data files"""
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from coverage import Coverage, CoverageData, CoverageException
+
+from deplytils.contexts import coverage_combiner
+from deplytils.contexts.coverage_evaluation import evaluate
+from tests.coverage_tests import collector_fixture
+
+SQUARE_PATH = os.path.realpath(
+    os.path.splitext(collector_fixture.__file__)[0] + '.py')
+ARCS = [(-1, 1), (1, 5), (5, -1), (-5, 6), (6, -5)]
+
+
+def _coverage(directory, **kwargs):
+    coverage = Coverage(data_file=os.path.join(directory, '.coverage'),
+                        config_file=False, **kwargs)
+    coverage.set_option('run:disable_warnings', ['no-data-collected'])
+    return coverage
+
+
+def _write(directory, suffix, lines=None, arcs=None, path=SQUARE_PATH):
+    data = CoverageData()
+    if lines is not None:
+        data.add_lines({path: dict.fromkeys(lines)})
+    if arcs is not None:
+        data.add_arcs({path: dict.fromkeys(arcs)})
+    name = os.path.join(directory, '.coverage.{}'.format(suffix))
+    data.write_file(name)
+    return name
+
+
+# pragma pylint: disable=missing-docstring,unused-variable,protected-access
+# noinspection PyMissingOrEmptyDocstring
+class TestCombine(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def _stock(self):
+        """Data combined by Coverage.combine, from a copy of the files"""
+        copy = os.path.join(self.directory, 'copy')
+        shutil.copytree(self.directory, copy)
+        coverage = _coverage(copy)
+        coverage.combine()
+        return coverage
+
+    def test_lines(self):
+        _write(self.directory, 'first', lines=[1, 5])
+        _write(self.directory, 'second', lines=[1])
+        stock = self._stock()
+        coverage = _coverage(self.directory)
+        evaluation = coverage_combiner.combine(coverage, strict=True, jobs=1)
+        self.assertEqual(evaluation.total, evaluate(stock).total)
+        self.assertLess(evaluation.total, 100.0)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['.coverage', 'copy'])
+
+        combined = CoverageData()
+        combined.read_file(os.path.join(self.directory, '.coverage'))
+        self.assertEqual(sorted(combined.lines(SQUARE_PATH)),
+                         sorted(stock.get_data().lines(SQUARE_PATH)))
+
+    def test_arcs_in_parallel(self):
+        for index, arc in enumerate(ARCS):
+            _write(self.directory, index, arcs=[arc])
+        stock = self._stock()
+        coverage = _coverage(self.directory, branch=True)
+        evaluation = coverage_combiner.combine(coverage, jobs=2, keep=True)
+        self.assertEqual(evaluation.total, evaluate(stock).total)
+        self.assertEqual(len(os.listdir(self.directory)), len(ARCS) + 2)
+        self.assertEqual(sorted(coverage.get_data().arcs(SQUARE_PATH)),
+                         sorted(stock.get_data().arcs(SQUARE_PATH)))
+
+    def test_data_paths(self):
+        first = _write(self.directory, 'first', lines=[5])
+        subdirectory = os.path.join(self.directory, 'subdirectory')
+        os.mkdir(subdirectory)
+        _write(subdirectory, 'second', lines=[6])
+        _write(self.directory, 'left_out', lines=[1])
+        coverage = _coverage(self.directory)
+        coverage_combiner.combine(coverage, [first, subdirectory], jobs=1)
+        self.assertEqual(sorted(coverage.get_data().lines(SQUARE_PATH)),
+                         [5, 6])
+        with self.assertRaises(CoverageException):
+            coverage_combiner.combine(coverage, [first])
+
+    def test_aliases(self):
+        elsewhere = os.path.join(os.sep, 'elsewhere', 'tests')
+        _write(self.directory, 'moved', lines=[1, 5, 6], path=os.path.join(
+            elsewhere, os.path.basename(SQUARE_PATH)))
+        coverage = _coverage(self.directory)
+        coverage.config.paths = {'tests': [
+            os.path.dirname(SQUARE_PATH) + os.sep, elsewhere + os.sep]}
+        coverage_combiner.combine(coverage)
+        self.assertEqual(coverage.get_data().measured_files(), [SQUARE_PATH])
+        self.assertEqual(sorted(coverage.get_data().lines(SQUARE_PATH)),
+                         [1, 5, 6])
+
+    def test_mixed(self):
+        paths = [_write(self.directory, 'lines', lines=[1]),
+                 _write(self.directory, 'arcs', arcs=[(1, 5)])]
+        with self.assertRaises(CoverageException):
+            coverage_combiner.combine(_coverage(self.directory), jobs=1)
+        with self.assertRaises(CoverageException):
+            coverage_combiner.read_chunk((paths, None))
+
+    def test_unreadable(self):
+        unreadable = os.path.join(self.directory, '.coverage.unreadable')
+        with open(unreadable, 'w') as file_:
+            file_.write('unreadable')
+        with self.assertRaises(CoverageException):
+            coverage_combiner.combine(_coverage(self.directory), strict=True)
+        _write(self.directory, 'readable', lines=[1])
+        coverage_combiner.combine(_coverage(self.directory))
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['.coverage', '.coverage.unreadable'])
+
+    def test_nothing_to_combine(self):
+        with self.assertRaises(CoverageException):
+            coverage_combiner.combine(_coverage(self.directory), strict=True)
+        with self.assertRaises(CoverageException):
+            coverage_combiner.combine(_coverage(self.directory), [
+                os.path.join(self.directory, 'missing')])
+
+
+class TestBitsets(TestCase):
+    def test_members(self):
+        numbers = [0, 3, 64, 1000]
+        self.assertEqual(coverage_combiner.members(
+            coverage_combiner.bitset(numbers)), numbers)
+        self.assertEqual(coverage_combiner.members(0), [])
+
+    def test_arc_ends(self):
+        bits = coverage_combiner.bitset(
+            [coverage_combiner._zigzag(end) for end in range(-3, 4)])
+        self.assertEqual(sorted([coverage_combiner._unzigzag(bit) for bit in
+                                 coverage_combiner.members(bits)]),
+                         list(range(-3, 4)))
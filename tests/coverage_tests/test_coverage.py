@@ -1,12 +1,20 @@
 """Test Context Managers"""
 import importlib
+import os
+import shutil
+import sys
+import tempfile
 from unittest import TestCase
 
 import six
-from coverage import CoverageException
+from coverage import Coverage, CoverageException
+from coverage.results import Numbers
 
 from deplytils.contexts import coverage
-from tests.coverage_tests import coverage_fixture
+from deplytils.contexts.coverage_evaluation import (CoverageEvaluation,
+                                                    evaluate)
+from tests.coverage_tests import collector_fixture, coverage_fixture
+from tests.normal.git_fixture import GitRepository
 
 
 # pragma pylint: disable=missing-docstring,unused-variable
@@ -44,6 +52,15 @@ class TestCoverageContext(BaseCoverage):
         with coverage.CoverageContext(silent=True):
             self._reload_import()
 
+    def test_nested_is_mocked(self):
+        with coverage.CoverageContext(report=False) as outer:
+            with coverage.CoverageContext(report=False) as inner:
+                self._reload_import()
+        self.assertIsInstance(inner.coverage, coverage.MockCoverage)
+        with coverage.CoverageContext(report=False) as after:
+            pass
+        self.assertIs(type(after.coverage), type(outer.coverage))
+
 
 class TestStrictCoverage(BaseCoverage):
     def test_meet_threshold(self):
@@ -63,3 +80,195 @@ class TestStrictCoverage(BaseCoverage):
                         source=(self.module_path,))):
                 self._reload_import()
                 coverage_fixture.CoverageFixture()
+
+    def test_nested_threshold(self):
+        with coverage.CoverageContext(report=False):
+            with self.assertRaises(CoverageException) as raised:
+                with coverage.StrictCoverage(
+                        100, mock_kwargs=dict(report=80.0)) as inner:
+                    self._reload_import()
+        self.assertIsInstance(inner.coverage, coverage.MockCoverage)
+        self.assertEqual(str(raised.exception),
+                         '80.00% does not meet 100.00% threshold')
+
+
+class TestEvaluation(BaseCoverage):
+    def setUp(self):
+        self.kwargs = dict(coverage_kwargs=dict(include=[os.path.realpath(
+            os.path.splitext(coverage_fixture.__file__)[0] + '.py')]))
+
+    def _run(self, context):
+        with context:
+            self._reload_import()
+            coverage_fixture.CoverageFixture()
+        return context
+
+    def test_matches_report(self):
+        context = self._run(coverage.StrictCoverage(10, **self.kwargs))
+        self.assertLess(context.result, 100.0)
+        self.assertEqual(context.result, context.coverage.report(
+            file=six.StringIO()))
+        self.assertEqual(context.evaluation.files, {
+            os.path.join('coverage_tests', 'coverage_fixture.py'):
+                context.result})
+        self.assertEqual(context.evaluation.packages,
+                         {'coverage_tests': context.result})
+
+    def test_thresholds(self):
+        context = self._run(coverage.StrictCoverage(
+            10, file_thresholds={'*fixture.py': 10},
+            package_thresholds={'coverage_tests': 10}, **self.kwargs))
+        with self.assertRaises(CoverageException) as raised:
+            self._run(coverage.StrictCoverage(
+                100, file_thresholds={'*fixture.py': 100, '*missing*': 0},
+                package_thresholds={'coverage_tests': 100, 'missing': 0},
+                **self.kwargs))
+        self.assertEqual(str(raised.exception).splitlines(), [
+            '{:0.2f}% does not meet 100.00% threshold'.format(
+                context.result),
+            '{:0.2f}% of coverage_tests{}coverage_fixture.py does not meet '
+            '100.00% threshold'.format(context.result, os.sep),
+            'No coverage data for *missing*',
+            '{:0.2f}% of coverage_tests does not meet 100.00% '
+            'threshold'.format(context.result),
+            'No coverage data for missing'])
+
+    def test_thresholds_need_silent(self):
+        with self.assertRaises(AssertionError):
+            coverage.StrictCoverage(80, silent=False,
+                                    file_thresholds={'*': 100})
+
+    def test_unanalyzable_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'vanished_fixture.py')
+        with open(path, 'w') as file_:
+            file_.write('VANISHED = True\n')
+        sys.path.insert(0, directory)
+        self.addCleanup(sys.path.remove, directory)
+        self.addCleanup(sys.modules.pop, 'vanished_fixture', None)
+
+        measured = Coverage(config_file=False, include=[
+            os.path.realpath(path)] + self.kwargs['coverage_kwargs'][
+                'include'])
+        measured.start()
+        try:
+            importlib.import_module('vanished_fixture')
+            self._reload_import()
+        finally:
+            measured.stop()
+        os.remove(path)
+
+        evaluation = evaluate(measured)
+        self.assertEqual(list(evaluation.files), [
+            os.path.join('coverage_tests', 'coverage_fixture.py')])
+        self.assertEqual(list(evaluation.errors), [os.path.realpath(path)])
+        self.assertTrue(evaluation.errors[os.path.realpath(path)].startswith(
+            'NoSource: '))
+        self.assertEqual(evaluate(measured, ignore_errors=True).errors, {})
+
+    def test_no_statements(self):
+        evaluation = CoverageEvaluation()
+        self.assertEqual(evaluation.total, 0.0)
+        evaluation.add(os.path.join('package', 'empty.py'), Numbers())
+        self.assertEqual(evaluation.total, 100.0)
+        self.assertEqual(evaluation.files,
+                         {os.path.join('package', 'empty.py'): 100.0})
+        self.assertEqual(evaluation.packages, {'package': 100.0})
+
+
+class TestShareOuter(BaseCoverage):
+    def test_inner_threshold(self):
+        square_path = os.path.realpath(
+            os.path.splitext(collector_fixture.__file__)[0] + '.py')
+        outer = coverage.CoverageContext(coverage_kwargs=dict(
+            branch=True, include=['*fixture*']))
+        inner = coverage.StrictCoverage(
+            100, share_outer=True, coverage_kwargs=dict(include=[square_path]))
+        with self.assertRaises(CoverageException) as raised:
+            with outer:
+                self._reload_import()
+                with inner:
+                    collector_fixture.square(2)
+        self.assertGreater(inner.result, 0.0)
+        self.assertEqual(str(raised.exception), (
+            '{:0.2f}% does not meet 100.00% threshold'.format(inner.result)))
+        self.assertEqual(inner.evaluation.files, {
+            os.path.relpath(square_path): inner.result})
+
+        data = outer.coverage.get_data()
+        self.assertEqual(len(data.measured_files()), 2)
+        self.assertIn(square_path, data.measured_files())
+
+    def test_outer(self):
+        with coverage.CoverageContext(share_outer=True,
+                                      report=False) as context:
+            pass
+        self.assertIs(context.tracer, context.coverage)
+
+
+class TestChangedSince(TestCase):
+    def setUp(self):
+        self.repository = GitRepository()
+        self.addCleanup(self.repository.remove)
+        self.repository.write('changed_fixture.py', _CHANGED_FIXTURE)
+        self.repository.commit()
+        self.repository.git('branch', 'base')
+
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.repository.path)
+        sys.path.insert(0, os.path.realpath(self.repository.path))
+        self.addCleanup(sys.path.remove, sys.path[0])
+        self.addCleanup(sys.modules.pop, 'changed_fixture', None)
+
+    def _change(self):
+        self.repository.write('changed_fixture.py', _CHANGED_FIXTURE.replace(
+            'return', 'return 10 *'))
+        self.repository.write('omitted_fixture.py', _CHANGED_FIXTURE)
+        self.repository.write('README.md', 'Not python')
+
+    @staticmethod
+    def _run(context):
+        sys.modules.pop('changed_fixture', None)
+        with context:
+            importlib.import_module('changed_fixture').covered()
+        return context
+
+    def test_changed_lines(self):
+        self._change()
+        context = self._run(coverage.CoverageContext(
+            changed_since='base', coverage_kwargs=dict(omit=['*omitted*'])))
+        self.assertEqual(context.changed_result, 50.0)
+        self.assertLess(context.result, 100.0)
+
+        with self.assertRaises(CoverageException) as raised:
+            self._run(coverage.StrictCoverage(100, changed_since='base'))
+        self.assertIn('16.67% of changed lines', str(raised.exception))
+
+    def test_mocked(self):
+        self._change()
+        with coverage.CoverageContext(report=False):
+            context = self._run(coverage.StrictCoverage(
+                50, changed_since='base', mock_kwargs=dict(report=100.0)))
+        self.assertIsInstance(context.coverage, coverage.MockCoverage)
+        self.assertIsNone(context.changed_result)
+        self.assertEqual(context.result, 100.0)
+
+    def test_nothing_changed(self):
+        context = coverage.StrictCoverage(100, changed_since='base')
+        with context:
+            pass
+        self.assertEqual(context.result, 100.0)
+        self.assertEqual(context.changed_result, 100.0)
+
+
+_CHANGED_FIXTURE = '''"""Fixture changed since a git ref"""
+
+
+def covered():
+    return 1
+
+
+def uncovered():
+    return 2
+'''
@@ -0,0 +1,61 @@
+"""Test measuring blocks with the tracer of a running coverage"""
+import os
+from unittest import TestCase
+
+from coverage import Coverage
+
+from deplytils.contexts.coverage_shared import SharedTracer
+from tests.coverage_tests import collector_fixture, coverage_fixture
+
+
+def _path(module):
+    return os.path.realpath(os.path.splitext(module.__file__)[0] + '.py')
+
+
+SQUARE_PATH = _path(collector_fixture)
+RETURN_LINE = collector_fixture.square.__code__.co_firstlineno + 1
+
+
+# pragma pylint: disable=missing-docstring,unused-variable
+# noinspection PyMissingOrEmptyDocstring
+class TestSharedTracer(TestCase):
+    @staticmethod
+    def _block(branch, **kwargs):
+        outer = Coverage(branch=branch, include=[
+            SQUARE_PATH, _path(coverage_fixture)])
+        outer.start()
+        collector_fixture.square(1)
+        outer.stop()
+
+        inner = Coverage(branch=branch, **kwargs)
+        tracer = SharedTracer(outer, inner)
+        tracer.start()
+        outer.start()
+        coverage_fixture.CoverageFixture()
+        outer.stop()
+        tracer.stop()
+        return outer, inner
+
+    def test_block(self):
+        outer, inner = self._block(True, include=[SQUARE_PATH])
+        self.assertEqual(inner.get_data().measured_files(), [])
+
+        outer, inner = self._block(True, omit=[SQUARE_PATH])
+        self.assertEqual(inner.get_data().measured_files(),
+                         [_path(coverage_fixture)])
+        self.assertTrue(inner.get_data().has_arcs())
+        self.assertIn(RETURN_LINE, outer.get_data().lines(SQUARE_PATH))
+
+    def test_lines(self):
+        outer, inner = self._block(False)
+        self.assertEqual(inner.get_data().measured_files(),
+                         [_path(coverage_fixture)])
+        self.assertFalse(inner.get_data().has_arcs())
+        self.assertEqual(outer.get_data().lines(SQUARE_PATH), [RETURN_LINE])
+
+    def test_unstarted_outer(self):
+        inner = Coverage()
+        tracer = SharedTracer(Coverage(), inner)
+        tracer.start()
+        tracer.stop()
+        self.assertEqual(inner.get_data().measured_files(), [])
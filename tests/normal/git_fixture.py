@@ -0,0 +1,37 @@
+"""Fixture building throwaway git repositories"""
+import os
+import shutil
+import subprocess
+import tempfile
+
+
+# pragma pylint: disable=unused-variable
+class GitRepository(object):
+    """Git repository in a temporary directory"""
+    def __init__(self):
+        self.path = tempfile.mkdtemp()
+        self.git('init', '-q')
+
+    def git(self, *args):
+        """Run a git command in the repository"""
+        subprocess.check_call(
+            ('git', '-c', 'user.name=deplytils',
+             '-c', 'user.email=deplytils@example.com') + args, cwd=self.path)
+
+    def write(self, name, content=''):
+        """Write a file, creating its directories, and return its path"""
+        path = os.path.join(self.path, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as file_:
+            file_.write(content)
+        return path
+
+    def commit(self):
+        """Commit every file"""
+        self.git('add', '-A')
+        self.git('commit', '-q', '-m', 'commit')
+
+    def remove(self):
+        """Delete the repository"""
+        shutil.rmtree(self.path)
@@ -0,0 +1,11 @@
+"""Sample executing deplytils.cache, run by the impact tests"""
+import unittest
+
+from deplytils.cache import hash_key
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestCache(unittest.TestCase):
+    def test_hash(self):
+        self.assertEqual(hash_key('a'), hash_key('a'))
@@ -0,0 +1,14 @@
+"""Sample executing deplytils.discovery, run by the impact tests"""
+import os
+import unittest
+
+from deplytils.discovery import iter_package_files
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestDiscovery(unittest.TestCase):
+    def test_files(self):
+        self.assertIn('impact_discovery.py', [
+            os.path.basename(path) for path in iter_package_files(
+                os.path.dirname(__file__), gitignore=False)])
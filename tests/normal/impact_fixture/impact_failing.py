@@ -0,0 +1,9 @@
+"""Failing sample, run by the impact tests"""
+import unittest
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestFailing(unittest.TestCase):
+    def test_failure(self):
+        self.fail('sample failure')
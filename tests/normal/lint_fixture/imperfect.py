@@ -0,0 +1,7 @@
+"""Fixture with known lint messages -- not a package, so not linted"""
+import os
+
+
+def unused(argument):
+    """Unused argument"""
+    return 1
@@ -0,0 +1,6 @@
+"""Fixture with a known lint message"""
+
+
+def undefined():
+    """Undefined variable"""
+    return missing_name
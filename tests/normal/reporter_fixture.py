@@ -0,0 +1,9 @@
+"""Fixture collecting pylint messages"""
+from pylint.reporters import CollectingReporter
+
+
+# pragma pylint: disable=unused-variable
+class MessageCollector(CollectingReporter):
+    """Collects messages, displaying nothing"""
+    def _display(self, layout):
+        pass
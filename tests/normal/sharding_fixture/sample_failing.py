@@ -0,0 +1,20 @@
+"""Failing samples, run by the sharding tests"""
+import unittest
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestFailing(unittest.TestCase):
+    def test_failure(self):
+        self.fail('sample failure')
+
+    def test_error(self):
+        raise ValueError('sample error')
+
+    @unittest.expectedFailure
+    def test_expected_failure(self):
+        self.fail()
+
+    @unittest.expectedFailure
+    def test_unexpected_success(self):
+        pass
@@ -0,0 +1,132 @@
+"""Test Async Decorators"""
+from unittest import TestCase, skipIf
+
+try:
+    import asyncio
+    from deplytils.async_decorators import (
+        cached_async_class_property, cached_async_property)
+except ImportError:  # python 2
+    asyncio = None
+
+
+def _later(result=None, error=None):
+    """Future resolved by the event loop"""
+    future = asyncio.Future()
+    if error is None:
+        asyncio.get_event_loop().call_soon(future.set_result, result)
+    else:
+        asyncio.get_event_loop().call_soon(future.set_exception, error)
+    return future
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+# noinspection PyMissingOrEmptyDocstring
+@skipIf(asyncio is None, 'requires asyncio')
+class AsyncTestCase(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.calls = []
+        self.errors = []
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def compute(self, owner):
+        self.calls.append(owner)
+        if self.errors:
+            return _later(error=self.errors.pop())
+        return _later([len(self.calls)])
+
+    def gather(self, *awaitables):
+        return self.loop.run_until_complete(asyncio.gather(
+            *awaitables, return_exceptions=True))
+
+
+# noinspection PyMissingOrEmptyDocstring
+class TestCachedAsyncClassProperty(AsyncTestCase):
+    def setUp(self):
+        super(TestCachedAsyncClassProperty, self).setUp()
+        compute = self.compute
+
+        # noinspection PyMissingOrEmptyDocstring
+        class TestClass(object):
+            # pylint: disable=no-self-argument
+            # noinspection PyMethodParameters
+            @cached_async_class_property
+            def property(cls):
+                return compute(cls)
+
+        self.class_ = TestClass
+
+    def test_awaits_share_computation(self):
+        first, second = self.gather(self.class_.property,
+                                    self.class_().property)
+        self.assertEqual(first, [1])
+        self.assertIs(first, second)
+        self.assertIs(self.gather(self.class_.property)[0], first)
+        self.assertEqual(self.calls, [self.class_])
+
+    def test_subclasses_compute_own(self):
+        class SubClass(self.class_):
+            pass
+
+        self.assertEqual(self.gather(self.class_.property,
+                                     SubClass.property), [[1], [2]])
+
+    def test_failure_is_not_cached(self):
+        self.errors.append(ValueError('backend down'))
+        first, second = self.gather(self.class_.property,
+                                    self.class_.property)
+        self.assertIsInstance(first, ValueError)
+        self.assertIs(first, second)
+        self.assertEqual(self.gather(self.class_.property), [[2]])
+
+    def test_cancel_keeps_computation(self):
+        cancelled = asyncio.ensure_future(self.class_.property)
+        kept = self.class_.property
+        cancelled.cancel()
+        self.assertEqual(self.gather(kept)[0], [1])
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(len(self.calls), 1)
+
+    def test_delete_invalidates(self):
+        self.gather(self.class_.property)
+        del self.class_.property
+        self.assertEqual(self.gather(self.class_.property), [[2]])
+
+
+# noinspection PyMissingOrEmptyDocstring
+class TestCachedAsyncProperty(AsyncTestCase):
+    def setUp(self):
+        super(TestCachedAsyncProperty, self).setUp()
+        compute = self.compute
+
+        # noinspection PyMissingOrEmptyDocstring
+        class TestClass(object):
+            @cached_async_property
+            def property(self):
+                return compute(self)
+
+        self.class_ = TestClass
+
+    def test_awaits_share_computation(self):
+        instance = self.class_()
+        first, second = self.gather(instance.property, instance.property)
+        self.assertIs(first, second)
+        self.assertEqual(self.gather(self.class_().property), [[2]])
+        self.assertIsInstance(self.class_.property, cached_async_property)
+
+    def test_failure_is_not_cached(self):
+        instance = self.class_()
+        self.errors.append(ValueError('backend down'))
+        self.assertIsInstance(self.gather(instance.property)[0], ValueError)
+        self.assertEqual(self.gather(instance.property), [[2]])
+
+    def test_delete_invalidates(self):
+        instance = self.class_()
+        self.gather(instance.property)
+        del instance.property
+        self.assertEqual(self.gather(instance.property), [[2]])
@@ -0,0 +1,72 @@
+"""Test Benchmarks"""
+import json
+import os
+import runpy
+import sys
+import tempfile
+from unittest import TestCase
+
+import six
+
+from deplytils.bench import compare, main
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestBench(TestCase):
+    def test_discovery(self):
+        output = six.StringIO()
+        results = main(['discovery', '--scale', '0.0005'], output=output)
+        self.assertEqual(json.loads(output.getvalue()),
+                         {'suite': 'discovery', 'results': results})
+        self.assertEqual(results['found'], {'legacy_walk': 20,
+                                            'iter_package_files': 10})
+
+    def test_combine(self):
+        results = main(['combine', '--scale', '0.002'], output=six.StringIO())
+        self.assertEqual(results['shards'], 2)
+        self.assertEqual(results['files'], 20)
+        self.assertEqual(results['totals']['bulk_combine'],
+                         results['totals']['coverage_combine'])
+
+    def test_access(self):
+        results = main(['access', '--scale', '0.001'], output=six.StringIO())
+        self.assertEqual(results['reads'], 1000)
+        self.assertEqual(results['ratios']['attribute'], 1.0)
+        self.assertIn('installed_cached_class_property',
+                      results['nanoseconds'])
+
+    def test_module_entry_point(self):
+        argv = sys.argv
+        stdout = sys.stdout
+        sys.argv = ['deplytils.bench', 'discovery', '--scale', '0.0001']
+        sys.stdout = six.StringIO()
+        try:
+            runpy.run_module('deplytils.bench', run_name='__main__')
+            self.assertIn('"suite": "discovery"', sys.stdout.getvalue())
+        finally:
+            sys.argv = argv
+            sys.stdout = stdout
+
+    def test_baseline(self):
+        baseline = tempfile.NamedTemporaryFile('w', delete=False)
+        try:
+            with baseline:
+                main(['discovery', '--scale', '0.0005'], output=baseline)
+            output = six.StringIO()
+            results = main(['discovery', '--scale', '0.0005', '--baseline',
+                            baseline.name], output=output)
+        finally:
+            os.remove(baseline.name)
+        ratios = json.loads(output.getvalue())['baseline']
+        self.assertEqual(ratios['found'], {'legacy_walk': 1.0,
+                                           'iter_package_files': 1.0})
+        self.assertEqual(sorted(ratios), sorted(results))
+
+    def test_compare(self):
+        self.assertEqual(
+            compare({'time': 3, 'nested': {'time': 1.0, 'new': 1.0},
+                     'zero': 1, 'flag': True, 'name': 'a'},
+                    {'time': 2, 'nested': {'time': 4.0}, 'zero': 0,
+                     'flag': True, 'name': 'a'}),
+            {'time': 1.5, 'nested': {'time': 0.25}})
@@ -0,0 +1,71 @@
+"""Test Caches"""
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from deplytils.cache import PickleCache, ResultCache, hash_key
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestHashKey(TestCase):
+    def test_parts_are_delimited(self):
+        self.assertNotEqual(hash_key('ab', 'c'), hash_key('a', 'bc'))
+
+    def test_str_and_bytes_agree(self):
+        self.assertEqual(hash_key('key'), hash_key(b'key'))
+
+
+class TestResultCache(TestCase):
+    def setUp(self):
+        self.directory = os.path.join(tempfile.mkdtemp(), 'cache')
+        self.cache = ResultCache(self.directory, max_entries=2)
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.directory))
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get('missing'))
+        self.assertEqual(self.cache.get('missing', 1), 1)
+
+    def test_round_trip(self):
+        self.cache.set('key', {'messages': [1, 2]})
+        self.assertEqual(self.cache.get('key'), {'messages': [1, 2]})
+        self.assertEqual(ResultCache(self.directory).get('key'),
+                         {'messages': [1, 2]})
+
+    def test_prune_evicts_least_used(self):
+        for index, key in enumerate(('first', 'second', 'third')):
+            self.cache.set(key, index)
+            path = os.path.join(self.directory, '{}.json'.format(key))
+            os.utime(path, (index, index))
+        self.cache.get('first')
+        self.cache.prune()
+        self.assertEqual(self.cache.get('first'), 0)
+        self.assertIsNone(self.cache.get('second'))
+        self.assertEqual(self.cache.get('third'), 2)
+
+
+class TestPickleCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = PickleCache(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        self.cache.set('key', {'rules': (1, 2)})
+        self.assertEqual(PickleCache(self.directory).get('key'),
+                         {'rules': (1, 2)})
+
+    def test_corrupt_entry_is_a_miss(self):
+        with open(os.path.join(self.directory, 'key.pickle'), 'wb') as file_:
+            file_.write(b'corrupt')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_failed_set_leaves_no_file(self):
+        with self.assertRaises(Exception):
+            self.cache.set('key', lambda: None)
+        self.assertEqual(os.listdir(self.directory), [])
@@ -1,7 +1,34 @@
 """Test Decorators"""
+import copy
+import gc
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
 from unittest import TestCase
 
-from deplytils.decorators import cached_class_property, class_property
+from deplytils.decorators import (
+    cached_class_property, cached_classmethod, cached_property,
+    class_property, invalidate)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class _Copied(object):
+    """Instances cached by a cached_property, pickled by the tests"""
+    computed = 0
+
+    @cached_property
+    def value(self):
+        """Computed once per instance"""
+        type(self).computed += 1
+        return [type(self).computed]
 
 
 # pylint: disable=unused-variable
@@ -51,6 +78,347 @@ class TestCachedClassProperty(TestCase):
         del self.class_.property
         self.test_full_delete_class_property()
 
+    def test_cached_per_subclass(self):
+        class SubClass(self.class_):
+            times_processed = 10
+
+        self.assertEqual(SubClass.property, 11)
+        self.assertEqual(self.class_.property, 1)
+        self.assertEqual(SubClass.property, 11)
+        del self.class_.property
+        self.assertEqual(SubClass.property, 12)
+        with self.assertRaises(AttributeError):
+            del SubClass.property
+
+    def test_computed_once_concurrently(self):
+        started = threading.Event()
+        values = []
+
+        class Slow(object):
+            computed = 0
+
+            # pylint: disable=no-self-argument
+            # noinspection PyMethodParameters
+            @cached_class_property
+            def property(cls):
+                started.set()
+                time.sleep(0.05)
+                cls.computed += 1
+                return object()
+
+        threads = [threading.Thread(target=lambda: values.append(
+            Slow.property)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+            started.wait()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(Slow.computed, 1)
+        self.assertEqual(len(set(id(value) for value in values)), 1)
+
+    def test_failure_not_cached(self):
+        failures = [ValueError()]
+
+        class Failing(object):
+            # pylint: disable=no-self-argument
+            # noinspection PyMethodParameters
+            @cached_class_property
+            def property(cls):
+                if failures:
+                    raise failures.pop()
+                return cls
+
+        with self.assertRaises(ValueError):
+            _ = Failing.property
+        self.assertIs(Failing.property, Failing)
+
+    def test_classes_collected(self):
+        descriptor = vars(self.class_)['property']
+        self.assertEqual(self.class_.property, 1)
+        self.assertEqual(len(descriptor.values), 1)
+        self.class_ = self.instance = None
+        gc.collect()
+        self.assertEqual(len(descriptor.values), 0)
+
+    def test_outside_of_class(self):
+        class Plain(object):
+            pass
+
+        descriptor = cached_class_property(lambda cls: cls.__name__)
+        self.assertEqual(descriptor.__get__(None, Plain), 'Plain')
+        del descriptor
+        self.assertFalse(hasattr(Plain, '<lambda>'))
+
+
+# noinspection PyMissingOrEmptyDocstring
+class TestExpiringCachedClassProperty(TestCase):
+    def setUp(self):
+        self.failures = []
+        self.released = threading.Event()
+        self.released.set()
+        failures, released = self.failures, self.released
+
+        # noinspection PyMissingOrEmptyDocstring
+        class TestClass(object):
+            times_processed = 0
+
+            # pylint: disable=no-self-argument
+            # noinspection PyMethodParameters
+            @cached_class_property(ttl=0.05)
+            def expiring(cls):
+                cls.times_processed += 1
+                return cls.times_processed
+
+            # pylint: disable=no-self-argument
+            # noinspection PyMethodParameters
+            @cached_class_property(ttl=0.05, stale_while_revalidate=True)
+            def stale(cls):
+                released.wait(5)
+                if failures:
+                    raise failures.pop()
+                cls.times_processed += 1
+                return cls.times_processed
+
+        self.class_ = TestClass
+
+    def test_expires(self):
+        self.assertEqual(self.class_.expiring, 1)
+        self.assertEqual(self.class_.expiring, 1)
+        time.sleep(0.1)
+        self.assertEqual(self.class_.expiring, 2)
+        self.assertEqual(vars(self.class_)['expiring'].stats, {
+            'hits': 1, 'misses': 1, 'refreshes': 1, 'errors': 0})
+
+    def test_stale_while_revalidate(self):
+        stats = vars(self.class_)['stale'].stats
+        self.assertEqual(self.class_.stale, 1)
+        self.released.clear()
+        time.sleep(0.1)
+        self.assertEqual(self.class_.stale, 1)
+        self.assertEqual(self.class_.stale, 1)
+        self.released.set()
+        _wait_for(lambda: stats['refreshes'])
+        self.assertEqual(self.class_.stale, 2)
+        self.assertEqual(stats, {
+            'hits': 3, 'misses': 1, 'refreshes': 1, 'errors': 0})
+
+    def test_failed_refresh_kept(self):
+        stats = vars(self.class_)['stale'].stats
+        self.assertEqual(self.class_.stale, 1)
+        self.failures.append(ValueError())
+        time.sleep(0.1)
+        self.assertEqual(self.class_.stale, 1)
+        _wait_for(lambda: stats['errors'])
+        self.assertEqual(stats['errors'], 1)
+        _wait_for(lambda: stats['refreshes'] or self.class_.stale == 2)
+        self.assertEqual(self.class_.stale, 2)
+
+    def test_options_kept(self):
+        self.assertEqual(self.class_.expiring, 1)
+        del self.class_.expiring
+        self.assertEqual(vars(self.class_)['expiring'].options['ttl'], 0.05)
+        self.assertEqual(self.class_.expiring, 2)
+
+
+# noinspection PyMissingOrEmptyDocstring
+class TestInstalledCachedClassProperty(TestCase):
+    def setUp(self):
+        # noinspection PyMissingOrEmptyDocstring
+        class TestClass(object):
+            times_processed = 0
+
+            # pylint: disable=no-self-argument
+            # noinspection PyMethodParameters
+            @cached_class_property(install=True)
+            def property(cls):
+                cls.times_processed += 1
+                return cls.times_processed
+
+        self.class_ = TestClass
+
+    def test_value_installed(self):
+        self.assertEqual(self.class_.property, 1)
+        self.assertEqual(vars(self.class_)['property'], 1)
+        self.assertEqual(self.class_().property, 1)
+        self.assertEqual(self.class_.times_processed, 1)
+
+    def test_invalidate(self):
+        class SubClass(self.class_):
+            times_processed = 10
+
+        self.assertEqual(SubClass.property, 11)
+        self.assertEqual(self.class_.property, 1)
+        invalidate(self.class_, 'property')
+        self.assertIsInstance(vars(self.class_)['property'],
+                              cached_class_property)
+        self.assertNotIn('property', vars(SubClass))
+        self.assertEqual(SubClass.property, 12)
+        self.assertEqual(self.class_.property, 2)
+
+    def test_invalidate_not_installed(self):
+        class Cached(object):
+            # pylint: disable=no-self-argument
+            # noinspection PyMethodParameters
+            @cached_class_property
+            def property(cls):
+                return [cls]
+
+        class SubClass(Cached):
+            pass
+
+        value, sub_value = Cached.property, SubClass.property
+        invalidate(SubClass, 'property')
+        invalidate(Cached, 'missing')
+        self.assertIs(Cached.property, value)
+        self.assertIsNot(SubClass.property, sub_value)
+
+    def test_never_expires(self):
+        with self.assertRaises(ValueError):
+            cached_class_property(lambda cls: 1, ttl=1, install=True)
+
+
+# noinspection PyMissingOrEmptyDocstring
+class TestPersistentCachedClassProperty(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_class(self, version=''):
+        calls = self.calls
+
+        # noinspection PyMissingOrEmptyDocstring
+        class Persisted(object):
+            # pylint: disable=no-self-argument
+            # noinspection PyMethodParameters
+            @cached_class_property(persist_dir=self.directory,
+                                   version=version)
+            def property(cls):
+                calls.append(cls)
+                return {'rules': [1, 2]}
+
+        return Persisted
+
+    def test_later_classes_load(self):
+        self.assertEqual(self.make_class().property, {'rules': [1, 2]})
+        self.assertEqual(self.make_class().property, {'rules': [1, 2]})
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_version_invalidates(self):
+        self.assertEqual(self.make_class().property,
+                         self.make_class('2').property)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_unpicklable_in_memory(self):
+        class Unpicklable(object):
+            # pylint: disable=no-self-argument
+            # noinspection PyMethodParameters
+            @cached_class_property(persist_dir=self.directory)
+            def property(cls):
+                return lambda: cls
+
+        self.assertIs(Unpicklable.property, Unpicklable.property)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_never_expires(self):
+        with self.assertRaises(ValueError):
+            cached_class_property(lambda cls: 1, ttl=1,
+                                  persist_dir=self.directory)
+
+
+# noinspection PyMissingOrEmptyDocstring
+class TestCachedProperty(TestCase):
+    def setUp(self):
+        # noinspection PyMissingOrEmptyDocstring
+        class TestClass(object):
+            times_processed = 0
+
+            @cached_property
+            def property(self):
+                type(self).times_processed += 1
+                return self.times_processed
+
+            @cached_property(ttl=0.05)
+            def expiring(self):
+                type(self).times_processed += 1
+                return self.times_processed
+
+        self.class_ = TestClass
+
+    def test_cached_per_instance(self):
+        first, second = self.class_(), self.class_()
+        self.assertEqual(first.property, 1)
+        self.assertEqual(second.property, 2)
+        self.assertEqual(first.property, 1)
+        self.assertEqual(vars(self.class_)['property'].stats['hits'], 1)
+
+    def test_delete_invalidates(self):
+        instance = self.class_()
+        with self.assertRaises(AttributeError):
+            del instance.property
+        self.assertEqual(instance.property, 1)
+        del instance.property
+        self.assertEqual(instance.property, 2)
+        with self.assertRaises(AttributeError):
+            instance.property = 3
+
+    def test_expires(self):
+        instance = self.class_()
+        self.assertEqual(instance.expiring, 1)
+        time.sleep(0.1)
+        self.assertEqual(instance.expiring, 2)
+        self.assertIsInstance(self.class_.expiring, cached_property)
+
+    def test_pickle_and_deepcopy(self):
+        instance = _Copied()
+        value = instance.value
+        for copied in (pickle.loads(pickle.dumps(instance)),
+                       copy.deepcopy(instance)):
+            self.assertEqual(copied.value, value)
+            del copied.value
+            self.assertNotEqual(copied.value, value)
+        self.assertEqual(instance.value, value)
+
+
+# pylint: disable=no-value-for-parameter
+# noinspection PyMissingOrEmptyDocstring
+class TestCachedClassmethod(TestCase):
+    def setUp(self):
+        self.calls = []
+        calls = self.calls
+
+        # noinspection PyMissingOrEmptyDocstring
+        class TestClass(object):
+            # pylint: disable=no-self-argument
+            # noinspection PyMethodParameters
+            @cached_classmethod(maxsize=2)
+            def method(cls, number, power=1):
+                calls.append(number)
+                return cls, number ** power
+
+        self.class_ = TestClass
+
+    def test_cached_by_arguments(self):
+        class SubClass(self.class_):
+            pass
+
+        self.assertEqual(self.class_.method(2), (self.class_, 2))
+        self.assertEqual(self.class_().method(2), (self.class_, 2))
+        self.assertEqual(SubClass.method(2, power=2), (SubClass, 4))
+        self.assertEqual(self.calls, [2, 2])
+        self.assertEqual(vars(self.class_)['method'].stats['hits'], 1)
+
+    def test_lru_evicted(self):
+        for number in [1, 2, 1, 3, 1, 2]:
+            self.class_.method(number)
+        self.assertEqual(self.calls, [1, 2, 3, 2])
+        vars(self.class_)['method'].clear()
+        self.class_.method(1)
+        self.assertEqual(self.calls, [1, 2, 3, 2, 1])
+
 
 # pylint: disable=unused-variable
 class TestClassProperty(TestCase):
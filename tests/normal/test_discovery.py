@@ -0,0 +1,58 @@
+"""Test Discovery"""
+import os
+from unittest import TestCase
+
+from deplytils.discovery import iter_package_files
+from tests.normal.git_fixture import GitRepository
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestIterPackageFiles(TestCase):
+    def setUp(self):
+        self.repository = GitRepository()
+        self.addCleanup(self.repository.remove)
+        for name in ('top.py', 'top_local.py', 'notes.txt',
+                     'package/__init__.py', 'package/module.py',
+                     'package/sub/__init__.py', 'package/sub/module.py',
+                     'package/build/__init__.py', 'package/build/module.py',
+                     'package/locale/__init__.py',
+                     'not_package/module.py',
+                     'not_package/nested/__init__.py'):
+            self.repository.write(name)
+
+    def _files(self, **kwargs):
+        return [os.path.relpath(path, self.repository.path)
+                for path in iter_package_files(self.repository.path,
+                                               **kwargs)]
+
+    def test_packages_only(self):
+        self.assertEqual(self._files(), [
+            'top.py', os.path.join('package', '__init__.py'),
+            os.path.join('package', 'module.py'),
+            os.path.join('package', 'build', '__init__.py'),
+            os.path.join('package', 'build', 'module.py'),
+            os.path.join('package', 'locale', '__init__.py'),
+            os.path.join('package', 'sub', '__init__.py'),
+            os.path.join('package', 'sub', 'module.py')])
+
+    def test_is_lazy(self):
+        files = iter_package_files(self.repository.path)
+        self.assertEqual(os.path.basename(next(files)), 'top.py')
+
+    def test_globs(self):
+        self.assertEqual(self._files(
+            includes=('*.py', '*.txt'),
+            excludes=('sub', 'loc*', 'package/mod*', '*init*')), [
+                'notes.txt', 'top.py', 'top_local.py',
+                os.path.join('package', 'build', 'module.py')])
+
+    def test_gitignore(self):
+        self.repository.write('.gitignore', 'build/\ntop.py\n')
+        self.assertEqual(self._files(gitignore=True), [
+            os.path.join('package', '__init__.py'),
+            os.path.join('package', 'module.py'),
+            os.path.join('package', 'locale', '__init__.py'),
+            os.path.join('package', 'sub', '__init__.py'),
+            os.path.join('package', 'sub', 'module.py')])
+        self.assertIn('top.py', self._files())
@@ -1,8 +1,15 @@
 """Test Extensions"""
+import json
+import os
+import shutil
+import tempfile
 import warnings
 from unittest import TestCase
 
+from deplytils.extensions import lint
 from deplytils.extensions.lint import ProjectLinter
+from tests.normal.git_fixture import GitRepository
+from tests.normal.reporter_fixture import MessageCollector
 
 
 # pylint: disable=unused-variable
@@ -24,3 +31,111 @@ class TestLintExtensions(TestCase):
             warnings.filterwarnings(
                 "ignore", category=PendingDeprecationWarning)
             ProjectLinter('../deplytils', '.pylintrc').run()
+
+    def test_deplytils_in_parallel(self):
+        self._lint('../deplytils', '.pylintrc', jobs=2)
+
+    def test_deplytils_in_process_py3k(self):
+        self._lint('../deplytils', args=['--py3k'], jobs=1)
+
+    def test_sharded_matches_serial(self):
+        serial = MessageCollector()
+        with self.assertRaises(AssertionError):
+            self._lint('normal/lint_fixture', reporter=serial)
+        self.assertTrue(serial.messages)
+        for jobs in (1, 2):
+            sharded = MessageCollector()
+            with self.assertRaises(AssertionError):
+                self._lint('normal/lint_fixture', reporter=sharded, jobs=jobs)
+            self.assertEqual(sorted(serial.messages), sorted(sharded.messages))
+
+    def test_cache_replays_results(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        linted = MessageCollector()
+        with self.assertRaises(AssertionError):
+            self._lint('normal/lint_fixture', reporter=linted,
+                       cache_dir=cache_dir)
+
+        lint_shard = lint.lint_shard
+        lint.lint_shard = None
+        try:
+            cached = MessageCollector()
+            with self.assertRaises(AssertionError):
+                self._lint('normal/lint_fixture', reporter=cached,
+                           cache_dir=cache_dir, jobs=2)
+        finally:
+            lint.lint_shard = lint_shard
+        self.assertEqual(sorted(linted.messages), sorted(cached.messages))
+
+        bypassed = MessageCollector()
+        with self.assertRaises(AssertionError):
+            self._lint('normal/lint_fixture', reporter=bypassed,
+                       cache_dir=cache_dir, args=['--no-cache'])
+        self.assertEqual(sorted(linted.messages), sorted(bypassed.messages))
+
+    def test_no_cache_without_cache_dir(self):
+        collected = MessageCollector()
+        with self.assertRaises(AssertionError):
+            self._lint('normal/lint_fixture', reporter=collected,
+                       args=['--no-cache'])
+        self.assertTrue(collected.messages)
+
+    def test_changed_since(self):
+        repository = GitRepository()
+        self.addCleanup(repository.remove)
+        repository.write('package/__init__.py', _CLEAN_MODULE)
+        repository.write('package/clean.py', _CLEAN_MODULE)
+        repository.write('package/unclean.py', 'import os\n')
+        repository.write('other/__init__.py', _CLEAN_MODULE)
+        repository.write('other/unclean.py', 'import os\n')
+        repository.commit()
+        repository.git('branch', 'base')
+
+        self._lint(repository.path, changed_since='base')
+        repository.write('package/clean.py',
+                         _CLEAN_MODULE.replace('sep', 'curdir'))
+        self._lint(repository.path, changed_since='base', jobs=1)
+        with self.assertRaises(AssertionError):
+            self._lint(repository.path, changed_since='base')
+
+    def test_profile(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache_dir = os.path.join(directory, 'cache')
+        output = os.path.join(directory, 'timings.json')
+        linter = ProjectLinter('normal/lint_fixture', cache_dir=cache_dir,
+                               profile_output=output, args=['--profile-top=1'])
+        with self.assertRaises(AssertionError):
+            self._lint(linter=linter)
+
+        timings = linter.timings
+        self.assertEqual(len(timings['files']), 2)
+        self.assertEqual(timings['cached'], 0)
+        self.assertEqual(len(timings['slowest_files']), 1)
+        self.assertEqual(len(timings['slowest_checkers']), 1)
+        self.assertIn('variables', timings['checkers'])
+        self.assertGreater(timings['inference'], 0)
+        self.assertGreaterEqual(timings['time'],
+                                timings['slowest_files'][0][1])
+        with open(output) as file_:
+            self.assertEqual(json.load(file_), timings)
+
+        linter = ProjectLinter('normal/lint_fixture', cache_dir=cache_dir,
+                               profile=True)
+        with self.assertRaises(AssertionError):
+            self._lint(linter=linter)
+        self.assertEqual(linter.timings['cached'], 2)
+        self.assertEqual(linter.timings['files'], {})
+
+    @staticmethod
+    def _lint(*args, **kwargs):
+        linter = kwargs.pop('linter', None) or ProjectLinter(*args, **kwargs)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+            warnings.filterwarnings(
+                "ignore", category=PendingDeprecationWarning)
+            linter.run()
+
+
+_CLEAN_MODULE = '"""Clean module"""\nimport os\n\nprint(os.sep)\n'
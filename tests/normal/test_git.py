@@ -0,0 +1,108 @@
+"""Test Git Helpers"""
+import os
+import subprocess
+from unittest import TestCase
+
+from deplytils.git import changed_files, changed_lines, ignored_files
+from tests.normal.git_fixture import GitRepository
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestChangedFiles(TestCase):
+    def setUp(self):
+        self.repository = GitRepository()
+        self.addCleanup(self.repository.remove)
+        self.repository.write('kept.py')
+        self.repository.write('modified.py')
+        self.repository.write('deleted.py')
+        self.repository.commit()
+        self.repository.git('branch', 'base')
+
+    def _changed_files(self, ref='base'):
+        return set(os.path.relpath(path, os.path.realpath(
+            self.repository.path)) for path in
+                   changed_files(ref, self.repository.path))
+
+    def test_nothing_changed(self):
+        self.assertEqual(self._changed_files(), set())
+
+    def test_all_changes(self):
+        self.repository.write('modified.py', 'changed = True\n')
+        os.remove(os.path.join(self.repository.path, 'deleted.py'))
+        self.repository.write('package/added.py')
+        self.repository.commit()
+        self.repository.write('kept.py', 'changed = True\n')
+        self.repository.write('untracked.py')
+        self.assertEqual(self._changed_files(), set([
+            'modified.py', os.path.join('package', 'added.py'), 'kept.py',
+            'untracked.py']))
+
+    def test_non_ascii_names(self):
+        self.repository.write(os.path.join('unicode', u'caf\xe9.py'))
+        self.repository.commit()
+        self.repository.write(os.path.join('unicode', u'na\xefve.py'))
+        directory = os.path.join(self.repository.path, 'unicode')
+        self.assertEqual(self._changed_files(), set(
+            os.path.join('unicode', name) for name in os.listdir(directory)))
+        self.assertEqual(len(os.listdir(directory)), 2)
+
+    def test_changes_on_ref_are_ignored(self):
+        self.repository.git('checkout', '-q', 'base')
+        self.repository.write('modified.py', 'changed = True\n')
+        self.repository.commit()
+        self.repository.git('checkout', '-q', '-')
+        self.assertEqual(self._changed_files(), set())
+
+    def test_unknown_ref(self):
+        with self.assertRaises(subprocess.CalledProcessError):
+            changed_files('unknown', self.repository.path)
+
+
+class TestChangedLines(TestCase):
+    def setUp(self):
+        self.repository = GitRepository()
+        self.addCleanup(self.repository.remove)
+        self.repository.write('modified.py', 'one\ntwo\nthree\nfour\n')
+        self.repository.write('renamed.py', 'kept\n')
+        self.repository.commit()
+        self.repository.git('branch', 'base')
+
+    def test_nothing_changed(self):
+        self.assertEqual(changed_lines('base', self.repository.path), {})
+
+    def test_changed_lines(self):
+        self.repository.write('modified.py', 'one\n2\nthree\n3.5\n')
+        self.repository.git('mv', 'renamed.py', 'moved.py')
+        self.repository.commit()
+        self.repository.write('untracked.py', 'first\nsecond')
+        path = os.path.realpath(self.repository.path)
+        self.assertEqual(changed_lines('base', self.repository.path), {
+            os.path.join(path, 'modified.py'): set([2, 4]),
+            os.path.join(path, 'untracked.py'): set([1, 2])})
+
+    def test_removed_lines(self):
+        self.repository.write('modified.py', 'one\nfour\n')
+        path = os.path.realpath(self.repository.path)
+        self.assertEqual(changed_lines('base', self.repository.path),
+                         {os.path.join(path, 'modified.py'): set()})
+
+
+class TestIgnoredFiles(TestCase):
+    def setUp(self):
+        self.repository = GitRepository()
+        self.addCleanup(self.repository.remove)
+
+    def test_ignored(self):
+        self.repository.write('.gitignore', 'build/\n*.log\n')
+        self.repository.write('build/module.py')
+        self.repository.write('package/run.log')
+        self.repository.write('package/module.py')
+        path = os.path.realpath(self.repository.path)
+        self.assertEqual(ignored_files(self.repository.path), set([
+            os.path.join(path, 'build'),
+            os.path.join(path, 'package', 'run.log')]))
+
+    def test_not_a_repository(self):
+        self.assertEqual(ignored_files(os.path.dirname(
+            self.repository.path)), set())
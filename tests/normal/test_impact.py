@@ -0,0 +1,126 @@
+"""Test Test Impact Selection"""
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import six
+
+import deplytils.cache
+from deplytils.impact import ImpactIndex, ImpactTestRunner
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       'impact_fixture')
+CACHE = os.path.realpath(os.path.splitext(deplytils.cache.__file__)[0] +
+                         '.py')
+DISCOVERY_TEST = os.path.realpath(os.path.join(FIXTURE,
+                                               'impact_discovery.py'))
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestImpactTestRunner(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.index_path = os.path.join(self.directory, 'impact.json')
+
+    def _run(self, **kwargs):
+        output = six.StringIO()
+        runner = ImpactTestRunner(
+            FIXTURE, 'impact_*.py', FIXTURE, index_path=self.index_path,
+            stream=output, coverage_kwargs=dict(include=[
+                '*deplytils/cache.py', '*deplytils/discovery.py']), **kwargs)
+        result = runner.run()
+        return runner, result, output.getvalue().splitlines()
+
+    def test_recorded(self):
+        runner, result, lines = self._run()
+        self.assertEqual(result.testsRun, 3)
+        self.assertEqual(len(result.failures), 1)
+        self.assertEqual(lines[0],
+                         'Running all 3 tests, as no change is given')
+        tests = ImpactIndex.load(self.index_path, runner.index.key).tests
+        self.assertEqual(sorted(tests), [
+            'impact_cache.TestCache.test_hash',
+            'impact_discovery.TestDiscovery.test_files'])
+        self.assertIn(CACHE, tests['impact_cache.TestCache.test_hash'])
+        self.assertNotIn(CACHE,
+                         tests['impact_discovery.TestDiscovery.test_files'])
+        self.assertIn(DISCOVERY_TEST,
+                      tests['impact_discovery.TestDiscovery.test_files'])
+
+    def test_selected(self):
+        self._run()
+        _, result, lines = self._run(changed=[CACHE])
+        self.assertEqual(result.testsRun, 2)
+        self.assertEqual(lines[0],
+                         'Running 2 of 3 tests, impacted by 1 changed files')
+        _, result, _ = self._run(changed=[DISCOVERY_TEST])
+        self.assertEqual(result.testsRun, 2)
+        readme = os.path.join(FIXTURE, 'README')
+        _, result, lines = self._run(changed=[readme])
+        self.assertEqual(result.testsRun, 3)
+        self.assertEqual(lines[0], 'Running all 3 tests, as {} was never '
+                         'executed by a test'.format(os.path.realpath(readme)))
+
+    def test_nothing_recorded(self):
+        _, result, lines = self._run(changed=[CACHE])
+        self.assertEqual(result.testsRun, 3)
+        self.assertEqual(lines[0],
+                         'Running all 3 tests, as no impact is recorded')
+
+    def test_unseen_file(self):
+        self._run()
+        unseen = os.path.join(FIXTURE, 'unseen.py')
+        _, result, lines = self._run(changed=[unseen])
+        self.assertEqual(result.testsRun, 3)
+        self.assertEqual(lines[0], 'Running all 3 tests, as {} was never '
+                         'executed by a test'.format(os.path.realpath(unseen)))
+
+    def test_stale(self):
+        self._run()
+        with open(self.index_path) as file_:
+            stored = json.load(file_)
+        for entry in stored['files']:
+            entry[1] = 'outdated'
+        with open(self.index_path, 'w') as file_:
+            json.dump(stored, file_)
+        _, result, lines = self._run(changed=[CACHE])
+        self.assertEqual(result.testsRun, 3)
+        self.assertEqual(lines[0],
+                         'Running all 3 tests, as the impact index is stale')
+
+    def test_changed_since(self):
+        self._run()
+        _, result, lines = self._run(changed_since='HEAD')
+        self.assertGreaterEqual(result.testsRun, 1)
+        self.assertTrue(lines[0].startswith('Running'))
+
+
+class TestImpactIndex(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'impact.json')
+
+    def test_saved(self):
+        index = ImpactIndex(self.path, 'key')
+        index.record('test', [CACHE, os.path.join(self.directory, 'gone.py')])
+        index.record('forgotten', [DISCOVERY_TEST])
+        index.forget(['forgotten', 'unknown'])
+        index.save()
+        loaded = ImpactIndex.load(self.path, 'key')
+        self.assertEqual(loaded.tests, index.tests)
+        self.assertEqual(sorted(loaded.files), sorted(index.tests['test']))
+        self.assertEqual(loaded.stale_files(set()), [])
+
+    def test_other_key(self):
+        index = ImpactIndex(self.path, 'key')
+        index.record('test', [CACHE])
+        index.save()
+        self.assertEqual(ImpactIndex.load(self.path, 'other').tests, {})
+        with open(self.path, 'w') as file_:
+            file_.write('not json')
+        self.assertEqual(ImpactIndex.load(self.path, 'key').tests, {})
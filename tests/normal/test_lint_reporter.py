@@ -0,0 +1,60 @@
+"""Test Lint Reporter"""
+import json
+import warnings
+from unittest import TestCase
+
+import six
+
+from deplytils.extensions.lint import ProjectLinter
+from deplytils.extensions.lint_reporter import (SCORING_CATEGORIES,
+                                                TEXT_TEMPLATE, LintFailure,
+                                                StreamingReporter)
+from tests.normal.reporter_fixture import MessageCollector
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestStreamingReporter(TestCase):
+    def test_json_lines(self):
+        collected = MessageCollector()
+        with self.assertRaises(AssertionError):
+            _lint(reporter=collected)
+        output = six.StringIO()
+        with self.assertRaises(AssertionError):
+            _lint(reporter=StreamingReporter(output), jobs=1)
+
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(
+            sorted((line['path'], line['line'], line['message-id'])
+                   for line in lines),
+            sorted((message.path, message.line, message.msg_id)
+                   for message in collected.messages))
+
+    def test_template(self):
+        output = six.StringIO()
+        _lint('../deplytils', reporter=StreamingReporter(
+            output, template=TEXT_TEMPLATE))
+        self.assertIn('rated at 10.00/10', output.getvalue())
+
+    def test_fail_fast(self):
+        for kwargs in (dict(args=['--jobs=1']), dict(jobs=1), dict(jobs=2)):
+            output = six.StringIO()
+            with self.assertRaises(LintFailure) as context:
+                _lint(reporter=StreamingReporter(output, fail_fast=True),
+                      **kwargs)
+            self.assertIn(context.exception.lint_message.category,
+                          SCORING_CATEGORIES)
+            self.assertEqual(len(output.getvalue().splitlines()), 1)
+
+    def test_project_linter_fails_fast(self):
+        with self.assertRaises(LintFailure):
+            _lint(fail_fast=True)
+        with self.assertRaises(ValueError):
+            ProjectLinter(reporter=MessageCollector(), fail_fast=True)
+
+
+def _lint(path='normal/lint_fixture', **kwargs):
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=DeprecationWarning)
+        warnings.filterwarnings("ignore", category=PendingDeprecationWarning)
+        ProjectLinter(path, **kwargs).run()
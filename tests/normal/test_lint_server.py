@@ -0,0 +1,147 @@
+"""Test Lint Server"""
+import errno
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+import threading
+import warnings
+from socket import AF_UNIX, SHUT_WR, SOCK_STREAM, socket as new_socket
+from unittest import TestCase
+
+from deplytils.extensions import lint_server
+from deplytils.extensions.lint import ProjectLinter
+from deplytils.extensions.lint_server import LintServer, request_lint
+from tests.normal.reporter_fixture import MessageCollector
+
+_CLEAN_MODULE = '"""Clean module"""\nimport os\n\nprint(os.sep)\n'
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring,protected-access
+class TestLintServer(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.socket = os.path.join(self.directory, 'lint.sock')
+        open(self.socket, 'w').close()
+        self.server = LintServer(self.socket)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.server.listening.wait()
+        self.addCleanup(self.thread.join)
+        self.addCleanup(lint_server.request, self.socket, {'command': 'stop'})
+
+    def _lint(self, path, reporter=None, socket=None, **kwargs):
+        linter = ProjectLinter(path, reporter=reporter,
+                               server_socket=socket or self.socket, **kwargs)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+            warnings.filterwarnings(
+                "ignore", category=PendingDeprecationWarning)
+            linter.run()
+        return linter
+
+    def test_matches_in_process(self):
+        in_process = MessageCollector()
+        with self.assertRaises(AssertionError):
+            self._lint('normal/lint_fixture', in_process, socket=os.path.join(
+                self.directory, 'missing.sock'))
+        served = MessageCollector()
+        with self.assertRaises(AssertionError):
+            self._lint('normal/lint_fixture', served)
+        self.assertTrue(in_process.messages)
+        self.assertEqual(sorted(in_process.messages), sorted(served.messages))
+
+    def test_changes_are_invalidated(self):
+        project = os.path.join(self.directory, 'project')
+        os.mkdir(project)
+        module = os.path.join(project, 'lint_server_fixture.py')
+        with open(module, 'w') as file_:
+            file_.write(_CLEAN_MODULE)
+        self._lint(project)
+        self._lint(project)
+
+        with open(module, 'w') as file_:
+            file_.write(_CLEAN_MODULE.replace('print(os.sep)', 'os = 1'))
+        os.utime(module, (0, 0))
+        messages = MessageCollector()
+        with self.assertRaises(AssertionError):
+            self._lint(project, messages)
+        self.assertIn('unused-import',
+                      [message.symbol for message in messages.messages])
+
+    def test_profile(self):
+        project = os.path.join(self.directory, 'project')
+        os.mkdir(project)
+        with open(os.path.join(project, 'profiled.py'), 'w') as file_:
+            file_.write(_CLEAN_MODULE)
+        timings = self._lint(project, profile=True).timings
+        self.assertEqual(list(timings['files']),
+                         [os.path.join(project, 'profiled.py')])
+
+    def test_errors_are_reported(self):
+        with self.assertRaises(RuntimeError):
+            request_lint(self.socket, {'plugins': ['missing_plugin']}, [])
+
+    def test_malformed_requests(self):
+        for data in (b'{not json', b'{}', b'[]'):
+            client = new_socket(AF_UNIX, SOCK_STREAM)
+            try:
+                client.connect(self.socket)
+                client.sendall(data)
+                client.shutdown(SHUT_WR)
+                self.assertIn('error', lint_server._receive(client))
+            finally:
+                client.close()
+        self.assertEqual(lint_server.request(
+            self.socket, {'command': 'ping'}), {})
+
+    def test_errors_fall_back(self):
+        def fail(*_):
+            raise ValueError('server failure')
+        self.server.lint = fail
+        messages = MessageCollector()
+        with self.assertRaises(AssertionError):
+            self._lint('normal/lint_fixture', messages)
+        self.assertTrue(messages.messages)
+
+    def test_listening_socket_is_kept(self):
+        with self.assertRaises(EnvironmentError) as raised:
+            LintServer(self.socket).serve_forever()
+        self.assertEqual(raised.exception.errno, errno.EADDRINUSE)
+        self.assertTrue(lint_server._is_listening(self.socket))
+
+
+class TestMain(TestCase):
+    def test_start_and_stop(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        socket = os.path.join(directory, 'lint.sock')
+        thread = threading.Thread(target=lint_server.main, args=([socket],))
+        thread.start()
+        while not os.path.exists(socket):
+            thread.join(0.01)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            with _Argv(['lint_server', socket, '--stop']):
+                runpy.run_module('deplytils.extensions.lint_server',
+                                 run_name='__main__')
+        thread.join()
+        self.assertFalse(os.path.exists(socket))
+
+
+class _Argv(object):
+    """Temporarily replace sys.argv"""
+    def __init__(self, argv):
+        self.argv = argv
+        self.original = None
+
+    def __enter__(self):
+        self.original = sys.argv
+        sys.argv = self.argv
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        sys.argv = self.original
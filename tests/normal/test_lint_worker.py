@@ -0,0 +1,24 @@
+"""Test Lint Worker"""
+import os
+from unittest import TestCase
+
+from pylint.lint import PyLinter
+
+from deplytils.extensions.lint_worker import (dump_result, iter_lint,
+                                              lint_shard, load_result)
+
+_FIXTURE = os.path.join('normal', 'lint_fixture')
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestLintWorker(TestCase):
+    def test_shard_matches_iterated(self):
+        config = PyLinter()._get_jobs_config()  # pylint: disable=W0212
+        paths = [os.path.join(_FIXTURE, name)
+                 for name in ('imperfect.py', 'unimported.py')]
+        results = lint_shard((config, paths, False))
+        self.assertEqual([result[0] for result in results], paths)
+        self.assertEqual(
+            [load_result(dump_result(result))[3] for result in results],
+            [result[3] for result in iter_lint(config, paths)])
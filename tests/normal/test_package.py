@@ -0,0 +1,56 @@
+"""Test the Package Facade"""
+import json
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+import deplytils
+
+# seconds `import deplytils` may take, well above its few milliseconds
+IMPORT_BUDGET = 0.05
+HEAVY_MODULES = ('coverage', 'pylint', 'astroid', 'asyncio', 'multiprocessing')
+IMPORT_SCRIPT = '''
+import json, sys
+from timeit import default_timer
+start = default_timer()
+import deplytils
+seconds = default_timer() - start
+from deplytils import cached_class_property, MockCoverage
+print(json.dumps([seconds, sorted(sys.modules)]))
+'''
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestPackage(TestCase):
+    def test_exports(self):
+        from deplytils.decorators import cached_class_property
+        self.assertIs(getattr(deplytils, 'cached_class_property'),
+                      cached_class_property)
+        self.assertIn('CoverageContext', dir(deplytils))
+        for name in deplytils.__all__:
+            self.assertIn(name, dir(deplytils))
+
+    def test_unknown_attribute(self):
+        with self.assertRaises(AttributeError):
+            getattr(deplytils, 'missing')
+
+    def test_import_time_budget(self):
+        runs = [self.import_in_new_process() for _ in range(3)]
+        self.assertLess(min(seconds for seconds, _ in runs), IMPORT_BUDGET)
+        _, modules = runs[0]
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+
+    @staticmethod
+    def import_in_new_process():
+        # without the variables of a coverage collector, whose
+        # sitecustomize would import and start coverage in the process
+        env = dict(os.environ)
+        env.pop('DEPLYTILS_COVERAGE_COLLECTOR', None)
+        env['PYTHONPATH'] = os.path.dirname(
+            os.path.dirname(os.path.abspath(deplytils.__file__)))
+        output = subprocess.check_output(
+            [sys.executable, '-c', IMPORT_SCRIPT], env=env)
+        return json.loads(output.decode('utf-8'))
@@ -0,0 +1,126 @@
+"""Test Performance Contexts"""
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase, skipIf, skipUnless
+
+try:
+    import tracemalloc
+except ImportError:  # python 2
+    tracemalloc = None
+
+from deplytils.contexts.performance import (
+    BudgetExceeded, StrictMemory, StrictTiming)
+
+
+def _sleep():
+    time.sleep(0.02)
+
+
+def _allocate():
+    return [0] * 100000
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestStrictTiming(TestCase):
+    def test_within_budget(self):
+        with StrictTiming(wall=10, cpu=10) as timing:
+            _sleep()
+        self.assertGreaterEqual(timing.measurements['wall'], 0.02)
+        self.assertLess(timing.measurements['cpu'],
+                        timing.measurements['wall'])
+
+    def test_exceeds_budget(self):
+        with self.assertRaises(BudgetExceeded) as raised:
+            with StrictTiming(wall=0.001, tolerance=0.5):
+                _sleep()
+        self.assertEqual(len(raised.exception.failures), 1)
+        self.assertIn('wall', str(raised.exception))
+        self.assertIn('50%', str(raised.exception))
+        self.assertEqual(raised.exception.diagnostics, '')
+
+    def test_hotspots(self):
+        with self.assertRaises(BudgetExceeded) as raised:
+            StrictTiming(wall=0.001, hotspots=3).run(_sleep)
+        self.assertIn('_sleep', raised.exception.diagnostics)
+
+    def test_block_error_is_not_masked(self):
+        with self.assertRaises(ValueError):
+            with StrictTiming(wall=0):
+                raise ValueError
+
+    def test_run_keeps_best_of_repeats(self):
+        calls = []
+        timing = StrictTiming(repeat=3, warmup=2)
+        measurements = timing.run(calls.append, 1)
+        self.assertEqual(calls, [1] * 5)
+        self.assertEqual(sorted(measurements), ['cpu', 'wall'])
+        self.assertIs(timing.measurements, measurements)
+
+
+class TestBaseline(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'baseline.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_and_compare(self):
+        timing = StrictTiming(baseline=self.path)
+        timing.run(_sleep)
+        timing.save(self.path)
+        with open(self.path) as file_:
+            self.assertEqual(sorted(json.load(file_)), ['cpu', 'wall'])
+        StrictTiming(baseline=self.path, tolerance=10).run(_sleep)
+        with self.assertRaises(BudgetExceeded) as raised:
+            StrictTiming(baseline=self.path).run(time.sleep, 0.1)
+        self.assertIn('baseline', str(raised.exception))
+
+    def test_baseline_dict(self):
+        with self.assertRaises(BudgetExceeded):
+            StrictTiming(baseline={'wall': 0.001}).run(_sleep)
+
+
+@skipIf(tracemalloc is None, 'requires tracemalloc')
+class TestStrictMemory(TestCase):
+    def test_within_budget(self):
+        memory = StrictMemory(peak=10 ** 8)
+        with memory:
+            _allocate()
+        self.assertGreater(memory.measurements['peak'], 100000)
+
+    def test_exceeds_budget(self):
+        with self.assertRaises(BudgetExceeded) as raised:
+            StrictMemory(peak=1000, repeat=2).run(_allocate)
+        self.assertIn('peak', str(raised.exception))
+        self.assertEqual(raised.exception.diagnostics, '')
+
+    def test_allocation_sites(self):
+        with self.assertRaises(BudgetExceeded) as raised:
+            with StrictMemory(peak=1000, hotspots=2):
+                kept = _allocate()
+        self.assertIn('test_performance.py', raised.exception.diagnostics)
+        self.assertIn('still allocated on exit', raised.exception.diagnostics)
+        self.assertEqual(len(kept), 100000)
+
+    @skipUnless(hasattr(tracemalloc, 'reset_peak'), 'requires reset_peak')
+    def test_nested(self):
+        with StrictMemory() as outer:
+            # pylint: disable=expression-not-assigned
+            [_allocate() for _ in range(5)]
+            with StrictMemory() as inner:
+                _allocate()
+        self.assertGreater(inner.measurements['peak'], 100000)
+        self.assertGreater(outer.measurements['peak'],
+                           2 * inner.measurements['peak'])
+
+    @skipIf(hasattr(tracemalloc, 'reset_peak'), 'nesting is supported')
+    def test_nested_unsupported(self):
+        with StrictMemory():
+            with self.assertRaises(RuntimeError):
+                with StrictMemory():
+                    _allocate()
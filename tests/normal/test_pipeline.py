@@ -0,0 +1,202 @@
+"""Test Pipelines"""
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+
+import six
+
+from deplytils.pipeline import Pipeline, Step
+from tests.normal.git_fixture import GitRepository
+
+# creates a flag file, then waits up to 10 seconds for another one
+HANDSHAKE = '''
+import os, sys, time
+open({!r}, 'w').close()
+for _ in range(1000):
+    if os.path.exists({!r}):
+        sys.exit(0)
+    time.sleep(0.01)
+sys.exit(1)
+'''
+
+
+def _python(code):
+    return [sys.executable, '-c', code]
+
+
+def _run(steps, **kwargs):
+    output = six.StringIO()
+    results = Pipeline(steps, output=output, **kwargs).run()
+    return results, output.getvalue().splitlines()
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestPipeline(TestCase):
+    def test_streamed_output(self):
+        results, lines = _run([
+            Step('first', _python('print("one"); print("two")')),
+            Step('second', _python('import sys; sys.exit(3)')),
+        ])
+        self.assertLess(lines.index('[first] one'),
+                        lines.index('[first] two'))
+        self.assertTrue(results['first'].succeeded)
+        self.assertEqual(results['second'].returncode, 3)
+        self.assertFalse(results['second'].skipped)
+        self.assertIn('[second] exited with 3 after {:0.2f}s'.format(
+            results['second'].seconds), lines)
+
+    def test_requirements(self):
+        results, lines = _run([
+            Step('last', _python('print("last")'), requires=['middle']),
+            Step('middle', _python('print("middle")'), requires=['first']),
+            Step('first', _python('print("first")')),
+        ])
+        self.assertLess(lines.index('[first] first'),
+                        lines.index('[middle] middle'))
+        self.assertLess(lines.index('[middle] middle'),
+                        lines.index('[last] last'))
+        self.assertEqual(sorted(results), ['first', 'last', 'middle'])
+
+    def test_skipped(self):
+        results, lines = _run([
+            Step('failed', _python('import sys; sys.exit(1)')),
+            Step('skipped', _python('print("ran")'), requires=['failed']),
+            Step('also_skipped', _python(''), requires=['skipped']),
+        ])
+        self.assertTrue(results['skipped'].skipped)
+        self.assertTrue(results['also_skipped'].skipped)
+        self.assertFalse(results['also_skipped'].succeeded)
+        self.assertNotIn('[skipped] ran', lines)
+        self.assertIn('[also_skipped] skipped, as a requirement failed',
+                      lines)
+
+    def test_concurrent(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        results, _ = _run([
+            Step('ping', _python(HANDSHAKE.format('ping', 'pong')),
+                 cwd=directory),
+            Step('pong', _python(HANDSHAKE.format('pong', 'ping')),
+                 cwd=directory),
+        ])
+        self.assertTrue(results['ping'].succeeded)
+        self.assertTrue(results['pong'].succeeded)
+
+    def test_jobs(self):
+        results, lines = _run([
+            Step('first', _python('print("first")')),
+            Step('second', _python('print("second")')),
+        ], jobs=1)
+        self.assertLess(lines.index('[first] exited with 0 after {:0.2f}s'
+                                    .format(results['first'].seconds)),
+                        lines.index('[second] second'))
+
+    def test_invalid_steps(self):
+        with self.assertRaises(AssertionError):
+            Pipeline([Step('step', []), Step('step', [])])
+        with self.assertRaises(AssertionError):
+            Pipeline([Step('first', [], requires=['second']),
+                      Step('second', [], requires=['first'])])
+        with self.assertRaises(AssertionError):
+            Pipeline([Step('step', [], requires=['unknown'])])
+        with self.assertRaises(AssertionError):
+            Pipeline([Step('step', [])], jobs=0)
+
+
+class TestStepCache(TestCase):
+    def setUp(self):
+        self.repository = GitRepository()
+        self.addCleanup(self.repository.remove)
+        self.directory = self.repository.path
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.repository.write('.gitignore', 'cache/\nbuild/\n*.log\n')
+        self.repository.write('setup.cfg')
+        self._write('source.py', 'first')
+
+    def _write(self, name, content):
+        self.repository.write(os.path.join('inputs', name), content)
+
+    def _run(self, steps, **kwargs):
+        return _run(steps, cache_dir=self.cache_dir, **kwargs)
+
+    def _step(self, name='step', code='print("ran")', **kwargs):
+        kwargs.setdefault('inputs', ['inputs', 'setup.cfg', 'missing.cfg'])
+        return Step(name, _python(code), cwd=self.directory, **kwargs)
+
+    def test_replayed(self):
+        first, _ = self._run([self._step()])
+        self.assertFalse(first['step'].cached)
+        self.assertIn('ran', first['step'].output)
+        results, lines = self._run([self._step()])
+        self.assertTrue(results['step'].cached)
+        self.assertEqual(results['step'].output, first['step'].output)
+        self.assertIn('[step] ran', lines)
+        self.assertTrue(lines[-1].endswith('replayed from cache'))
+
+    def test_changed_inputs(self):
+        self._run([self._step()])
+        self._write('source.py', 'second')
+        results, _ = self._run([self._step()])
+        self.assertFalse(results['step'].cached)
+        results, _ = self._run([self._step()])
+        self.assertTrue(results['step'].cached)
+        self._write('run.log', 'ignored')
+        self._write(os.path.join('build', 'source.py'), 'ignored')
+        self.repository.git('add', '-A')
+        results, _ = self._run([self._step()])
+        self.assertTrue(results['step'].cached)
+        self.repository.write('setup.cfg', 'changed')
+        results, _ = self._run([self._step()])
+        self.assertFalse(results['step'].cached)
+
+    def test_changed_config(self):
+        self._run([self._step()])
+        results, _ = self._run([self._step(versions=['1.0'])])
+        self.assertFalse(results['step'].cached)
+
+    def test_failures_not_cached(self):
+        code = 'import sys; sys.exit(1)'
+        self._run([self._step(code=code)])
+        results, _ = self._run([self._step(code=code)])
+        self.assertFalse(results['step'].cached)
+
+    def test_requirements(self):
+        steps = [self._step('first'),
+                 self._step('second', requires=['first'], inputs=[])]
+        self._run(steps)
+        results, _ = self._run(steps)
+        self.assertTrue(results['second'].cached)
+        self._write('source.py', 'second')
+        results, _ = self._run(steps)
+        self.assertFalse(results['second'].cached)
+
+    def test_never_cached(self):
+        steps = [self._step('first', inputs=None),
+                 self._step('second', requires=['first'])]
+        self._run(steps)
+        results, _ = self._run(steps)
+        self.assertFalse(results['first'].cached)
+        self.assertFalse(results['second'].cached)
+
+    def test_bypassed(self):
+        self._run([self._step()])
+        results, _ = _run([self._step()])
+        self.assertFalse(results['step'].cached)
+
+    def test_outputs_restored(self):
+        code = 'open("build/data.1", "w").write("measured")'
+        step = self._step(code=code, outputs=['build/data.*'])
+        os.mkdir(os.path.join(self.directory, 'build'))
+        self._run([step])
+        os.remove(os.path.join(self.directory, 'build', 'data.1'))
+        results, _ = self._run([step])
+        self.assertTrue(results['step'].cached)
+        with open(os.path.join(self.directory, 'build', 'data.1')) as file_:
+            self.assertEqual(file_.read(), 'measured')
+
+    def test_pruned(self):
+        self._run([self._step('first'), self._step('second')], cache_size=1)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
@@ -0,0 +1,135 @@
+"""Test Sharded Test Runs"""
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from unittest import TestCase
+
+import six
+
+from deplytils.sharding import ShardedTestRunner, TestId, balance, run_shard
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       'sharding_fixture')
+
+
+def _units(*sizes):
+    units = []
+    for index, size in enumerate(sizes):
+        units.append([TestId('unit{}.test{}'.format(index, test))
+                      for test in range(size)])
+    return units
+
+
+def _ids(shards):
+    return [[unit[0].id().split('.')[0] for unit in shard] for shard in shards]
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class TestBalance(TestCase):
+    def test_counts(self):
+        self.assertEqual(_ids(balance(_units(1, 3, 1, 1), {}, 2)),
+                         [['unit1'], ['unit0', 'unit2', 'unit3']])
+
+    def test_durations(self):
+        durations = {'unit0.test0': 5.0, 'unit1.test0': 1.0,
+                     'unit2.test0': 2.0}
+        self.assertEqual(_ids(balance(_units(1, 1, 1, 1), durations, 2)),
+                         [['unit0'], ['unit1', 'unit2', 'unit3']])
+
+    def test_more_jobs_than_units(self):
+        self.assertEqual(_ids(balance(_units(1, 1), {}, 4)),
+                         [['unit0'], ['unit1']])
+        self.assertEqual(balance([], {}, 4), [])
+
+
+class TestShardedTestRunner(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.durations_path = os.path.join(self.directory, 'durations.json')
+
+    def _run(self, pattern='sample_*.py', **kwargs):
+        output = six.StringIO()
+        runner = ShardedTestRunner(
+            FIXTURE, pattern, FIXTURE, jobs=2,
+            durations_path=self.durations_path, stream=output,
+            coverage_kwargs=dict(include=['*deplytils/cache.py']), **kwargs)
+        return runner, runner.run(), output.getvalue()
+
+    def test_merged_result(self):
+        runner, result, output = self._run()
+        self.assertEqual(result.testsRun, 8)
+        self.assertFalse(result.wasSuccessful())
+        self.assertEqual([str(test) for test, _ in result.failures],
+                         ['sample_failing.TestFailing.test_failure'])
+        self.assertIn('sample failure', result.failures[0][1])
+        self.assertEqual([test.id() for test, _ in result.errors],
+                         ['sample_failing.TestFailing.test_error'])
+        self.assertEqual(len(result.skipped), 1)
+        self.assertEqual(len(result.expectedFailures), 1)
+        self.assertEqual(len(result.unexpectedSuccesses), 1)
+        self.assertIn('FAIL: sample_failing.TestFailing.test_failure',
+                      output)
+        self.assertIn('Ran 8 tests', output)
+        self.assertIn('in 2 shards', output)
+        self.assertTrue(output.endswith('FAILED\n'))
+
+    def test_durations(self):
+        runner, _, _ = self._run('sample_passing.py')
+        with open(self.durations_path) as file_:
+            durations = json.load(file_)
+        self.assertEqual(durations, runner.durations)
+        self.assertEqual(sorted(durations), [
+            'sample_passing.TestFirst.test_hash',
+            'sample_passing.TestFirst.test_other_hash',
+            'sample_passing.TestSecond.test_passing',
+            'sample_passing.TestSecond.test_skipped'])
+        _, result, output = self._run('sample_passing.py')
+        self.assertTrue(result.wasSuccessful())
+        self.assertTrue(output.endswith('OK\n'))
+
+    def test_unreadable_durations(self):
+        with open(self.durations_path, 'w') as file_:
+            file_.write('not json')
+        _, result, _ = self._run('sample_passing.py')
+        self.assertEqual(result.testsRun, 4)
+
+    def test_no_durations(self):
+        runner = ShardedTestRunner(FIXTURE, 'sample_passing.py', FIXTURE,
+                                   stream=six.StringIO())
+        self.assertTrue(runner.run().wasSuccessful())
+        self.assertGreater(runner.jobs, 0)
+
+    def test_coverage(self):
+        runner, _, _ = self._run('sample_passing.py')
+        self.assertEqual(len(runner.evaluation.files), 1)
+        self.assertGreater(runner.evaluation.total, 0)
+        self.assertEqual(runner.threshold_failures(0), [])
+        self.assertEqual(runner.threshold_failures(100, {'*cache.py': 0}), [
+            '{:0.2f}% does not meet 100.00% threshold'.format(
+                runner.evaluation.total)])
+        self.assertEqual(len(runner.threshold_failures(
+            0, package_thresholds={'unknown': 0})), 1)
+
+    def test_no_coverage_data(self):
+        runner = ShardedTestRunner(
+            FIXTURE, 'sample_passing.py', FIXTURE, stream=six.StringIO(),
+            coverage_kwargs=dict(include=['*missing*']))
+        self.assertTrue(runner.run().wasSuccessful())
+        self.assertEqual(runner.evaluation.files, {})
+        self.assertEqual(runner.evaluation.total, 0.0)
+        self.assertEqual(runner.threshold_failures(0), ['No coverage data'])
+
+    def test_pickled_shard(self):
+        # as sent to spawned workers, which share no state with the runner
+        suite = unittest.defaultTestLoader.discover(
+            FIXTURE, 'sample_passing.py', FIXTURE)
+        summary = run_shard(pickle.loads(pickle.dumps(
+            ([suite], dict(include=['*deplytils/cache.py'])))))
+        self.assertEqual(summary['testsRun'], 4)
+        self.assertEqual(summary['skipped'], [(
+            'sample_passing.TestSecond.test_skipped', 'skipped sample')])
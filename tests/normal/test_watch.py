@@ -0,0 +1,102 @@
+"""Test Watch Mode"""
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+
+import six
+
+from deplytils.watch import ImportGraph, Watcher
+
+SOURCES = {
+    '__init__.py': '',
+    'base.py': 'VALUE = 1\n',
+    'middle.py': 'from .base import VALUE\n\nDOUBLE = 2 * VALUE\n',
+    'other.py': 'import os\n',
+    'broken.py': 'def (\n',
+    'test_middle.py': (
+        'from unittest import TestCase\n\n'
+        'from watched import middle\n\n\n'
+        'class TestMiddle(TestCase):\n'
+        '    def test_double(self):\n'
+        '        self.assertEqual(middle.DOUBLE, 2)\n'),
+}
+
+
+# pylint: disable=unused-variable
+# pragma pylint: disable=missing-docstring
+class WatchTestCase(TestCase):
+    def setUp(self):
+        # named like a test, so the coverage of the tests omits its
+        # modules, which are removed once it ran
+        self.project = tempfile.mkdtemp(prefix='watch_test_')
+        self.addCleanup(shutil.rmtree, self.project)
+        os.mkdir(os.path.join(self.project, 'watched'))
+        for name, source in SOURCES.items():
+            self.write(name, source)
+
+    def tearDown(self):
+        for name in list(sys.modules):
+            if name.split('.')[0] == 'watched':
+                del sys.modules[name]
+        if self.project in sys.path:
+            sys.path.remove(self.project)
+
+    def path(self, name):
+        return os.path.join(self.project, 'watched', name)
+
+    def write(self, name, source):
+        with open(self.path(name), 'w') as file_:
+            file_.write(source)
+
+
+class TestImportGraph(WatchTestCase):
+    def test_affected(self):
+        graph = ImportGraph(self.project)
+        graph.update([self.path(name) for name in SOURCES])
+        self.assertEqual(graph.module_name(self.path('__init__.py')),
+                         'watched')
+        self.assertEqual(graph.affected([self.path('base.py')]), set([
+            'watched.base', 'watched.middle', 'watched.test_middle']))
+        self.assertEqual(graph.affected([self.path('other.py')]),
+                         set(['watched.other']))
+        self.assertEqual(graph.imports['watched.broken'], set())
+
+    def test_removed(self):
+        graph = ImportGraph(self.project)
+        graph.update([self.path('base.py')])
+        os.remove(self.path('base.py'))
+        graph.update([self.path('base.py')])
+        self.assertEqual(graph.paths, {})
+
+
+class TestWatcher(WatchTestCase):
+    def setUp(self):
+        super(TestWatcher, self).setUp()
+        self.output = six.StringIO()
+        self.watcher = Watcher(self.project, lint=False, interval=0,
+                               stream=self.output)
+
+    def test_rechecks_affected_modules(self):
+        self.assertTrue(self.watcher.watch(iterations=1))
+        self.assertIn('6 affected files, 1 test modules', self.last_line())
+        self.write('base.py', 'VALUE = 21\n')
+        self.assertFalse(self.watcher.check(self.watcher.poll()))
+        self.assertIn('3 affected files, 1 test modules', self.last_line())
+        self.assertIn('1 test failures', self.last_line())
+        self.write('other.py', 'import sys\n')
+        self.assertFalse(self.watcher.check(self.watcher.poll()))
+        self.assertIn('1 affected files, 0 test modules', self.last_line())
+        self.assertIn('1 test failures', self.last_line())
+
+    def test_removed_test_module(self):
+        self.write('test_middle.py', 'raise ImportError\n')
+        self.assertFalse(self.watcher.check(self.watcher.poll()))
+        os.remove(self.path('test_middle.py'))
+        self.assertEqual(self.watcher.poll(),
+                         set([self.path('test_middle.py')]))
+        self.assertTrue(self.watcher.check([self.path('test_middle.py')]))
+
+    def last_line(self):
+        return self.output.getvalue().splitlines()[-1]
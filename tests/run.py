@@ -4,108 +4,129 @@ Script to test release candidates. It performs linting as well as unit
 tests with code coverage. If the linting is not perfect, all tests do
 not pass, and there is not 100% coverage on project files (excluding
 tests), the release candidate is not ready.
+
+The test groups run concurrently as steps of a pipeline, each a
+subcommand of this script, the coverage of both groups being combined
+once they passed. Steps are cached, so reruns of unchanged sources only
+replay their results, restoring the coverage data files of the test
+groups, unless run with --no-cache.
+
+The normal tests record the files every test executes, so that
+`run.py impacted [REF]` only runs the normal tests impacted by the files
+changed since REF, HEAD by default.
 """
 from __future__ import print_function  # pylint: disable=unused-variable
 
 import os
 import subprocess
 import sys
-import unittest
 
-from coverage import Coverage
+from astroid import __version__ as astroid_version
+from coverage import Coverage, __version__ as coverage_version
+from pylint.__pkginfo__ import version as pylint_version
 
 from deplytils.contexts.coverage import CoverageContext
-
-
-class Checker(object):
+from deplytils.contexts.coverage_combiner import combine
+
+COVERAGE_TESTS = ('coverage run --branch --rcfile coverage_tests/.coveragerc '
+                  '-p -m unittest discover -s coverage_tests')
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(PROJECT, '.step_cache')
+# sources, tests and configuration, the normal tests linting all of them
+INPUTS = [os.path.join(PROJECT, name) for name in (
+    'deplytils', 'tests', '.pylintrc', 'requirements.txt')]
+VERSIONS = (coverage_version, pylint_version, astroid_version)
+# prefix of the coverage data files of a test group, so the files of
+# each group are cached with its step
+DATA_FILE = '.coverage.{}'
+
+IMPACT_INDEX = os.path.join(PROJECT, '.test_impact.json')
+
+
+def steps():
+    """Steps of the release check"""
+    # imported here, so that the normal tests measure the whole module
+    from deplytils.pipeline import Step
+    script = [sys.executable, os.path.abspath(__file__)]
+    return [
+        Step('coverage_tests', script + ['coverage_tests'], inputs=INPUTS,
+             versions=VERSIONS,
+             outputs=[DATA_FILE.format('coverage_tests') + '.*']),
+        Step('normal_tests', script + ['normal_tests'], inputs=INPUTS,
+             versions=VERSIONS,
+             outputs=[DATA_FILE.format('normal_tests') + '.*']),
+        Step('coverage', script + ['coverage'],
+             requires=('coverage_tests', 'normal_tests'), inputs=[],
+             versions=VERSIONS),
+    ]
+
+
+def run_coverage_tests():
+    """Run the coverage tests under coverage, saving their coverage"""
+    env = dict(os.environ, COVERAGE_FILE=DATA_FILE.format('coverage_tests'))
+    return subprocess.call(COVERAGE_TESTS.split(' '), env=env) == 0
+
+
+def run_normal_tests(changed_since=None):
     """
-    Object to make sure unittests pass, the appropriate coverage is
-    achieved, and everything passes linting.
+    Run other/normal tests, saving their coverage, or only those
+    impacted by the files changed since a git ref
     """
-    def __init__(self):
-        """Cleans up old coverage data files, if any"""
-        self._test_group_errors = 0
-        for file_ in os.listdir(os.curdir):
-            if '.coverage' in file_:
-                os.remove(file_)
-
-    def run(self):
-        """Run all checks"""
-        coverage_tests = self._start_coverage_tests()
-        normal_tests = self._run_normal_tests()
-        coverage_tests_output = self._output_coverage_tests(coverage_tests)
-        self._validate_tests(coverage_tests, coverage_tests_output,
-                             normal_tests)
-        if self._test_group_errors != 0:
-            print('Not all test groups passed!', file=sys.stderr)
-            sys.exit(self._test_group_errors)
-        print('Success! All tests passed!')
-
-    @staticmethod
-    def _start_coverage_tests():
-        """Start the process to test the CoverageContext"""
-        args = ('coverage run --branch --rcfile coverage_tests/.coveragerc '
-                '-p -m unittest discover -s coverage_tests')
-        coverage_tests = subprocess.Popen(
-            args.split(' '), stderr=subprocess.STDOUT, stdout=subprocess.PIPE)
-        return coverage_tests
-
-    @staticmethod
-    def _run_normal_tests():
-        """Run other/normal tests"""
-        with CoverageContext(coverage_kwargs=dict(
-                cover_pylib=False, branch=True, data_suffix=True,
-                config_file='normal/.coveragerc')) as coverage:
-            tests = unittest.TestProgram(module=None, exit=False, argv=[
-                'normal_tests', 'discover', '-s', 'normal'])
-        coverage.coverage.save()
-        return tests
-
-    @staticmethod
-    def _output_coverage_tests(coverage_tests):
-        """Print coverage tests to stderr, as is expected"""
-        coverage_tests.wait()
-        coverage_tests_output = tuple(coverage_tests.stdout.readlines())
-        for byte_line in coverage_tests_output:
-            line = byte_line.decode('utf-8')
-            print(line, file=sys.stderr)
-        return coverage_tests_output
-
-    def _validate_tests(self, coverage_tests, coverage_tests_output,
-                        normal_tests):
-        """Make sure all tests pass"""
-        normal_test_results = normal_tests.result
-        errors = normal_test_results.errors
-        failures = normal_test_results.failures
-        error_template = 'Encountered errors and/or failures in {} tests'
-
-        self.__assert(normal_test_results.testsRun != 0,
-                      'Did not run any test!')
-        self.__assert(errors == [] and failures == [],
-                      error_template.format('normal'))
-        self.__assert(coverage_tests.returncode == 0 and
-                      coverage_tests_output[-1] == b'OK\n',
-                      error_template.format('coverage'))
-        self._validate_coverage()
-
-    def __assert(self, condition, error_message):
-        """Log errors, but don't quit"""
-        if not condition:
-            print(error_message, file=sys.stderr)
-            self._test_group_errors += 1
-
-    def _validate_coverage(self):
-        """Make sure there 100% coverage between the two test groups"""
-        coverage = Coverage(config_file='coverage_tests/.coveragerc',)
-        coverage.load()
-        coverage.combine(strict=True)
-        self.__assert(coverage.report() == 100.0, '100% coverage not achieved')
+    with CoverageContext(multiprocess=True, coverage_kwargs=dict(
+            cover_pylib=False, branch=True, data_suffix=True,
+            data_file=DATA_FILE.format('normal_tests'),
+            config_file='normal/.coveragerc')) as coverage:
+        # imported here, so that the normal tests measure the whole module
+        from deplytils.impact import ImpactTestRunner
+        result = ImpactTestRunner('normal', index_path=IMPACT_INDEX,
+                                  changed_since=changed_since).run()
+    coverage.coverage.save()
+    if result.testsRun == 0 and changed_since is None:
+        print('Did not run any test!', file=sys.stderr)
+        return False
+    return result.wasSuccessful()
+
+
+def validate_coverage():
+    """Make sure there 100% coverage between the two test groups"""
+    coverage = Coverage(config_file='coverage_tests/.coveragerc',)
+    coverage.load()
+    combine(coverage, strict=True)
+    if coverage.report() != 100.0:
+        print('100% coverage not achieved', file=sys.stderr)
+        return False
+    return True
+
+
+def check(use_cache=True):
+    """Run all checks, cleaning up old coverage data files, if any"""
+    for file_ in os.listdir(os.curdir):
+        if '.coverage' in file_:
+            os.remove(file_)
+    from deplytils.pipeline import Pipeline
+    results = Pipeline(steps(), cache_dir=CACHE_DIR if use_cache else None
+                       ).run()
+    failures = [name for name, result in sorted(results.items())
+                if not result.succeeded]
+    if failures:
+        print('Not all test groups passed! {}'.format(', '.join(failures)),
+              file=sys.stderr)
+        return len(failures)
+    print('Success! All tests passed!')
+    return 0
 
 
 def main():
-    """Run the checker"""
-    checker = Checker()
-    checker.run()
+    """Run the checker, or one of its steps"""
+    args = sys.argv[1:]
+    commands = {'coverage_tests': lambda: int(not run_coverage_tests()),
+                'normal_tests': lambda: int(not run_normal_tests()),
+                'coverage': lambda: int(not validate_coverage()),
+                'impacted': lambda: int(not run_normal_tests(
+                    (args[1:] or ['HEAD'])[0]))}
+    if args and args[0] in commands:
+        sys.exit(commands[args[0]]())
+    sys.exit(check(use_cache='--no-cache' not in args))
 
 
 if __name__ == '__main__':